@@ -7,12 +7,102 @@ HITSIZE = 5
 #Offset to use when pasting nodes
 PASTE_OFFSET = 20
 
+#Mouse move handling
+#Display frame interval (ms) - mouse moves are coalesced to one update per frame (~60Hz)
+FRAME_INTERVAL_MS = 16
+#How far (scene units) the mouse can move before the hover hit-test is redone
+HOVER_TOLERANCE = 2
+
+#Level of detail cut-offs, compared with QStyleOptionGraphicsItem.levelOfDetailFromTransform()
+# (1.0 is 100% zoom). Below each value the item is drawn more simply.
+#Skip node/ edge labels and metadata text
+LOD_LABELS = 0.4
+#Hide arrowheads
+LOD_ARROWS = 0.3
+#Draw splines as the polyline through their points (no curve)
+LOD_EDGE_POLYLINE = 0.3
+#Draw nodes as a single point
+LOD_NODE_POINT = 0.15
+#Draw all edges as a straight chord from start to end
+LOD_EDGE_CHORD = 0.1
+
+#Draw each node/ edge as one graphics item, painting its own labels, line & arrow, rather than
+# as a small tree of child items. Far fewer items for Qt to index & paint on large graphs
+COMPACT_ITEMS = False
+
+#Labels (labels.py)
+#Text layouts kept, shared by all labels with the same text. Least recently used are dropped
+LABEL_CACHE_MAX = 4096
+#Space around label text (as a QGraphicsTextItem's document margin)
+LABEL_MARGIN = 4
+
+#Extra views (graphView.py)
+#Zoom factor per mouse wheel step, and the zoom limits (1.0 is 100%)
+VIEW_WHEEL_ZOOM = 1.15
+VIEW_MIN_ZOOM = 0.02
+VIEW_MAX_ZOOM = 8.0
+#The overview pane picks its level of detail as if zoomed out this much further (cheaper drawing)
+OVERVIEW_LOD_SCALE = 0.5
+#Margin around the graph in the overview, as a fraction of the graph size
+OVERVIEW_MARGIN = 0.05
+#How long (ms) after a burst of scene changes the overview checks the graph still fits
+OVERVIEW_REFIT_MS = 200
+
+#Tiled background cache (tileCache.py): unselected, unchanged items are drawn from image tiles
+USE_TILE_CACHE = False
+#Tile edge, in device pixels
+TILE_SIZE = 256
+#Tiles kept (all zoom levels), least recently used are dropped
+TILE_CACHE_MAX_TILES = 512
+#Worker threads rendering tiles
+TILE_THREADS = 2
+#How long (ms) changed items are painted live before going back into the tiles
+TILE_REBAKE_MS = 500
+
+#Aggregate layers (aggregateLayer.py): idle nodes & edges of big graphs are drawn in batches by one item each
+USE_NODE_LAYER = True
+USE_EDGE_LAYER = True
+#Graphs loaded with at least this many nodes/ edges use them
+NODE_LAYER_MIN_NODES = 50000
+EDGE_LAYER_MIN_EDGES = 50000
+#How long (ms) an item must be idle (unselected, not under the mouse) before it is parked again
+AGGREGATE_PARK_MS = 1000
+#Grid cell (scene units) for finding parked items by position
+AGGREGATE_CELL = 100
+#Items over more grid cells than this (long edges) are checked for every query instead
+AGGREGATE_WIDE_CELLS = 64
+#Parking at least this many items at once rebuilds the scene's index once, rather than per item
+AGGREGATE_BULK_PARK = 64
+
+#Spare edge handles kept for reuse (PolyLineItemHG.HandlePool), beyond this they are freed
+HANDLE_POOL_MAX = 4096
+
+#Debug: count live graphics item wrappers per type (leakTracker.py), printed after edits
+DEBUG_LEAKS = False
+
 DISPLAY_NAME_BY_DEFAULT = True
 
 #Constants for edge type
 STRAIGHT = 0
 SPLINE = 1
 DEFAULT_EDGE = SPLINE #SPLINE #STRAIGHT 
+#Hermite splines: tangents are scaled by this when the curve is computed (accentuates their magnitude)
+HERMITE_TENSION = 4
+#Splines are drawn as cubic Beziers (Qt flattens them). For hit-testing & measuring they are flattened
+# to as few lines per segment as keep (about) this far (scene units) from the curve
+FLATTEN_TOLERANCE = 0.5
+#How splines without given tangents get theirs (per edge: VisEdgeItem.setTangentModel, saved with the edge)
+#Fixed length (HermiteSplineItem.scaleFactor), along the line between the point's neighbours
+TANGENTS_FIXED = "fixed"
+#Catmull-Rom: half the line between the neighbours, so the curve's bends follow the points' spacing
+TANGENTS_CATMULL_ROM = "catmullRom"
+#Cardinal: Catmull-Rom shortened by (1 - CARDINAL_TENSION): 0 is Catmull-Rom, 1 is straight lines
+TANGENTS_CARDINAL = "cardinal"
+CARDINAL_TENSION = 0.5
+#Monotone (Fritsch-Carlson): never overshoots the points in x or y
+TANGENTS_MONOTONE = "monotone"
+TANGENT_MODELS = [TANGENTS_FIXED, TANGENTS_CATMULL_ROM, TANGENTS_CARDINAL, TANGENTS_MONOTONE]
+DEFAULT_TANGENTS = TANGENTS_FIXED
 
 #Model level default for edges
 ISDIGRAPH = True
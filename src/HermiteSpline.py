@@ -13,8 +13,17 @@ from PySide6.QtCore import QRectF, QPointF, Qt
 import sys
 import math
 
+#Spline geometry (no Qt), shared with PolyLineItemHG
+import splineGeometry
+
 #selection accuracy - how close to get a hit?
 HITSIZE = 5
+#accentuate the magnitude of the tangents
+TENSION = 4
+
+def xy(pt) -> tuple:
+    """ a point/ tangent as (x, y), for splineGeometry. The unused end tangents (0) are (0, 0) """
+    return (pt.x(), pt.y()) if isinstance(pt, QPointF) else (0.0, 0.0)
 
 class HandleItem(QGraphicsEllipseItem):
     """ a generic graphics handle to facilitate moving points during editing"""
@@ -80,28 +89,12 @@ class HermiteSplineItem(QGraphicsObject):
         if len(t) == len(p):
             self._t = t
         elif len(t) == 0:
-            #Compute default tangents for each point.
-            self._t = [0 for _ in range(len(self._p))]
-            
-
-            #Start and end: Just aim for the next point (also deals with 2 pt case)
-            hyp = math.sqrt((self._p[0].x() - self._p[1].x())**2 +(self._p[0].y() - self._p[1].y())**2 )
-            dx = (self._p[1].x() - self._p[0].x())/hyp * self.scaleFactor
-            dy = (self._p[1].y() - self._p[0].y())/hyp * self.scaleFactor
-            self._t[0] = (0,QPointF(dx,dy))
-
-            #End
-            hyp = math.sqrt((self._p[-1].x() - self._p[-2].x())**2 +(self._p[-1].y() - self._p[-2].y())**2 )
-            dx = (self._p[-1].x() -self._p[-2].x())/hyp * self.scaleFactor
-            dy = (self._p[-1].y() -self._p[-2].y())/hyp * self.scaleFactor
-            self._t[-1] = (QPointF(dx,dy),0)
-
-            #MultiPoint
-            for i in range(1,len(self._p)-1):
-                hyp = math.sqrt((self._p[i-1].x() - self._p[i+1].x())**2 +(self._p[i-1].y() - self._p[i+1].y())**2 )
-                dx = (self._p[i+1].x() - self._p[i-1].x())/hyp * self.scaleFactor
-                dy = (self._p[i+1].y() - self._p[i-1].y())/hyp * self.scaleFactor
-                self._t[i] = (QPointF(dx,dy),QPointF(dx,dy))                
+            #Compute default tangents for each point. Start and end just aim for the next point
+            # (also deals with 2 pt case), and have no outer tangent
+            tangents = splineGeometry.defaultTangents([xy(pt) for pt in self._p], self.scaleFactor)
+            self._t = [(QPointF(*tIn), QPointF(*tOut)) for tIn, tOut in tangents]
+            self._t[0] = (0, self._t[0][1])
+            self._t[-1] = (self._t[-1][0], 0)
 
         else:
             print("Must have tangents set!!!")
@@ -159,14 +152,7 @@ class HermiteSplineItem(QGraphicsObject):
 
     def deletePoint(self,delP:QPointF):
         """Delete the control point nearest delP"""
-        minD = math.inf
-        ic, xc, yc = 0,0,0
-        for i in range(len(self._p)):
-            xo, yo = self._p[i].x(), self._p[i].y()
-            newD = math.sqrt((delP.x() - xo)**2+ (delP.y() - yo)**2)
-            if newD < minD:
-                ic, xc, yc = i,xo,yo
-                minD = newD
+        ic, minD = splineGeometry.nearestVertex([xy(pt) for pt in self._p], delP.x(), delP.y())
 
         self.suppressItemChange = True
         #remove handles 
@@ -317,36 +303,9 @@ class HermiteSplineItem(QGraphicsObject):
         #p0p1:float = math.sqrt((self._p[0].x() - self._p[-1].x())**2 +(self._p[0].y() - self._p[-1].y())**2 )
         #steps = int(p0p1/10) #This doesn't deal with big tangents. Needs some more maths!
 
-        path = QPainterPath(self._p[0])
-        #Loop over each segment
-        for seg in range(len(self._p)-1):
-            p0 = self._p[seg]
-            p1 = self._p[seg+1]
-            
-            t0 = self._t[seg][1]    #right tangent
-            t1 = self._t[seg+1][0]  #left
-            
-            for i in range(1, self.linesPerSegment + 1):
-                t = i / self.linesPerSegment
-                pt = self._hermiteInterp(p0,t0,p1,t1,t)
-                path.lineTo(pt)
-
+        points = splineGeometry.tessellate([xy(pt) for pt in self._p], [(xy(tIn), xy(tOut)) for tIn, tOut in self._t],
+                                           TENSION, self.linesPerSegment)
+        path = QPainterPath(QPointF(*points[0]))
+        for x, y in points[1:]:
+            path.lineTo(x, y)
         return path
-
-    def _hermiteInterp(self, p0,t0,p1,t1, t: float) -> QPointF:
-        """ perform the t^th step of the Hermite interpolation between p0 and p1, with tangents t0 and t1"""
-        h00 = 2 * t**3 - 3 * t**2 + 1
-        h10 = t**3 - 2 * t**2 + t
-        h01 = -2 * t**3 + 3 * t**2
-        h11 = t**3 - t**2
-        
-        #accentuate the magnitude of the tangent
-        tension = 4 
-
-        x = ( h00 * p0.x() + h10 * t0.x() * tension
-            + h01 * p1.x() + h11 * t1.x() * tension  )
-        y = ( h00 * p0.y() + h10 * t0.y() * tension
-            + h01 * p1.y() + h11 * t1.y() * tension  )
-            
-        return QPointF(x, y)
-
@@ -1,6 +1,8 @@
 """HG version has hacks for higraph  """
 
 import math
+import bisect
+import itertools
 from typing import List
 
 from PySide6.QtCore import QRectF, QPointF, Qt, QLineF
@@ -9,42 +11,47 @@ from PySide6.QtWidgets import QGraphicsObject, QGraphicsItem, QGraphicsRectItem
 
 #HITSIZE = 5
 from  HGConstants import *
-
-def closestPointOnLine(p1:QPointF, p2:QPointF, point: QPointF):
-    """ Finds the closesest point between p1&p2 to point. Returns closest_point, distance
-        Helper function for StraightLineItem.addPoint() on straight lines with long segments
-    """
-
-    # Vector line
-    line_dx = p2.x() - p1.x()
-    line_dy = p2.y() - p1.y()
-
-    # Vector from p1 to point
-    pt_dx = point.x() - p1.x()
-    pt_dy = point.y() - p1.y()
-
-    # Project point onto line, normalized by line length squared
-    line_len_sq = line_dx * line_dx + line_dy * line_dy
-    if line_len_sq == 0:  # Degenerate line (length = 0)
-        return p1, math.hypot(pt_dx, pt_dy)
-
-    t = (pt_dx * line_dx + pt_dy * line_dy) / line_len_sq
-
-    # Clamp t to [0, 1] if you want closest point *on the segment*
-    # Remove clamp if infinite line is desired
-    t = max(0, min(1, t))
-
-    # Closest point
-    closest_x = p1.x() + t * line_dx
-    closest_y = p1.y() + t * line_dy
-    closest_point = QPointF(closest_x, closest_y)
-
-    # Distance
-    dx = point.x() - closest_x
-    dy = point.y() - closest_y
-    distance = math.hypot(dx, dy)
-
-    return closest_point, distance
+#Debug count of live items
+from leakTracker import trackItem
+#Spline & polyline geometry (no Qt): the items keep QPointFs, and hand (x, y) tuples to it
+import splineGeometry
+from splineGeometry import ArcLengthTable
+
+def xyList(points:List[QPointF]) -> list:
+    """ points as (x, y) tuples, for splineGeometry """
+    return [(pt.x(), pt.y()) for pt in points]
+
+def xyTangents(tangents:List) -> list:
+    """ (in, out) QPointF tangents as ((x, y), (x, y)) tuples, for splineGeometry """
+    return [((tIn.x(), tIn.y()), (tOut.x(), tOut.y())) for tIn, tOut in tangents]
+
+def hermiteToBezier(p0:QPointF, t0:QPointF, p1:QPointF, t1:QPointF):
+    """ splineGeometry.hermiteToBezier() on QPointFs, with the editor's HERMITE_TENSION """
+    b1, b2 = splineGeometry.hermiteToBezier((p0.x(), p0.y()), (t0.x(), t0.y()), (p1.x(), p1.y()), (t1.x(), t1.y()), HERMITE_TENSION)
+    return QPointF(*b1), QPointF(*b2)
+
+def bezierToHermite(p0:QPointF, b1:QPointF, b2:QPointF, p1:QPointF):
+    """ splineGeometry.bezierToHermite() on QPointFs, with the editor's HERMITE_TENSION """
+    t0, t1 = splineGeometry.bezierToHermite(*xyList([p0, b1, b2, p1]), HERMITE_TENSION)
+    return QPointF(*t0), QPointF(*t1)
+
+def levelOfDetail(painter: QPainter, option, widget=None) -> float:
+    """ The zoom level an item is being painted at (1.0 = 100%), for the LOD_ cut-offs in HGConstants.
+        widget is the viewport being painted: its view's lodScale (graphView.py), if any, is applied """
+    if option is None:
+        return 1.0
+    lod = option.levelOfDetailFromTransform(painter.worldTransform())
+    if widget is not None:
+        lod *= getattr(widget.parent(), 'lodScale', 1.0)
+    return lod
+
+def isTileCached(item) -> bool:
+    """ True if item, or an ancestor, is drawn by the scene's tile cache (tileCache.py), so paint() can skip it """
+    while item is not None:
+        if getattr(item, 'inTileCache', False):
+            return True
+        item = item.parentItem()
+    return False
 
 # To be deleted.
 class xxHandleItem(QGraphicsRectItem):
@@ -100,6 +107,7 @@ class HandleItem(QGraphicsRectItem):
     def __init__(self, center: QPointF, hSize=HITSIZE, color=Qt.red, parent=None):
 
         super().__init__(-hSize, -hSize, 2 * hSize, 2 * hSize, parent)
+        trackItem(self)
 
         #stop constructor changes messing with .itemChange()
         self.suppressItemChange = True 
@@ -125,6 +133,12 @@ class HandleItem(QGraphicsRectItem):
     def clearMoveCallback(self):
         self._onMoveCallback = None
 
+    def setPosQuietly(self, pos:QPointF):
+        """ move the handle without calling back to its line (the line is being synced to) """
+        self.suppressItemChange = True
+        self.setPos(pos)
+        self.suppressItemChange = False
+
     def itemChange(self, change, value):
         #print(f"Handle change {change=} {value=}")
         if ( change == QGraphicsItem.ItemPositionHasChanged
@@ -146,18 +160,58 @@ class HandleItem(QGraphicsRectItem):
         painter.restore()
         
 
+class HandlePool:
+    """ Spare HandleItems, shared by all lines. Selecting an edge takes its handles from here,
+        and deselecting hands them back, so clicking through edges doesn't create & destroy items """
+    _spare = []
+
+    @classmethod
+    def take(cls, pos:QPointF, color, parent:QGraphicsItem) -> HandleItem:
+        """ a handle at pos (in parent coords), reused if possible """
+        if not cls._spare:
+            return HandleItem(pos, color=color, parent=parent)
+        handle = cls._spare.pop()
+        handle.suppressItemChange = True
+        handle.setBrush(QBrush(color))
+        handle.setParentItem(parent)
+        handle.setPos(pos)
+        handle.suppressItemChange = False
+        return handle
+
+    @classmethod
+    def release(cls, handles):
+        """ take handles off their line (and out of the scene) to be reused.
+            Children (tangent handles) must be released before their parent """
+        for handle in handles:
+            handle.clearMoveCallback()
+            handle.suppressItemChange = True
+            if handle.scene():
+                #Also unparents it
+                handle.scene().removeItem(handle)
+            else:
+                handle.setParentItem(None)
+            if len(cls._spare) < HANDLE_POOL_MAX:
+                cls._spare.append(handle)
+
+
 class StraightLineItem(QGraphicsItem):
 
     def __init__(self, p: List[QPointF], parent=None):
         """Create a polyline with a list of points (QPointFs)."""
         super().__init__(parent)
+        trackItem(self)
         self.suppressItemChange = True
         self._p = p
         self.pen = QPen(Qt.darkBlue, 1)
-        self._boundingRect = QRectF()
+        #Bounds, selection shape & arc-length table, made on first use and dropped when the points/ path change
+        self._boundingRect = None
+        self._shape = None
+        self._arc = None
         self.setFlag(QGraphicsItem.ItemIsSelectable, True)
         self._path = self._createPolyPath()
         self._pHandles = []
+        #Set by a compact VisEdgeItem (COMPACT_ITEMS), which paints this line itself rather than as a child
+        self.owner = None
         self.suppressItemChange = False
 
     def __repr__(self):
@@ -167,22 +221,23 @@ class StraightLineItem(QGraphicsItem):
     def boundingRect(self):
         if not self._p:
             return QRectF()
-        minx = min(pt.x() for pt in self._p)
-        miny = min(pt.y() for pt in self._p)
-        maxx = max(pt.x() for pt in self._p)
-        maxy = max(pt.y() for pt in self._p)
-        return QRectF(minx, miny, maxx - minx, maxy - miny).adjusted(-HITSIZE, -HITSIZE, HITSIZE, HITSIZE)
+        if self._boundingRect is None:
+            minx, miny, maxx, maxy = splineGeometry.boundingBox(xyList(self._p))
+            self._boundingRect = QRectF(minx, miny, maxx - minx, maxy - miny).adjusted(-HITSIZE, -HITSIZE, HITSIZE, HITSIZE)
+        return self._boundingRect
 
     def shape(self):
-        outlinePath = QPainterPathStroker()
-        outlinePath.setWidth(HITSIZE*2)
-        return outlinePath.createStroke(self._path)
+        if self._shape is None:
+            outlinePath = QPainterPathStroker()
+            outlinePath.setWidth(HITSIZE*2)
+            self._shape = outlinePath.createStroke(self._path)
+        return self._shape
 
     def itemChange(self, change, value):
         if change == QGraphicsItem.ItemSelectedHasChanged:
             # value is a bool indicating new selected state
             #isSelected = bool(value)
-            isSelected = self.parentItem() and self.parentItem().isSelected()
+            isSelected = self.edgeItem() and self.edgeItem().isSelected()
             if isSelected:
                 self._createHandles()
             else:
@@ -191,11 +246,13 @@ class StraightLineItem(QGraphicsItem):
 
     def paint(self, painter: QPainter, option, widget=None):
         #print(f"SL Paint {self._p }")
+        if isTileCached(self):
+            return
         painter.save()
         #TODO: This code doesn't work with TestPolyLine, and it should (when there are no parents in place)
         isSel:bool = self.isSelected()
-        if self.parentItem():
-            isSel = isSel or self.parentItem().isSelected()
+        if self.edgeItem():
+            isSel = isSel or self.edgeItem().isSelected()
 
         if isSel:  #self.isSelected():
         #if self.isSelected():
@@ -203,27 +260,56 @@ class StraightLineItem(QGraphicsItem):
         else:
             painter.setPen(QPen(Qt.black))  #self.pen)
 
-        painter.drawPath(self._path)
+        #Zoomed right out, the bend points are sub-pixel: just draw the chord
+        if levelOfDetail(painter, option, widget) < LOD_EDGE_CHORD:
+            painter.drawLine(self._p[0], self._p[-1])
+        else:
+            painter.drawPath(self._path)
         painter.restore()
 
     def textPos(self, t:float = 0.5)->QPointF:
         """ returns the QPointF coord of t in [0,1] along the line 
                 (t in the sense of parametric curves """
-        return self._path.pointAtPercent(t)
+        return QPointF(*self.arcLength().pointAtPercent(t))
+
+    def arcLength(self) -> ArcLengthTable:
+        """ the line's arc-length table (kept until the points change) """
+        if self._arc is None:
+            self._arc = ArcLengthTable(xyList(self._p))
+        return self._arc
+
+    def edgeItem(self):
+        """ the edge this line belongs to: the parent item, or the compact edge that owns it """
+        return self.owner or self.parentItem()
+
+    def prepareGeometryChange(self):
+        """ a compact edge paints this line, so its geometry changes with it """
+        if self.owner:
+            self.owner.prepareGeometryChange()
+        super().prepareGeometryChange()
+
+    def update(self, *args):
+        if self.owner:
+            self.owner.update()
+        super().update(*args)
+
+    def handleParent(self) -> QGraphicsItem:
+        """ point handles hang off the line, or off a compact edge (the line is not in the scene then) """
+        return self.owner or self
 
     def isSelected(self)->bool:
         """ show self as selected if the parent is selected"""
-        return self.parentItem() and self.parentItem().isSelected()
+        return self.edgeItem() and self.edgeItem().isSelected()
     
     def setSelected(self,state:bool):
         """ set as selected if parent is selected"""
         #print(f"SL setSelected {state=}")
         #TODO: Check how this messes with built-in selection handling.
-        isSelected = self.parentItem() and self.parentItem().isSelected()
+        isSelected = self.edgeItem() and self.edgeItem().isSelected()
         #print(f"HS setSelected {isSelected =}, and {self.parentItem().isOnlySelected=}")
         #if isSelected:
         #if self.parentItem().isOnlySelected:
-        if isSelected and self.parentItem().isOnlySelected:
+        if isSelected and self.edgeItem().isOnlySelected:
             self._createHandles()
         else:
             #print("calling _deleteHandles")
@@ -232,58 +318,51 @@ class StraightLineItem(QGraphicsItem):
 
     def endAngle(self):
         """ Use the path details to work out the end angle. """
-        dx = self._p[-1].x() - self._p[-2].x()
-        dy = self._p[-1].y() - self._p[-2].y()
-
-        angleDeg = math.degrees(math.atan2(dy, dx))
-        return angleDeg        
+        return splineGeometry.polylineEndAngle(xyList(self._p[-2:]))
 
     def addPoint(self, point: QPointF):
         """ Add a point to the line, if close enough"""
-        #Close enough?
-        if not self.contains(point): 
+        #Close enough? (as the selection shape), and after which point
+        along, dist, idx = self.arcLength().nearest(point.x(), point.y(), HITSIZE)
+        if dist > HITSIZE:
             return
 
-        #Put point in at the right place
-        minD = math.inf
-        for i in range(self._path.elementCount()-1):
-            #xo, yo = self._path.elementAt(i).x, self._path.elementAt(i).y
-            newP,newD = closestPointOnLine(QPointF(self._path.elementAt(i)),
-                                            QPointF(self._path.elementAt(i+1)),point)
-            if newD < minD:
-                closestP,minD,idx = newP,newD,i
-
-        self._deleteHandles()
         self._p.insert(idx+1,point)
         self.prepareGeometryChange()
-        self._createHandles()
+        self._boundingRect = None
+        self._arc = None
+        #Keep the handles (if shown) in step
+        if self._pHandles:
+            self._createHandles()
         self.update()
 
     def deletePoint(self, point: QPointF):
         # Remove nearest point within HITSIZE
-        min_dist = math.inf
-        min_idx = -1
-        for i, pt in enumerate(self._p):
-            dist = math.hypot(point.x() - pt.x(), point.y() - pt.y())
-            if dist < min_dist:
-                min_dist = dist
-                min_idx = i
+        min_idx, min_dist = self.arcLength().nearestVertex(point.x(), point.y())
         if min_dist <= HITSIZE and len(self._p) > 2:
-            self._deleteHandles()
             self._p.pop(min_idx)
 
             self.prepareGeometryChange()
-            self._createHandles()
-            self._updateFromHandles(point)
+            if self._pHandles:
+                #Hand back the deleted point's handle, the rest just move
+                HandlePool.release([self._pHandles.pop(min_idx)])
+                self._createHandles()
+            self.updatePath()
+            if self.edgeItem():
+                self.edgeItem().updateLine()
             self.update()
 
     def setP(self,n:int, p:QPointF):
         """sets the nth point to the value p. n is a list index """
         self._p[n] = p
+        self._boundingRect = None
+        self._arc = None
 
     def updatePath(self):
         self._path = self._createPolyPath()
-        self._boundingRect = self._path.boundingRect().adjusted(-HITSIZE, -HITSIZE, HITSIZE, HITSIZE)
+        self._boundingRect = None
+        self._shape = None
+        self._arc = None
         self.update()
 
     def moveMidPoints(self,delta):
@@ -295,27 +374,27 @@ class StraightLineItem(QGraphicsItem):
         #End points are moved with the nodes - just deal with middle
         for i in range(1,len(self._p)-1):
             self._p[i] += delta
+        self._boundingRect = None
+        self._arc = None
 
     def _createHandles(self):
-        """ show control handles. Used on selection and add/ delete """
-        #clear existing handles
-        for h in self._pHandles:
-            self.scene().removeItem(h)
-        self._pHandles.clear()
-        # Add new handles
-        #TODO: is idx used?
-
-        for idx, pt in enumerate(self._p):
-            handle = HandleItem(pt, color=Qt.green,parent=self)
+        """ show control handles. Used on selection and add/ delete.
+            Existing handles are moved onto the points, and only the shortfall/ excess is taken from/ given to the pool """
+        while len(self._pHandles) < len(self._p):
+            handle = HandlePool.take(QPointF(0,0), Qt.green, self.handleParent())
             handle.setMoveCallback(self._updateFromHandles)
             self._pHandles.append(handle)
+        if len(self._pHandles) > len(self._p):
+            HandlePool.release(self._pHandles[len(self._p):])
+            del self._pHandles[len(self._p):]
+
+        for handle, pt in zip(self._pHandles, self._p):
+            handle.setPosQuietly(pt)
 
     def _deleteHandles(self):
-        """ Delete handles when deselected"""
+        """ Return the handles to the pool when deselected"""
         self.suppressItemChange = True
-        # Remove existing handles
-        for h in self._pHandles:
-            self.scene().removeItem(h)
+        HandlePool.release(self._pHandles)
         self._pHandles.clear()
         self.suppressItemChange = False
 
@@ -329,8 +408,8 @@ class StraightLineItem(QGraphicsItem):
         for i in range(len(self._p)):
             self._p[i] = self._pHandles[i].pos()
         self.updatePath()
-        if self.parentItem:
-            self.parentItem().updateLine()
+        if self.edgeItem():
+            self.edgeItem().updateLine()
 
     def _createPolyPath(self):
         """ build the poly-line """
@@ -340,46 +419,38 @@ class StraightLineItem(QGraphicsItem):
         return path
  
 class HermiteSplineItem(QGraphicsItem):
+    #how long the default (TANGENTS_FIXED) tangents are
+    scaleFactor = 40 #20
 
-    def __init__(self, p:List, t:List=[], parent=None):
+    def __init__(self, p:List, t:List=[], parent=None, tangentModel=DEFAULT_TANGENTS):
         """ create a hermite (cubic) spline with a list of points (QPointFs) and an optional, matching list of 2-tuples of tangents (QPointFs). 
             Tangent coordinates are relative to their parent point. 
             First tangent tuple is (0,QPointF), and last is (QPointF,0)
+            Without tangents, they are worked out by tangentModel (a TANGENTS_ constant)
         """
         super().__init__(parent)
+        trackItem(self)
         self.suppressItemChange = True
         self._p = p
         
-        #How many lines per segment
+        #The path is one cubic Bezier per segment, which Qt flattens for drawing. For hit-testing
+        # and measuring the curve is flattened here (flattened()), to at most this many lines per segment
         self.linesPerSegment = 40
+        #The flattened curve (None until needed), its lines in each segment, and the point each segment starts at
+        self._flat = None
+        #Arc-length table of the flattened curve
+        self._arc = None
+        self._segSteps = []
+        self._segStarts = []
 
         #Tangents
-        self.scaleFactor = 40 #20 #how long the default tangents are
+        self.tangentModel = tangentModel
         #Are tangents given:
         if len(t) == len(p):
             self._t = t
         elif len(t) == 0:
-            #Compute default tangents for each point.
-            self._t = [0 for _ in range(len(self._p))]
-            
-            #Start [0] (and end): Just aim for the next point (also deals with 2 pt case)
-            hyp = math.sqrt((self._p[0].x() - self._p[1].x())**2 +(self._p[0].y() - self._p[1].y())**2 )
-            dx = (self._p[1].x() - self._p[0].x())/hyp * self.scaleFactor
-            dy = (self._p[1].y() - self._p[0].y())/hyp * self.scaleFactor
-            self._t[0] = (QPointF(0,0),QPointF(dx,dy))
-
-            #End [-1]
-            hyp = math.sqrt((self._p[-1].x() - self._p[-2].x())**2 +(self._p[-1].y() - self._p[-2].y())**2 )
-            dx = (self._p[-1].x() -self._p[-2].x())/hyp * self.scaleFactor
-            dy = (self._p[-1].y() -self._p[-2].y())/hyp * self.scaleFactor
-            self._t[-1] = (QPointF(dx,dy),QPointF(0,0))
-
-            #MultiPoint
-            for i in range(1,len(self._p)-1):
-                hyp = math.sqrt((self._p[i-1].x() - self._p[i+1].x())**2 +(self._p[i-1].y() - self._p[i+1].y())**2 )
-                dx = (self._p[i+1].x() - self._p[i-1].x())/hyp * self.scaleFactor
-                dy = (self._p[i+1].y() - self._p[i-1].y())/hyp * self.scaleFactor
-                self._t[i] = (QPointF(dx,dy),QPointF(dx,dy))                
+            #Compute default tangents for each point
+            self._t = self._modelTangents(xyList(self._p))
 
         else:
             print(f"Must have tangents set!!!\n{p=}\n{t=}")
@@ -388,9 +459,20 @@ class HermiteSplineItem(QGraphicsItem):
         #To keep selection code sane, have empty lists
         self._pHandles = []
         self._tHandles = []
+        #handle -> ('p'|'t', index), to update just the point/ tangent a moved handle controls
+        self._handleIndex = {}
+        #Set by a compact VisEdgeItem (COMPACT_ITEMS), which paints this line itself rather than as a child
+        self.owner = None
+
+        #Segments to re-tessellate on the next updatePath(). The path is patched in place for
+        # these, and only rebuilt in full when the point count changes (or _pathStale is set)
+        self._dirtySegs = set()
+        self._pathStale = False
 
         self.pen = QPen(Qt.black, 1)# QPen(Qt.darkBlue, 1) 
         self._boundingRect = QRectF()
+        #Selection shape, made on first use and dropped when the path changes
+        self._shape = None
         #self.setFlag(QGraphicsItem.ItemIsSelectable, True)
         #For graph drawing, splines will only ever move via nodes moving, so this is not needed
         #In the general case of free-standing splines, this would need more careful handling.
@@ -415,19 +497,25 @@ class HermiteSplineItem(QGraphicsItem):
 
     def boundingRect(self) -> QRectF:
         adjust = 2
-        return self._boundingRect.united (self.childrenBoundingRect().adjusted(-adjust, -adjust, adjust, adjust))
+        children = self.childrenBoundingRect()
+        #No handles: adjusting the empty rect would stretch the bounds to the origin
+        if children.isNull():
+            return self._boundingRect
+        return self._boundingRect.united (children.adjusted(-adjust, -adjust, adjust, adjust))
 
     def shape(self):
-        outlinePath = QPainterPathStroker()
-        outlinePath.setWidth(HITSIZE*2)
-        return outlinePath.createStroke(self._path)
+        if self._shape is None:
+            outlinePath = QPainterPathStroker()
+            outlinePath.setWidth(HITSIZE*2)
+            self._shape = outlinePath.createStroke(self._path)
+        return self._shape
     
     def itemChange(self, change, value):
         #print(f"HS itemChanged {change=} {value=}")
         if change == QGraphicsItem.ItemSelectedHasChanged:
             # value is a bool indicating new selected state
             #isSelected = bool(value)
-            isSelected = self.parentItem() and self.parentItem().isSelected()
+            isSelected = self.edgeItem() and self.edgeItem().isSelected()
             #print(f"HS itemC {isSelected =}")
             if isSelected:
                 self._createHandles()
@@ -438,16 +526,18 @@ class HermiteSplineItem(QGraphicsItem):
 
     def paint(self, painter: QPainter, option, widget=None):
         #print(f"HS Paint {self._p }")
+        if isTileCached(self):
+            return
 
         isSel:bool = self.isSelected()
-        if self.parentItem():
-            isSel = isSel or self.parentItem().isSelected()
+        if self.edgeItem():
+            isSel = isSel or self.edgeItem().isSelected()
 
         if isSel: #self.isSelected():
             painter.setPen(QPen(Qt.blue,1,Qt.DashLine))
 
             # Draw tangents, if this is the ONLY selected edge
-            if self.parentItem().isOnlySelected:
+            if self.edgeItem().isOnlySelected:
                 painter.setPen(QPen(Qt.blue,1,Qt.DashLine))
                 painter.drawLine(self._p[0], self._p[0] + self._t[0][1])
                 for i in range(1,len(self._p)-1):
@@ -458,26 +548,59 @@ class HermiteSplineItem(QGraphicsItem):
             painter.setPen(self.pen)
             #painter.setPen(QPen(Qt.black,1))
 
-        painter.drawPath(self._path)
+        #Zoomed out, the curve can't be seen: draw a chord, or the polyline through the points
+        lod = levelOfDetail(painter, option, widget)
+        if lod < LOD_EDGE_CHORD:
+            painter.drawLine(self._p[0], self._p[-1])
+        elif lod < LOD_EDGE_POLYLINE:
+            painter.drawPolyline(self._p)
+        else:
+            painter.drawPath(self._path)
 
     def textPos(self,t:float = 0.5)->QPointF:
         """ returns the QPointF coord of t in [0,1] along the line 
                 (t in the sense of parametric curves """
-        return self._path.pointAtPercent(t)
+        return QPointF(*self.arcLength().pointAtPercent(t))
+
+    def arcLength(self) -> ArcLengthTable:
+        """ the arc-length table of the flattened curve (kept until the curve changes) """
+        flat = self.flattened()
+        if self._arc is None or self._arc.points is not flat:
+            self._arc = ArcLengthTable(flat)
+        return self._arc
+
+    def edgeItem(self):
+        """ the edge this line belongs to: the parent item, or the compact edge that owns it """
+        return self.owner or self.parentItem()
+
+    def prepareGeometryChange(self):
+        """ a compact edge paints this line, so its geometry changes with it """
+        if self.owner:
+            self.owner.prepareGeometryChange()
+        super().prepareGeometryChange()
+
+    def update(self, *args):
+        if self.owner:
+            self.owner.update()
+        super().update(*args)
+
+    def handleParent(self) -> QGraphicsItem:
+        """ point handles hang off the line, or off a compact edge (the line is not in the scene then) """
+        return self.owner or self
 
     def isSelected(self)->bool:
         """ show self as selected if the parent is selected"""
-        return self.parentItem() and self.parentItem().isSelected()
+        return self.edgeItem() and self.edgeItem().isSelected()
     
     def setSelected(self,state:bool):
         """ set as selected if parent is selected"""
         #print(f"HS setSelected {state=}")
         #TODO: Check how this messes with built-in selection handling.
-        isSelected = self.parentItem() and self.parentItem().isSelected()
+        isSelected = self.edgeItem() and self.edgeItem().isSelected()
         #print(f"HS setSelected {isSelected =}, and {self.parentItem().isOnlySelected=}")
         #if isSelected:
         #if self.parentItem().isOnlySelected:
-        if isSelected and self.parentItem().isOnlySelected:
+        if isSelected and self.edgeItem().isOnlySelected:
             self._createHandles()
         else:
             #print("calling _deleteHandles")
@@ -486,92 +609,107 @@ class HermiteSplineItem(QGraphicsItem):
 
     def endAngle(self):
         """ Use the path details to work out the end angle. For HS, use the tangent """
-
-        dx = self._t[-1][0].x()
-        dy = self._t[-1][0].y()
-
-        angleDeg = math.degrees(math.atan2(dy, dx))
-        return angleDeg
+        return splineGeometry.splineEndAngle(xyTangents(self._t[-1:]))
 
     def addPoint(self,newP:QPointF):
         """ Add a control point into the spline at newP"""
         
-        #Find which points it's between. 
-        # Just uses the start point of each element, since they're short
-        minD = math.inf 
-        ic, xc, yc = 0,0,0
-        for i in range(self._path.elementCount()):
-            xo, yo = self._path.elementAt(i).x, self._path.elementAt(i).y
-            newD = math.sqrt((newP.x() - xo)**2+ (newP.y() - yo)**2)
-            if newD < minD:
-                ic, xc, yc = i,xo,yo
-                minD = newD
+        #Find the closest point on the flattened curve, and the line it's on
+        arc = self.arcLength()
+        along, minD, ic = arc.nearest(newP.x(), newP.y(), HITSIZE)
         #Is the click close enough to allow creating a point?
         if minD > HITSIZE:
             return
 
-        #TODO: This requires a fixed num of lines/ segment - make it a constant
-        i = ic // self.linesPerSegment
+        #The segment the line is in
+        flat = arc.points
+        i = bisect.bisect_right(self._segStarts, ic) - 1
+        xc, yc = arc.pointAtLength(along)
 
-        #Calc the tangents using the previous and next segment points (not spline knots)
-        xl = self._path.elementAt(ic-1).x
-        yl = self._path.elementAt(ic-1).y
-        xr = self._path.elementAt(ic+1).x
-        yr = self._path.elementAt(ic+1).y
+        #Calc the tangent along the line clicked on
+        xl, yl = flat[ic]
+        xr, yr = flat[ic+1]
         hyp = math.sqrt((xr-xl)**2 + (yr-yl)**2 )
+        if hyp == 0:
+            return
         dx = (xr-xl)/hyp * self.scaleFactor
         dy = (yr-yl)/hyp * self.scaleFactor
+        tangent = (QPointF(dx,dy), QPointF(dx,dy))
+        if self.tangentModel != TANGENTS_FIXED:
+            #As the tangent model has it, between the new point's neighbours
+            tangent = self._modelTangents(xyList([self._p[i], QPointF(xc,yc), self._p[i+1]]))[1]
         #Add to the lists
         self._p.insert(i+1,QPointF(xc,yc))
-        self._t.insert(i+1,(QPointF(dx,dy), QPointF(dx,dy)))
+        self._t.insert(i+1,tangent)
+        self._pathStale = True
+        #Keep the handles (if shown) in step
+        if self._pHandles:
+            self._createHandles()
         self.update()
 
     def deletePoint(self,delP:QPointF):
         """Delete the control point nearest delP"""
-        minD = math.inf
-        ic, xc, yc = 0,0,0  #c for closest
-        for i in range(len(self._p)):
-            xo, yo = self._p[i].x(), self._p[i].y()
-            newD = math.sqrt((delP.x() - xo)**2+ (delP.y() - yo)**2)
-            if newD < minD:
-                ic, xc, yc = i,xo,yo
-                minD = newD
+        ic, minD = splineGeometry.nearestVertex(xyList(self._p), delP.x(), delP.y())  #c for closest
 
         self.suppressItemChange = True
         #TODO: CHeck for <hitsize?
         if minD <= HITSIZE and len(self._p) > 2:
-            #remove handles 
-            #Not first point
-            if ic != 0:
-                self.scene().removeItem(self._tHandles[ic][1])
-            #Not last point
-            if ic != len(self._p):
-                self.scene().removeItem(self._tHandles[ic][0])
-            #TODO: What if ic _is_ 0 or last? Will this not corrupt things?
-            self._tHandles.pop(ic)
-
-            #remove tangents
+            #remove tangents & point
             self._t.pop(ic)
-
-            #remove point
-            #self._pHandles[ic].suppressItemChange = True
-            self.scene().removeItem(self._pHandles[ic])
-            self._pHandles.pop(ic)
             self._p.pop(ic)
+            self._pathStale = True
 
             self.suppressItemChange = False
+            if self._pHandles:
+                #Point count changed, so the handles are re-dealt (from the pool)
+                self._createHandles()
             #redraw
-            self._updateFromHandles(delP)
+            self.updatePath()
+            if self.edgeItem():
+                self.edgeItem().updateLine()
             self.update()
 
     def setP(self, n:int, p:QPointF):
         """sets the nth point to the value p. n is a list index """
         self._p[n] = p
+        self._markPointDirty(n % len(self._p))
         #print(f"setP {self._p[n]} {hex(id(self._p[n]))} set to {p}, {hex(id(p))} ")
 
+    def invalidatePath(self):
+        """ The points/ tangents were changed directly: rebuild the whole path on the next updatePath() """
+        self._pathStale = True
+
+    def _modelTangents(self, points:list) -> List[tuple]:
+        """ (in, out) QPointF tangents through points (as (x, y)), by tangentModel """
+        tangents = splineGeometry.defaultTangents(points, self.scaleFactor, self.tangentModel, HERMITE_TENSION, CARDINAL_TENSION)
+        return [(QPointF(*tIn), QPointF(*tOut)) for tIn, tOut in tangents]
+
+    def setTangentModel(self, model:str):
+        """ replace all the tangents with model's (a TANGENTS_ constant) """
+        self.prepareGeometryChange()
+        self.tangentModel = model
+        self._t = self._modelTangents(xyList(self._p))
+        self._pathStale = True
+        if self._pHandles:
+            self._createHandles()
+        self.updatePath()
+
     def updatePath(self):
-        """ Allow the calling of the recalculation independently of handle updates"""
-        self._path = self._createHermitePath()
+        """ Allow the calling of the recalculation independently of handle updates.
+            Only the dirty segments are re-tessellated, unless the structure changed """
+        segCount = len(self._p) - 1
+        if self._pathStale or self._path.elementCount() != 3 * segCount + 1:
+            self._path = self._createHermitePath()
+        elif self._dirtySegs:
+            for seg in self._dirtySegs:
+                self._patchSegment(seg)
+        else:
+            #Nothing has changed
+            return
+        self._flat = None
+        self._shape = None
+        self._pathStale = False
+        self._dirtySegs.clear()
         self._boundingRect = self._path.boundingRect().adjusted(-20, -20, 20, 20)
         self.update()    
 
@@ -581,28 +719,34 @@ class HermiteSplineItem(QGraphicsItem):
         #End points are moved with the nodes - just deal with middle
         for i in range(1,len(self._p)-1):
             self._p[i] += delta
+        self._pathStale = True
 
     def _createHandles(self):
-        """create handles on single selection, in called from itemChange()"""
+        """create handles on single selection, in called from itemChange() (and on add/ delete point).
+            With the same point count the existing handles are just moved, otherwise they are re-dealt from the pool"""
+        if self._pHandles and len(self._pHandles) == len(self._p):
+            self._syncHandles()
+            return
+        self._releaseHandles()
 
         #Start and end points always present p0, pn (or p-1)
         #have a list of point and tgnt handles
         # print("createHandles")
         self._pHandles = []
         for pi in self._p: 
-            self._pHandles.append(HandleItem(pi,color=Qt.green,parent=self))
+            self._pHandles.append(HandlePool.take(pi,Qt.green,self.handleParent()))
 
         #Tangent handles
         self._tHandles = []
         #start
         self._tHandles.append((QPointF(0,0),
-                                HandleItem(self._t[0][1],color=Qt.blue,parent=self._pHandles[0]))) # no left tgt, use 0
+                                HandlePool.take(self._t[0][1],Qt.blue,self._pHandles[0]))) # no left tgt, use 0
         #Middle
         for i in range(1,len(self._t) -1): #End points have 1 tgt, mid pts 2
-            self._tHandles.append((HandleItem(-self._t[i][0],color=Qt.blue,parent=self._pHandles[i]), #left
-                                   HandleItem(self._t[i][1],color=Qt.blue,parent=self._pHandles[i]))) #right
+            self._tHandles.append((HandlePool.take(-self._t[i][0],Qt.blue,self._pHandles[i]), #left
+                                   HandlePool.take(self._t[i][1],Qt.blue,self._pHandles[i]))) #right
         #End
-        self._tHandles.append((HandleItem(-self._t[-1][0],color=Qt.blue,parent=self._pHandles[-1]),
+        self._tHandles.append((HandlePool.take(-self._t[-1][0],Qt.blue,self._pHandles[-1]),
                                 QPointF(0,0)))  #no right tangent, use 0, must be a QPointF
 
         for ph in self._pHandles:
@@ -613,9 +757,40 @@ class HermiteSplineItem(QGraphicsItem):
             self._tHandles[i][0].setMoveCallback(self._updateFromHandles)
             self._tHandles[i][1].setMoveCallback(self._updateFromHandles)
         self._tHandles[-1][0].setMoveCallback(self._updateFromHandles) #note End has no right tangent
+        self._indexHandles()
+
+    def _syncHandles(self):
+        """ move the existing handles onto the points & tangents (point count unchanged) """
+        for ph, pi in zip(self._pHandles, self._p):
+            ph.setPosQuietly(pi)
+        self._tHandles[0][1].setPosQuietly(self._t[0][1])
+        for i in range(1,len(self._t) -1):
+            self._tHandles[i][0].setPosQuietly(-self._t[i][0])
+            self._tHandles[i][1].setPosQuietly(self._t[i][1])
+        self._tHandles[-1][0].setPosQuietly(-self._t[-1][0])
+
+    def _releaseHandles(self):
+        """ give all the handles back to the pool, tangents (children) first """
+        tangentHandles = [th for pair in self._tHandles for th in pair if isinstance(th, HandleItem)]
+        HandlePool.release(tangentHandles)
+        HandlePool.release(self._pHandles)
+        self._tHandles = []
+        self._pHandles = []
+        self._handleIndex = {}
+
+    def _indexHandles(self):
+        """ map each handle to the point/ tangent index it controls """
+        self._handleIndex = {}
+        for i, ph in enumerate(self._pHandles):
+            self._handleIndex[ph] = ('p', i)
+        for i, (tl, tr) in enumerate(self._tHandles):
+            #Ends have a QPointF placeholder for the missing tangent
+            for th in (tl, tr):
+                if isinstance(th, HandleItem):
+                    self._handleIndex[th] = ('t', i)
 
     def _deleteHandles(self):
-        """ Delete handles when deselected"""
+        """ Return the handles to the pool when deselected"""
         #mouse event processing manipulates the selection a lot - this needs to be robust.
         #This assume splines only ever have handles as children.
         #TODO: Check that childItems are isInstance(HandleItem)
@@ -625,37 +800,61 @@ class HermiteSplineItem(QGraphicsItem):
         #print("Deleting handles")
 
         self.suppressItemChange = True
-        
-        self._tHandles.clear()
-
-        #del self._pHandles
-        for i in range(len(self._pHandles)):
-            self.scene().removeItem(self._pHandles[i])
-        self._pHandles.clear()
-
-        
+        self._releaseHandles()
         self.suppressItemChange = False
         
     def _updateFromHandles(self, moved=0):
-        """ if a handle moves, update the coords, and recompute the spline curve """
+        """ if a handle moves, update the coords, and recompute the spline curve.
+            Only the point/ tangent of the moved handle is read, and its neighbouring segments redrawn """
         #TODO: Remove `moved` as param - not used
         #to deal with deletion time inconsistencies: 
         if self.suppressItemChange == True:
             return
 
         self.prepareGeometryChange()
-        for i in range(len(self._p)):
-            self._p[i] = self._pHandles[i].pos()
+        moved = self._handleIndex.get(HandleItem.lastChanged)
+        if moved is None or self._pathStale or len(self._pHandles) != len(self._p):
+            #Structure changed (or unknown handle) - read everything back
+            for i in range(len(self._p)):
+                self._p[i] = self._pHandles[i].pos()
+            for i in range(len(self._t)):
+                self._tangentFromHandles(i)
+            self._indexHandles()
+            self._pathStale = True
+        else:
+            kind, i = moved
+            if kind == 'p':
+                self._p[i] = self._pHandles[i].pos()
+            else:
+                self._tangentFromHandles(i)
+            self._markPointDirty(i)
 
-        #Subtract the parent point pos()
-        if HandleItem.lastChanged == self._tHandles[0][1]:
-            pt = self._pHandles[0].pos()
-            self._tHandles[0][1].suppressItemChange = True
-            self._tHandles[0][1].setPos(self._tHandles[0][1].pos() - pt)
-            self._tHandles[0][1].suppressItemChange = False
-            self._t[0] = (QPointF(0,0),self._tHandles[0][1].pos())
+        #Create the path
+        self.updatePath()
+        if self.edgeItem():
+            self.edgeItem().updateLine()
+
+    def _tangentFromHandles(self, i:int):
+        """ Update tangent i from its handles. The handle last dragged is re-based to its point,
+            and for mid points the opposite handle is reflected to keep C2 symmetry """
+        if i == 0:
+            #Subtract the parent point pos()
+            if HandleItem.lastChanged == self._tHandles[0][1]:
+                pt = self._pHandles[0].pos()
+                self._tHandles[0][1].suppressItemChange = True
+                self._tHandles[0][1].setPos(self._tHandles[0][1].pos() - pt)
+                self._tHandles[0][1].suppressItemChange = False
+                self._t[0] = (QPointF(0,0),self._tHandles[0][1].pos())
+
+        elif i == len(self._t) - 1:
+            if HandleItem.lastChanged == self._tHandles[-1][0]:
+                pt = self._pHandles[-1].pos()
+                self._tHandles[-1][0].suppressItemChange = True
+                self._tHandles[-1][0].setPos(self._tHandles[-1][0].pos() - pt)
+                self._tHandles[-1][0].suppressItemChange = False
+                self._t[-1] = (-self._tHandles[-1][0].pos(),QPointF(0,0)) #left facing tgnt is -ve
 
-        for i in range(1,len(self._t)-1):
+        else:
             # maintain C2 symmetry. class variable in HandleItem tracks the last updated item
             # The tuple structure allows for asymmetrical tangents - not currently implemented.
             if HandleItem.lastChanged == self._tHandles[i][0]:
@@ -681,55 +880,51 @@ class HermiteSplineItem(QGraphicsItem):
                 self._tHandles[i][0].suppressItemChange = False
 
             self._t[i] = (-self._tHandles[i][0].pos(), self._tHandles[i][1].pos())
-        if HandleItem.lastChanged == self._tHandles[-1][0]:
-            pt = self._pHandles[-1].pos()
-            self._tHandles[-1][0].suppressItemChange = True
-            self._tHandles[-1][0].setPos(self._tHandles[-1][0].pos() - pt)
-            self._tHandles[-1][0].suppressItemChange = False
-            self._t[-1] = (-self._tHandles[-1][0].pos(),QPointF(0,0)) #left facing tgnt is -ve
-        
-        #Create the path
-        self.updatePath()
-        if self.parentItem:
-            self.parentItem().updateLine()
-
-    def _createHermitePath(self) -> QPainterPath:
-        """ compute the new curve """
 
-        #First iteration of dynamic steps calculation.
-        #p0p1:float = math.sqrt((self._p[0].x() - self._p[-1].x())**2 +(self._p[0].y() - self._p[-1].y())**2 )
-        #steps = int(p0p1/10) #This doesn't deal with big tangents. Needs some more maths!
-
-        path = QPainterPath(self._p[0])
-        #Loop over each segment
-        for seg in range(len(self._p)-1):
-            p0 = self._p[seg]
-            p1 = self._p[seg+1]
-            
-            t0 = self._t[seg][1]    #right facing tangent
-            t1 = self._t[seg+1][0]  #left
-            
-            for i in range(1, self.linesPerSegment + 1):
-                t = i / self.linesPerSegment
-                pt = self._hermiteInterp(p0,t0,p1,t1,t)
-                path.lineTo(pt)
+    def _markPointDirty(self, i:int):
+        """ point/ tangent i changed: the segments either side of it need re-tessellating """
+        if i > 0:
+            self._dirtySegs.add(i-1)
+        if i < len(self._p) - 1:
+            self._dirtySegs.add(i)
+
+    def _patchSegment(self, seg:int):
+        """ recompute one segment, moving its existing path elements (a cubicTo: 2 control points & end) in place """
+        p0 = self._p[seg]
+        p1 = self._p[seg+1]
+        b1, b2 = hermiteToBezier(p0, self._t[seg][1], p1, self._t[seg+1][0])
+        if seg == 0:
+            self._path.setElementPositionAt(0, p0.x(), p0.y())
+        base = 3 * seg
+        self._path.setElementPositionAt(base + 1, b1.x(), b1.y())
+        self._path.setElementPositionAt(base + 2, b2.x(), b2.y())
+        self._path.setElementPositionAt(base + 3, p1.x(), p1.y())
 
+    def _createHermitePath(self) -> QPainterPath:
+        """ compute the new curve: each Hermite segment is exactly one cubic Bezier """
+        controls = splineGeometry.bezierPoints(xyList(self._p), xyTangents(self._t), HERMITE_TENSION)
+        path = QPainterPath(QPointF(*controls[0]))
+        for i in range(1, len(controls), 3):
+            (x1, y1), (x2, y2), (x, y) = controls[i:i+3]
+            path.cubicTo(x1, y1, x2, y2, x, y)
+        self._flat = None
         return path
 
-    def _hermiteInterp(self, p0,t0,p1,t1, t: float) -> QPointF:
-        """ perform the t^th step of the Hermite interpolation between p0 and p1, with tangents t0 and t1"""
-        h00 = 2 * t**3 - 3 * t**2 + 1
-        h10 = t**3 - 2 * t**2 + t
-        h01 = -2 * t**3 + 3 * t**2
-        h11 = t**3 - t**2
-        
-        #accentuate the magnitude of the tangent
-        tension = 4 
-
-        x = ( h00 * p0.x() + h10 * t0.x() * tension
-            + h01 * p1.x() + h11 * t1.x() * tension  )
-        y = ( h00 * p0.y() + h10 * t0.y() * tension
-            + h01 * p1.y() + h11 * t1.y() * tension  )
-            
-        return QPointF(x, y)
+    def bezierPoints(self) -> List[QPointF]:
+        """ the curve's cubic Bezier control points: start, then (control, control, end) per segment """
+        return [QPointF(*pt) for pt in splineGeometry.bezierPoints(xyList(self._p), xyTangents(self._t), HERMITE_TENSION)]
+
+    def flattened(self) -> list:
+        """ the curve as a polyline of (x, y), within FLATTEN_TOLERANCE of it, for hit-testing & measuring.
+            Segment seg starts at point _segStarts[seg]. Cached until the curve changes """
+        if self._flat is None:
+            self._flat, steps = splineGeometry.flatten(xyList(self._p), xyTangents(self._t), HERMITE_TENSION,
+                                                       FLATTEN_TOLERANCE, self.linesPerSegment)
+            self._setSteps(steps)
+        return self._flat
+
+    def _setSteps(self, steps:List[int]):
+        """ record the lines per segment of the flattened curve, and where each segment starts in it """
+        self._segSteps = steps
+        self._segStarts = list(itertools.accumulate(steps[:-1], initial=0))
 
@@ -0,0 +1,601 @@
+""" Aggregate layers for very large graphs: idle nodes and edges are drawn in batches by one item each.
+
+Past a few tens of thousands of items, one scene item per node/ edge costs more (indexing,
+hit-testing, per-item paint calls) than drawing them does. An idle item (unselected, not under the
+mouse, not being edited) is 'parked': taken out of the scene, its geometry kept in arrays here, and
+drawn with the others in a few batched QPainter calls - per style, for edges.
+The VisNodeItem/ VisEdgeItem itself is kept (edges, the model and file I/O still use it), and is
+put back in the scene - promoted - as soon as the user gets near it: clicked, rubber-banded,
+selected or looked up by ID (nodes also when hovered).
+Promoted items that go idle again are parked after AGGREGATE_PARK_MS.
+"""
+
+import math
+from array import array
+from collections import defaultdict
+
+from PySide6.QtCore import Qt, QPointF, QRectF, QLineF, QTimer
+from PySide6.QtGui import QPen, QBrush, QColor, QPolygonF, QPainterPath
+from PySide6.QtWidgets import QGraphicsItem, QGraphicsObject, QGraphicsScene
+
+from PolyLineItemHG import HermiteSplineItem, levelOfDetail
+from labels import labelFont, labelLayout
+
+from  HGConstants import *
+
+
+class AggregateLayer(QGraphicsObject):
+    """ Parks idle items of one role (nodes or edges) of a grScene and draws them.
+        Subclasses say what is stored per item (_store), and how it is drawn & hit """
+
+    #What is parked here (KEY_ROLE)
+    role = None
+
+    def __init__(self, graphScene):
+        super().__init__()
+        self.graphScene = graphScene
+        self.layerEnabled = False
+
+        #item ID -> item, for the items drawn here
+        self.parked = {}
+        #Per parked item rows in the subclass's arrays, (array, row width) in self._arrays.
+        # A removed slot is filled from the end
+        self._ids = []
+        self._slot = {}
+        self._arrays = []
+        #(col, row) -> IDs of the parked items over that grid cell. Items over too many cells are _wide
+        self._grid = defaultdict(set)
+        self._cells = {}
+        self._wide = set()
+        self._bounds = QRectF()
+
+        #Live items that may be parked once idle
+        self.active = set()
+        self._parkTimer = QTimer(self)
+        self._parkTimer.setSingleShot(True)
+        self._parkTimer.setInterval(AGGREGATE_PARK_MS)
+        self._parkTimer.timeout.connect(self.parkIdle)
+
+        #Items promoted by the current rubber band, selected when it ends
+        self._bandRect = QRectF()
+        self._bandItems = []
+
+        self.setAcceptedMouseButtons(Qt.NoButton)
+        self.setFlag(QGraphicsItem.ItemUsesExtendedStyleOption, True)
+
+    def _liveItems(self) -> list:
+        """ the scene's items of this layer's role """
+        if self.role == ROLE_NODE:
+            return self.graphScene.nodes()
+        return self.graphScene.edges()
+
+    def setLayerEnabled(self, enabled:bool):
+        """ switch the layer on (every idle item is parked) or off (every item promoted) """
+        if enabled == self.layerEnabled:
+            return
+        self.layerEnabled = enabled
+        scene = self.graphScene
+        if enabled:
+            scene.addItem(self)
+            self.active.update(self._liveItems())
+            self.parkIdle()
+        else:
+            self._parkTimer.stop()
+            for item in list(self.parked.values()):
+                self.promote(item)
+            self.active.clear()
+            if self.scene() is scene:
+                scene.removeItem(self)
+
+    def reset(self):
+        """ forget every item (the scene is being cleared) """
+        self._parkTimer.stop()
+        for item in self.parked.values():
+            item.parkedIn = None
+        self.parked.clear()
+        self._ids.clear()
+        self._slot.clear()
+        for values, _width in self._arrays:
+            del values[:]
+        self._grid.clear()
+        self._cells.clear()
+        self._wide.clear()
+        self._changed()
+        self.active.clear()
+        self._bandItems.clear()
+        self.prepareGeometryChange()
+        self._bounds = QRectF()
+
+    # Parking & promotion
+    # -------------------
+
+    def isParked(self, item) -> bool:
+        return self.parked.get(item.data(KEY_INDEX)) is item
+
+    def itemChanged(self, item):
+        """ a live item has changed/ been (de)selected: park it once it has been idle a while """
+        if self.layerEnabled:
+            self.active.add(item)
+            self._parkTimer.start()
+
+    def _isIdle(self, item) -> bool:
+        return not item.isSelected()
+
+    def parkIdle(self):
+        """ park the active items that are idle. Nothing is parked mid-edit (not in POINTER mode) """
+        scene = self.graphScene
+        if scene.mouseMode != scene.POINTER:
+            self._parkTimer.start()
+            return
+        idle = []
+        for item in list(self.active):
+            if item.scene() is not scene:
+                self.active.discard(item)
+            elif self._isIdle(item):
+                self.active.discard(item)
+                idle.append(item)
+        if len(idle) < AGGREGATE_BULK_PARK:
+            for item in idle:
+                self.park(item)
+            return
+
+        #Removing items one by one from the BSP index can search the whole tree each time.
+        # Drop the index for the batch, and rebuild it once from what is left
+        indexMethod = scene.itemIndexMethod()
+        scene.setItemIndexMethod(QGraphicsScene.NoIndex)
+        for item in idle:
+            self.park(item)
+        scene.setItemIndexMethod(indexMethod)
+
+    def park(self, item):
+        """ take item out of the scene, and draw it here """
+        idx = item.data(KEY_INDEX)
+        self._store(idx, item)
+        self.parked[idx] = item
+        item.parkedIn = self
+        self._changed()
+
+        rect = item.sceneBoundingRect()
+        if not self._bounds.contains(rect):
+            self.prepareGeometryChange()
+            self._bounds = self._bounds.united(rect)
+        self.graphScene.tileCache.itemRemoved(item)
+        item.suppressItemChange = True
+        self.graphScene.removeItem(item)
+        item.suppressItemChange = False
+        self.update(rect)
+
+    def parkedChanged(self, item):
+        """ a parked item has been moved/ renamed (eg by a script, a layout or a dragged end node):
+            redraw it where it now is """
+        idx = item.data(KEY_INDEX)
+        self.update(self._storedRect(idx))
+        self._forget(idx)
+        self._store(idx, item)
+        self._changed()
+
+        rect = item.sceneBoundingRect()
+        if not self._bounds.contains(rect):
+            self.prepareGeometryChange()
+            self._bounds = self._bounds.united(rect)
+        self.update(rect)
+        #Keep the scene's content bounds in step too
+        self.graphScene._updateBounds(item)
+
+    def promote(self, item):
+        """ put a parked item back in the scene as a live item """
+        self.discard(item)
+        item.suppressItemChange = True
+        self.graphScene.addItem(item)
+        item.suppressItemChange = False
+        self.update(item.sceneBoundingRect())
+        self.itemChanged(item)
+
+    def discard(self, item):
+        """ stop drawing item here (promoted or deleted) """
+        idx = item.data(KEY_INDEX)
+        if self.parked.get(idx) is not item:
+            return
+        del self.parked[idx]
+        item.parkedIn = None
+        self._forget(idx)
+        self._changed()
+
+    def _hookMissing(self, hook:str) -> TypeError:
+        return TypeError(f"{type(self).__name__} does not implement AggregateLayer.{hook}()")
+
+    # Per item storage
+    # ----------------
+
+    def _store(self, idx, item):
+        """ add idx's geometry (subclasses: _addSlot() & _index()) """
+        raise self._hookMissing("_store")
+
+    def _storedRect(self, idx) -> QRectF:
+        """ the scene area idx was drawn over when stored """
+        raise self._hookMissing("_storedRect")
+
+    def _forget(self, idx):
+        self._unindex(idx)
+        self._removeSlot(idx)
+
+    def _changed(self):
+        """ stored geometry has changed: drop anything cached from it """
+        pass
+
+    def _addSlot(self, idx, *rows):
+        """ append idx's rows, one sequence per array in self._arrays """
+        self._slot[idx] = len(self._ids)
+        self._ids.append(idx)
+        for (values, _width), row in zip(self._arrays, rows):
+            values.extend(row)
+
+    def _removeSlot(self, idx):
+        slot = self._slot.pop(idx)
+        last = len(self._ids) - 1
+        if slot != last:
+            lastIdx = self._ids[last]
+            self._ids[slot] = lastIdx
+            self._slot[lastIdx] = slot
+            for values, width in self._arrays:
+                values[slot*width:(slot + 1)*width] = values[last*width:(last + 1)*width]
+        self._ids.pop()
+        for values, width in self._arrays:
+            del values[last*width:]
+
+    # Finding parked items
+    # --------------------
+
+    def _cellRange(self, rect:QRectF):
+        return (math.floor(rect.left() / AGGREGATE_CELL), math.floor(rect.top() / AGGREGATE_CELL),
+                math.floor(rect.right() / AGGREGATE_CELL), math.floor(rect.bottom() / AGGREGATE_CELL))
+
+    def _index(self, idx, rect:QRectF):
+        """ put idx in the grid cells rect covers """
+        c0, r0, c1, r1 = cells = self._cellRange(rect)
+        if (c1 - c0 + 1) * (r1 - r0 + 1) > AGGREGATE_WIDE_CELLS:
+            self._wide.add(idx)
+            return
+        self._cells[idx] = cells
+        for col in range(c0, c1 + 1):
+            for row in range(r0, r1 + 1):
+                self._grid[(col, row)].add(idx)
+
+    def _unindex(self, idx):
+        cells = self._cells.pop(idx, None)
+        if cells is None:
+            self._wide.discard(idx)
+            return
+        c0, r0, c1, r1 = cells
+        for col in range(c0, c1 + 1):
+            for row in range(r0, r1 + 1):
+                self._grid[(col, row)].discard(idx)
+
+    def _candidates(self, rect:QRectF) -> set:
+        """ IDs of the parked items that may be in rect (those over the grid cells it covers) """
+        c0, r0, c1, r1 = self._cellRange(rect)
+        found = set(self._wide)
+        for col in range(c0, c1 + 1):
+            for row in range(r0, r1 + 1):
+                cell = self._grid.get((col, row))
+                if cell:
+                    found.update(cell)
+        return found
+
+    def _idsIn(self, rect:QRectF) -> list:
+        """ IDs of the parked items in rect """
+        raise self._hookMissing("_idsIn")
+
+    def itemsIn(self, rect:QRectF) -> list:
+        """ the parked items in rect """
+        return [self.parked[idx] for idx in self._idsIn(rect)]
+
+    def _near(self, item, pos:QPointF) -> bool:
+        """ could a click at pos hit item? """
+        return True
+
+    def promoteNear(self, pos:QPointF):
+        """ promote the parked items the mouse could be touching at pos, so Qt sees them """
+        if not self.parked:
+            return
+        reach = NODESIZE/2 + HITSIZE
+        for item in self.itemsIn(QRectF(pos.x() - reach, pos.y() - reach, 2*reach, 2*reach)):
+            if self._near(item, pos):
+                self.promote(item)
+
+    def promoteIn(self, rect:QRectF) -> list:
+        """ promote the parked items in rect, and return them """
+        items = self.itemsIn(rect)
+        for item in items:
+            self.promote(item)
+        return items
+
+    def _inBand(self, item, rect:QRectF) -> bool:
+        """ is item selected by a rubber band over rect? """
+        raise self._hookMissing("_inBand")
+
+    def rubberBandChanged(self, viewRect, fromScenePoint, toScenePoint):
+        """ a view's rubber band has moved (connected to QGraphicsView.rubberBandChanged). The parked items
+            it covers are promoted so Qt selects them; those it still covers at the end are selected """
+        if viewRect.isNull():
+            #Band released
+            for item in self._bandItems:
+                if item.scene() is self.graphScene and self._inBand(item, self._bandRect):
+                    item.setSelected(True)
+            self._bandItems = []
+            self._bandRect = QRectF()
+            return
+        self._bandRect = QRectF(fromScenePoint, toScenePoint).normalized()
+        if self.parked:
+            self._bandItems += self.promoteIn(self._bandRect)
+
+    def boundingRect(self) -> QRectF:
+        return self._bounds
+
+    def _mostlyShown(self, rect:QRectF) -> bool:
+        """ does rect show most of the layer (so drawing everything beats looking up what is in rect)? """
+        shown = rect.intersected(self._bounds)
+        return shown.width() * shown.height() * 4 >= self._bounds.width() * self._bounds.height()
+
+
+class NodeLayer(AggregateLayer):
+    """ Draws the parked nodes of a grScene as dots/ outlined circles. Not selectable, and clicks pass through it """
+
+    role = ROLE_NODE
+
+    def __init__(self, graphScene):
+        super().__init__(graphScene)
+        #Parked node centres, x, y per slot
+        self._pos = array('d')
+        self._arrays = [(self._pos, 2)]
+        #The centres as one QPolygonF for drawPoints(), rebuilt when nodes are parked/ promoted
+        self._points = None
+        #Just under the live nodes, above the edges
+        self.setZValue(999)
+
+    def _isIdle(self, node) -> bool:
+        return not node.isSelected() and not node.hovered \
+                and not node.sceneBoundingRect().contains(self.graphScene._lastScenePos)
+
+    def _store(self, idx, node):
+        pos = node.scenePos()
+        self._addSlot(idx, (pos.x(), pos.y()))
+        self._index(idx, QRectF(pos, pos))
+
+    def _storedRect(self, idx) -> QRectF:
+        slot = self._slot[idx]
+        x, y = self._pos[2*slot], self._pos[2*slot + 1]
+        return self.parked[idx].boundingRect().translated(x, y)
+
+    def _changed(self):
+        self._points = None
+
+    def _idsIn(self, rect:QRectF) -> list:
+        """ IDs of the parked nodes whose centre is in rect """
+        pos = self._pos
+        found = []
+        for idx in self._candidates(rect):
+            slot = self._slot[idx]
+            if rect.contains(pos[2*slot], pos[2*slot + 1]):
+                found.append(idx)
+        return found
+
+    def _inBand(self, node, rect:QRectF) -> bool:
+        return rect.contains(node.scenePos())
+
+    def _pointsIn(self, rect:QRectF) -> QPolygonF:
+        """ the parked centres to draw for rect: all of them (cached) when rect shows most of the layer,
+            otherwise only those near rect, found from the grid """
+        pos = self._pos
+        if not self._mostlyShown(rect):
+            reach = NODESIZE
+            slots = [self._slot[idx] for idx in self._idsIn(rect.adjusted(-reach, -reach, reach, reach))]
+            return QPolygonF([QPointF(pos[2*slot], pos[2*slot + 1]) for slot in slots])
+        if self._points is None:
+            self._points = QPolygonF([QPointF(pos[i], pos[i + 1]) for i in range(0, len(pos), 2)])
+        return self._points
+
+    def paint(self, painter, option, widget=None):
+        if not self._ids:
+            return
+        lod = levelOfDetail(painter, option, widget)
+        points = self._pointsIn(option.exposedRect)
+
+        #Zoomed right out, a node is a dot (as VisNodeItem draws it)
+        if lod < LOD_NODE_POINT:
+            painter.setPen(QPen(Qt.black, NODESIZE))
+            painter.drawPoints(points)
+            return
+
+        #Every node as an outlined circle: a black round dot, then a slightly smaller white one
+        pen = QPen(Qt.black, NODESIZE + 1)
+        pen.setCapStyle(Qt.RoundCap)
+        painter.setPen(pen)
+        painter.drawPoints(points)
+        pen = QPen(Qt.white, NODESIZE - 1)
+        pen.setCapStyle(Qt.RoundCap)
+        painter.setPen(pen)
+        painter.drawPoints(points)
+
+        #Labels, for the nodes in view only
+        if lod < LOD_LABELS:
+            return
+        painter.setPen(Qt.black)
+        painter.setFont(labelFont())
+        #Labels sit above & right of the centre: widen the search so nodes just outside still show theirs
+        margin = AGGREGATE_CELL
+        for idx in self._idsIn(option.exposedRect.adjusted(-margin, -margin, margin, margin)):
+            node = self.parked[idx]
+            pos = node.scenePos()
+            if node.metadataAttributes['name']['display']:
+                painter.drawStaticText(pos + node._nameRect.topLeft(), labelLayout(node.dispText)[0])
+            metaText = node.metaDisplay.toPlainText()
+            if metaText:
+                painter.drawStaticText(pos + node.metaDisplay.pos() + QPointF(LABEL_MARGIN, LABEL_MARGIN),
+                                       labelLayout(metaText)[0])
+
+
+class EdgeLayer(AggregateLayer):
+    """ Draws the parked edges of a grScene: lines grouped by pen, one drawLines()/ drawPath() per group,
+        arrowheads as one filled path. Not selectable, and clicks pass through it """
+
+    role = ROLE_EDGE
+
+    def __init__(self, graphScene):
+        super().__init__(graphScene)
+        #Parked edges' chord (start x, y, end x, y) and bounds (left, top, right, bottom) per slot
+        self._chords = array('d')
+        self._boxes = array('d')
+        self._arrays = [(self._chords, 4), (self._boxes, 4)]
+        #pen key -> IDs of the parked edges drawn with that pen
+        self._groups = defaultdict(set)
+        self._style = {}
+        #Arrowheads of the parked directed edges, in scene coords
+        self._arrows = {}
+        #Drawing everything: level of detail -> lines/ path per pen key, rebuilt when edges are parked/ promoted
+        self._allCache = {}
+        #Under the live edges
+        self.setZValue(-1)
+
+    def _isIdle(self, edge) -> bool:
+        scene = self.graphScene
+        if edge.isSelected() or edge.isOnlySelected or scene.onlySelected is edge or \
+                edge in scene._dirtyEdges or edge.edgeLine._pHandles:
+            return False
+        return not self._near(edge, scene._lastScenePos)
+
+    def _near(self, edge, pos:QPointF) -> bool:
+        if not edge.sceneBoundingRect().adjusted(-HITSIZE, -HITSIZE, HITSIZE, HITSIZE).contains(pos):
+            return False
+        return edge.shape().contains(edge.mapFromScene(pos))
+
+    def _penKey(self, edge):
+        """ the pen edge's line is drawn with when unselected, as a hashable key """
+        line = edge.edgeLine
+        pen = line.pen if isinstance(line, HermiteSplineItem) else QPen(Qt.black)
+        return (pen.color().rgba(), pen.widthF(), pen.style())
+
+    def _store(self, idx, edge):
+        ends = edge.edgeLine._p
+        start = edge.mapToScene(ends[0])
+        end = edge.mapToScene(ends[-1])
+        box = edge.sceneBoundingRect()
+        self._addSlot(idx, (start.x(), start.y(), end.x(), end.y()),
+                      (box.left(), box.top(), box.right(), box.bottom()))
+        self._index(idx, box)
+        key = self._penKey(edge)
+        self._style[idx] = key
+        self._groups[key].add(idx)
+        if edge.endShape:
+            self._arrows[idx] = edge.endShape.scenePolygon()
+
+    def _storedRect(self, idx) -> QRectF:
+        slot = self._slot[idx]
+        left, top, right, bottom = self._boxes[4*slot:4*slot + 4]
+        return QRectF(left, top, right - left, bottom - top)
+
+    def _forget(self, idx):
+        self._groups[self._style.pop(idx)].discard(idx)
+        self._arrows.pop(idx, None)
+        super()._forget(idx)
+
+    def _changed(self):
+        self._allCache.clear()
+
+    def _idsIn(self, rect:QRectF) -> list:
+        """ IDs of the parked edges whose bounds meet rect """
+        boxes = self._boxes
+        found = []
+        for idx in self._candidates(rect):
+            slot = 4*self._slot[idx]
+            if boxes[slot] <= rect.right() and boxes[slot + 2] >= rect.left() and \
+                    boxes[slot + 1] <= rect.bottom() and boxes[slot + 3] >= rect.top():
+                found.append(idx)
+        return found
+
+    def _inBand(self, edge, rect:QRectF) -> bool:
+        #As Qt's default rubber band selection (Qt.IntersectsItemShape)
+        band = QPainterPath()
+        band.addPolygon(edge.mapFromScene(rect))
+        return edge.collidesWithPath(band)
+
+    def _geometry(self, ids, level:int) -> dict:
+        """ what to draw for the edges ids at a level of detail, per pen key: lines (0 the chords,
+            1 the polylines through the points) or a QPainterPath (2 the full curves) """
+        chords = self._chords
+        groups = {}
+        for idx in ids:
+            key = self._style[idx]
+            if level == 2:
+                path = groups.get(key)
+                if path is None:
+                    path = groups[key] = QPainterPath()
+                edge = self.parked[idx]
+                path.addPath(edge.mapToScene(edge.edgeLine._path))
+                continue
+            lines = groups.get(key)
+            if lines is None:
+                lines = groups[key] = []
+            if level == 0:
+                slot = 4*self._slot[idx]
+                lines.append(QLineF(chords[slot], chords[slot + 1], chords[slot + 2], chords[slot + 3]))
+            else:
+                edge = self.parked[idx]
+                points = [edge.mapToScene(pt) for pt in edge.edgeLine._p]
+                lines.extend(QLineF(points[i], points[i + 1]) for i in range(len(points) - 1))
+        return groups
+
+    def paint(self, painter, option, widget=None):
+        if not self._ids:
+            return
+        lod = levelOfDetail(painter, option, widget)
+        #As the edges draw themselves: chords zoomed right out, then polylines, then the curves
+        if lod < LOD_EDGE_CHORD:
+            level = 0
+        elif lod < LOD_EDGE_POLYLINE:
+            level = 1
+        else:
+            level = 2
+
+        rect = option.exposedRect
+        if self._mostlyShown(rect):
+            ids = self._ids
+            groups = self._allCache.get(level)
+            if groups is None:
+                groups = self._allCache[level] = self._geometry(ids, level)
+        else:
+            ids = self._idsIn(rect)
+            groups = self._geometry(ids, level)
+
+        painter.setBrush(Qt.NoBrush)
+        for (rgba, width, style), shapes in groups.items():
+            painter.setPen(QPen(QBrush(QColor.fromRgba(rgba)), width, style))
+            if level == 2:
+                painter.drawPath(shapes)
+            else:
+                painter.drawLines(shapes)
+
+        #Sub-pixel arrowheads are just noise
+        if lod >= LOD_ARROWS and self._arrows:
+            arrows = QPainterPath()
+            for idx in ids:
+                polygon = self._arrows.get(idx)
+                if polygon is not None:
+                    arrows.addPolygon(polygon)
+                    arrows.closeSubpath()
+            painter.setPen(QPen(Qt.black))
+            painter.setBrush(QBrush(Qt.black))
+            painter.drawPath(arrows)
+
+        #Labels
+        if lod < LOD_LABELS:
+            return
+        painter.setPen(Qt.black)
+        painter.setFont(labelFont())
+        for idx in ids:
+            edge = self.parked[idx]
+            for label in (edge.textItem, edge.metaDisplay):
+                text = label.toPlainText()
+                if text and label.isVisible():
+                    painter.drawStaticText(edge.mapToScene(label.pos() + QPointF(LABEL_MARGIN, LABEL_MARGIN)),
+                                           labelLayout(text)[0])
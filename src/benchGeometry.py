@@ -0,0 +1,159 @@
+""" Microbenchmarks: spline & polyline geometry (splineGeometry.py), without Qt.
+Each function in pure Python against hermiteKernel (NumPy), and a batch of edges flattened in worker processes.
+Run from src: python benchGeometry.py """
+
+import os
+import sys
+import math
+import timeit
+import random
+import multiprocessing
+
+import hermiteKernel
+import splineGeometry
+if hermiteKernel.HAVE_NUMPY:
+    import numpy as np
+from splineGeometry import ArcLengthTable
+
+#As HGConstants (which imports Qt, so isn't used here)
+HERMITE_TENSION = 4
+FLATTEN_TOLERANCE = 0.5
+MAX_STEPS = 40
+
+
+def randomSpline(nPoints:int):
+    """ (points, tangents) of a spline through nPoints random points, with random tangents """
+    points = [(random.uniform(0, 1000), random.uniform(0, 1000)) for _ in range(nPoints)]
+    tangents = [((random.uniform(-50, 50), random.uniform(-50, 50)),
+                 (random.uniform(-50, 50), random.uniform(-50, 50))) for _ in range(nPoints)]
+    return points, tangents
+
+
+def randomEdge():
+    """ (points, tangents) of a graph-like edge: mostly 2 points, default tangents """
+    points = [(random.uniform(0, 2000), random.uniform(0, 2000)) for _ in range(random.choice((2, 2, 2, 3, 4)))]
+    return points, splineGeometry.defaultTangents(points, 40)
+
+
+def useKernel(kernel:bool):
+    """ send everything to hermiteKernel, or nothing """
+    splineGeometry.KERNEL_MIN_POINTS = 0 if kernel else math.inf
+
+
+def kernelOn() -> bool:
+    return splineGeometry.KERNEL_MIN_POINTS == 0
+
+
+def compare(fn, number:int):
+    """ (Python us, kernel us, result difference) of fn() """
+    useKernel(False)
+    python = timeIt(fn, number)
+    pyResult = fn()
+    useKernel(True)
+    kernel = timeIt(fn, number)
+    diff = maxDifference(pyResult, fn())
+    return python, kernel, diff
+
+
+def maxDifference(result1, result2) -> float:
+    """ the largest difference between two results: numbers, or (nested) sequences of them """
+    if isinstance(result1, (int, float)):
+        return abs(result1 - result2)
+    if len(result1) != len(result2):
+        return math.inf
+    return max((maxDifference(r1, r2) for r1, r2 in zip(result1, result2)), default=0.0)
+
+
+def timeIt(fn, number:int) -> float:
+    """ best of 3, in microseconds per call """
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+
+
+def flattenAll(edges:list) -> int:
+    """ flatten a chunk of edges, returning the point count (in a worker process) """
+    return sum(len(splineGeometry.flatten(points, tangents, HERMITE_TENSION, FLATTEN_TOLERANCE, MAX_STEPS)[0])
+               for points, tangents in edges)
+
+
+def tessellateMany(splines, tension:float, steps:int) -> list:
+    """ tessellate a batch of (points, tangents) arrays with one matrix product, against
+        hermiteKernel.tessellate() one at a time. Returns each spline's path points """
+    if not splines:
+        return []
+    geometry = np.concatenate([hermiteKernel.segmentGeometry(points, tangents) for points, tangents in splines])
+    curves = np.matmul(hermiteKernel.basisTable(steps, tension), geometry).reshape(-1, 2)
+    paths = []
+    start = 0
+    for points, _tangents in splines:
+        end = start + (len(points) - 1) * steps
+        paths.append(np.concatenate([points[:1], curves[start:end]]))
+        start = end
+    return paths
+
+
+def row(name, python, kernel, diff):
+    print(f"{name:>26} {python:>10.1f} {kernel:>10.1f} {python/kernel:>8.1f}x {diff:>10.2e}")
+
+
+def main():
+    if not hermiteKernel.HAVE_NUMPY:
+        print("NumPy not installed - nothing to compare")
+        return
+    random.seed(1)
+    kernelMin = splineGeometry.KERNEL_MIN_POINTS
+
+    print(f"{'':>26} {'python us':>10} {'kernel us':>10} {'speed-up':>9} {'max diff':>10}")
+    for nPoints in (2, 4, 10, 50):
+        points, tangents = randomSpline(nPoints)
+        row(f"flatten {nPoints} points", *compare(lambda: splineGeometry.flatten(
+            points, tangents, HERMITE_TENSION, FLATTEN_TOLERANCE, MAX_STEPS), 200))
+        row(f"tessellate {nPoints} x {MAX_STEPS}", *compare(lambda: splineGeometry.tessellate(
+            points, tangents, HERMITE_TENSION, MAX_STEPS), 100))
+
+    for nPoints in (10, 100, 5000):
+        points, tangents = randomSpline(nPoints)
+        x, y = points[nPoints // 2]
+        #A table each: the kernel's keeps its points as an array
+        tables = {False: ArcLengthTable(points), True: ArcLengthTable(points)}
+        row(f"nearest on {nPoints} points", *compare(lambda: tables[kernelOn()].nearest(x + 1, y + 1, 5)[:2], 100))
+        row(f"nearest of {nPoints} points", *compare(lambda: tables[kernelOn()].nearestVertex(x + 1, y + 1), 100))
+
+    #Default tangents for a loaded graph's edges: one at a time, or all in one batch
+    edgePoints = [randomEdge()[0] for _ in range(1000)]
+    for model in ("fixed", "catmullRom", "cardinal", "monotone"):
+        row(f"1000 {model} tangents", *compare(lambda: splineGeometry.defaultTangentsMany(
+            edgePoints, 40, model, HERMITE_TENSION), 10))
+    useKernel(False)
+
+    #Python only: quick enough that NumPy wouldn't pay its set-up
+    print(f"{'':>26} {'us':>10}")
+    edges = [randomEdge() for _ in range(1000)]
+    for name, fn in (("bezier points", lambda: [splineGeometry.bezierPoints(p, t, HERMITE_TENSION) for p, t in edges]),
+                     ("bounding boxes", lambda: [splineGeometry.boundingBox(p) for p, _t in edges]),
+                     ("end angles", lambda: [splineGeometry.splineEndAngle(t) for _p, t in edges]),
+                     ("arc-length tables", lambda: [ArcLengthTable(p) for p, _t in edges])):
+        print(f"{name + ' (per edge)':>26} {timeIt(fn, 10) / len(edges):>10.2f}")
+    table = ArcLengthTable(randomSpline(100)[0])
+    print(f"{'point at length (100 pts)':>26} {timeIt(lambda: table.pointAtLength(table.length() / 3), 10000):>10.2f}")
+    splineGeometry.KERNEL_MIN_POINTS = kernelMin
+
+    #A batch of splines at fixed steps, as when a graph is loaded: all in one matrix product
+    arrays = [splineGeometry.splineArrays(*randomSpline(random.randint(2, 6))) for _ in range(1000)]
+    single = timeIt(lambda: [hermiteKernel.tessellate(p, t, HERMITE_TENSION, MAX_STEPS) for p, t in arrays], 1)
+    batch = timeIt(lambda: tessellateMany(arrays, HERMITE_TENSION, MAX_STEPS), 1)
+    print(f"1000 splines at {MAX_STEPS} lines per segment: one at a time {single/1000:.1f} ms, batched {batch/1000:.1f} ms")
+
+    #Geometry needs no Qt, so it can be farmed out to worker processes
+    edges = [randomEdge() for _ in range(40000)]
+    workers = min(4, os.cpu_count() or 1)
+    chunks = [edges[i::workers * 4] for i in range(workers * 4)]
+    here = timeIt(lambda: flattenAll(edges), 1)
+    with multiprocessing.Pool(workers) as pool:
+        pool.map(flattenAll, chunks[:workers])
+        farmed = timeIt(lambda: sum(pool.map(flattenAll, chunks)), 1)
+    print(f"{len(edges)} edges flattened: in this process {here/1000:.0f} ms, in {workers} workers {farmed/1000:.0f} ms")
+    print(f"Qt loaded: {'PySide6' in sys.modules}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+""" Benchmark: Hermite spline items' paths and flattening.
+The cubic Bezier path against the old 40 lines per segment, and adaptive flattening of graph-like edges.
+The geometry on its own (no Qt, Python against NumPy) is in benchGeometry.py.
+Run from src: python benchHermite.py """
+
+import sys
+import timeit
+import random
+
+from PySide6.QtCore import QPointF
+from PySide6.QtGui import QPainterPath
+from PySide6.QtWidgets import QApplication
+
+from  HGConstants import *
+import hermiteKernel
+import splineGeometry
+from PolyLineItemHG import HermiteSplineItem, xyList, xyTangents
+
+
+def randomSpline(nPoints:int) -> HermiteSplineItem:
+    """ a spline through nPoints random points, with random tangents """
+    points = [QPointF(random.uniform(0, 1000), random.uniform(0, 1000)) for _ in range(nPoints)]
+    tangents = [(QPointF(random.uniform(-50, 50), random.uniform(-50, 50)),
+                 QPointF(random.uniform(-50, 50), random.uniform(-50, 50))) for _ in range(nPoints)]
+    return HermiteSplineItem(points, tangents)
+
+
+def polylinePath(xy) -> QPainterPath:
+    """ a polyline path through the points of an (n, 2) array (how splines were drawn before cubicTo) """
+    pts = xy.tolist()
+    path = QPainterPath(QPointF(*pts[0]))
+    lineTo = path.lineTo
+    for x, y in pts[1:]:
+        lineTo(x, y)
+    return path
+
+
+def fixedPath(spline:HermiteSplineItem) -> QPainterPath:
+    """ the spline as linesPerSegment lines per segment """
+    points, tangents = splineGeometry.splineArrays(xyList(spline._p), xyTangents(spline._t))
+    return polylinePath(hermiteKernel.tessellate(points, tangents, HERMITE_TENSION, spline.linesPerSegment))
+
+
+def timeIt(fn, number:int) -> float:
+    """ best of 3, in microseconds per call """
+    return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1e6
+
+
+def main():
+    if not hermiteKernel.HAVE_NUMPY:
+        print("NumPy not installed - nothing to compare")
+        return
+    app = QApplication(sys.argv)
+    random.seed(1)
+
+    print("Building the path")
+    print(f"{'points':>8} {'lines us':>10} {'cubic us':>10} {'speed-up':>9} {'elements':>14}")
+    for nPoints in (2, 4, 10):
+        spline = randomSpline(nPoints)
+        lines = timeIt(lambda: fixedPath(spline), 200)
+        cubic = timeIt(spline._createHermitePath, 200)
+        counts = f"{fixedPath(spline).elementCount()} -> {spline._path.elementCount()}"
+        print(f"{nPoints:>8} {lines:>10.1f} {cubic:>10.1f} {lines/cubic:>8.1f}x {counts:>14}")
+
+    #Adaptive flattening: points of graph-like edges (default tangents, mostly 2 points)
+    edges = [HermiteSplineItem([QPointF(random.uniform(0, 2000), random.uniform(0, 2000))
+                                for _ in range(random.choice((2, 2, 2, 3, 4)))]) for _ in range(1000)]
+    fixed = sum((len(edge._p) - 1) * edge.linesPerSegment + 1 for edge in edges)
+    adaptive = sum(len(edge.flattened()) for edge in edges)
+    print(f"1000 edges flattened: {fixed} points at {edges[0].linesPerSegment} lines per segment, "
+          f"{adaptive} adaptively ({fixed/adaptive:.1f}x fewer)")
+
+
+if __name__ == "__main__":
+    main()
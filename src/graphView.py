@@ -0,0 +1,118 @@
+""" Extra views onto the one grScene: more detail panes, and an overview of the whole graph.
+
+All views share the scene's items, geometry and change notifications (Qt repaints every view
+showing a changed area), so a second view costs a viewport, not a copy of the graph.
+Each view keeps its own zoom, render hints and LOD: items pass the painting widget to
+levelOfDetail(), which scales the zoom by the view's lodScale.
+"""
+
+from PySide6.QtCore import Qt, QRectF, QTimer
+from PySide6.QtGui import QPainter, QPen
+from PySide6.QtWidgets import QGraphicsView
+
+from  HGConstants import *
+
+
+class GraphView(QGraphicsView):
+    """ A detail view onto a grScene, with its own zoom (mouse wheel) and LOD """
+
+    def __init__(self, scene, parent=None, lodScale:float=1.0, antialias:bool=True):
+        super().__init__(scene, parent)
+        #Multiplies the zoom when items pick their level of detail (<1: simpler drawing in this view)
+        self.lodScale = lodScale
+        self.setRenderHint(QPainter.Antialiasing, antialias)
+        self.setDragMode(QGraphicsView.RubberBandDrag)
+        self.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
+        self.setResizeAnchor(QGraphicsView.AnchorUnderMouse)
+        #Rubber bands select the scene's parked nodes & edges too (aggregateLayer.py)
+        if hasattr(scene, 'viewRubberBandChanged'):
+            self.rubberBandChanged.connect(scene.viewRubberBandChanged)
+        #The scene only pushes its cursor when it changes (grScene.setViewCursor): start with the current one
+        if hasattr(scene, '_cursorShape'):
+            self.setCursor(scene._cursorShape)
+
+    def zoom(self) -> float:
+        """ the current scale (1.0 = 100%). Views only scale, so m11 is the zoom """
+        return self.transform().m11()
+
+    def wheelEvent(self, event):
+        """ zoom this view only, about the mouse """
+        steps = event.angleDelta().y() / 120
+        if not steps:
+            return super().wheelEvent(event)
+        factor = VIEW_WHEEL_ZOOM ** steps
+        newZoom = self.zoom() * factor
+        if VIEW_MIN_ZOOM <= newZoom <= VIEW_MAX_ZOOM:
+            self.scale(factor, factor)
+        event.accept()
+
+
+class OverviewView(GraphView):
+    """ The whole graph, small and cheap (low LOD, no antialiasing, not editable),
+        with the area shown by detailView outlined. Click or drag to move detailView there """
+
+    def __init__(self, scene, detailView:QGraphicsView, parent=None):
+        super().__init__(scene, parent, lodScale=OVERVIEW_LOD_SCALE, antialias=False)
+        self.detailView = detailView
+        self.setInteractive(False)
+        self.setDragMode(QGraphicsView.NoDrag)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setVerticalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        #Changed items are tiny here: repaint one rect around them rather than tracking each region
+        self.setViewportUpdateMode(QGraphicsView.BoundingRectViewportUpdate)
+
+        #Refit when the graph grows past what is shown - checked once per burst of scene changes
+        self._fitTimer = QTimer(self)
+        self._fitTimer.setSingleShot(True)
+        self._fitTimer.setInterval(OVERVIEW_REFIT_MS)
+        self._fitTimer.timeout.connect(self._refitIfNeeded)
+        scene.changed.connect(self._sceneChanged)
+
+        #Follow the detail view's pans & zooms (both move its scroll bars)
+        for bar in (detailView.horizontalScrollBar(), detailView.verticalScrollBar()):
+            bar.valueChanged.connect(self._detailMoved)
+            bar.rangeChanged.connect(self._detailMoved)
+
+    def fitContent(self):
+        """ show all of the graph """
+        bounds = self.scene().contentBounds()
+        if bounds.isNull():
+            return
+        margin = max(bounds.width(), bounds.height()) * OVERVIEW_MARGIN
+        self.fitInView(bounds.adjusted(-margin, -margin, margin, margin), Qt.KeepAspectRatio)
+
+    def _sceneChanged(self, _region):
+        self._fitTimer.start()
+
+    def _refitIfNeeded(self):
+        shown = self.mapToScene(self.viewport().rect()).boundingRect()
+        if not shown.contains(self.scene().contentBounds()):
+            self.fitContent()
+
+    def _detailMoved(self, *_args):
+        self.viewport().update()
+
+    def detailRect(self) -> QRectF:
+        """ the scene rect shown in the detail view """
+        return self.detailView.mapToScene(self.detailView.viewport().rect()).boundingRect()
+
+    def drawForeground(self, painter, rect):
+        super().drawForeground(painter, rect)
+        pen = QPen(Qt.red)
+        pen.setCosmetic(True)
+        painter.setPen(pen)
+        painter.setBrush(Qt.NoBrush)
+        painter.drawRect(self.detailRect())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.fitContent()
+
+    def mousePressEvent(self, event):
+        self.detailView.centerOn(self.mapToScene(event.position().toPoint()))
+        event.accept()
+
+    def mouseMoveEvent(self, event):
+        if event.buttons() & Qt.LeftButton:
+            self.detailView.centerOn(self.mapToScene(event.position().toPoint()))
+        event.accept()
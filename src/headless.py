@@ -0,0 +1,51 @@
+""" Use the graph model, scene and items without a MainWindow or a display:
+for batch jobs (load, transform, lay out, export), tests and benchmarks of the real item code.
+
+    app = headlessApp()
+    model, scene = loadGraph("examples/b2.graphml")
+    for node in scene.nodes(): node.moveBy(10, 0)
+    saveGraph(scene, "b2-moved.graphml")
+    scene.exportSvg("b2.svg")
+
+There is no list of items unless a listWidget is passed in, and the scene has no views.
+"""
+
+import os
+import sys
+
+#Qt needs a platform, even with nothing on screen. Set before the QApplication is made
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication
+
+from mainwindow import graphModel, grScene
+
+from  HGConstants import *
+
+
+def headlessApp() -> QApplication:
+    """ the QApplication (text & graphics items need one), created if needed """
+    return QApplication.instance() or QApplication(sys.argv[:1])
+
+
+def newGraph(listWidget=None):
+    """ an empty (model, scene) pair.
+        Graph IDs are global (coreGraph), so like File>New this resets them - one graph at a time """
+    model = graphModel()
+    model.clear()
+    scene = grScene(model, listWidget)
+    return model, scene
+
+
+def loadGraph(fileName:str, listWidget=None):
+    """ read a graphml file into a new (model, scene) pair """
+    model, scene = newGraph(listWidget)
+    with open(fileName, "r") as graphFile:
+        scene.loadGraphML(graphFile.read())
+    return model, scene
+
+
+def saveGraph(scene:grScene, fileName:str):
+    """ write the scene's graph to a graphml file """
+    with open(fileName, "w") as graphFile:
+        graphFile.write(scene.toGraphML())
@@ -0,0 +1,161 @@
+""" Hermite spline tessellation, vectorised with NumPy.
+
+A cubic Hermite segment at parameter t is the basis row B(t) = [h00, h10, h01, h11] times the
+segment's geometry [p0, t0, p1, t1]. For a fixed number of steps per segment the basis rows are the
+same for every segment of every spline, so they are computed once per step count (basisTable),
+and a whole spline - or a batch of splines - is one matrix product.
+Points are (n, 2) arrays, tangents (n, 2, 2) arrays of (in, out) tangents relative to their point.
+Segments can have different step counts (adaptive flattening): segmentSteps() picks them.
+Also point queries on long polylines (nearestOnPolyline, nearestPoint), for clicks on edges with many bends,
+and default tangents for a batch of splines (defaultTangents).
+
+tension is the factor tangents are scaled by (HGConstants.HERMITE_TENSION for the editor's splines).
+No Qt: this is the NumPy half of splineGeometry.py.
+
+NumPy is optional: without it HAVE_NUMPY is False, and callers use their pure Python loop.
+"""
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:
+    np = None
+    HAVE_NUMPY = False
+
+#(steps per segment, tension) -> (steps, 4) basis table
+_basisTables = {}
+
+
+def basisTable(steps:int, tension:float):
+    """ the basis rows for t = 1/steps .. 1 (t = 0 is the previous segment's end), with the
+        tangent columns scaled by tension. Made once per step count & tension, read-only """
+    table = _basisTables.get((steps, tension))
+    if table is None:
+        t = np.arange(1, steps + 1) / steps
+        t2 = t * t
+        t3 = t2 * t
+        table = np.stack([2*t3 - 3*t2 + 1,
+                          (t3 - 2*t2 + t) * tension,
+                          -2*t3 + 3*t2,
+                          (t3 - t2) * tension], axis=1)
+        table.setflags(write=False)
+        _basisTables[(steps, tension)] = table
+    return table
+
+
+def segmentGeometry(points, tangents):
+    """ (segments, 4, 2): [p0, out tangent of p0, p1, in tangent of p1] for each segment """
+    return np.stack([points[:-1], tangents[:-1, 1], points[1:], tangents[1:, 0]], axis=1)
+
+
+def segmentSteps(points, tangents, tension:float, tolerance:float, maxSteps:int):
+    """ the fewest lines (1 .. maxSteps) for each segment to stay within tolerance of the curve.
+        Wang's formula on the segment's Bezier control points; one line if the curve bends no further
+        than tolerance from the chord, and its control points don't reach past its ends """
+    geometry = segmentGeometry(points, tangents)
+    p0, p1 = geometry[:, 0], geometry[:, 2]
+    b1 = p0 + geometry[:, 1] * (tension / 3)
+    b2 = p1 - geometry[:, 3] * (tension / 3)
+    d1 = p0 - 2*b1 + b2
+    d2 = b1 - 2*b2 + p1
+    bend = np.maximum(np.hypot(d1[:, 0], d1[:, 1]), np.hypot(d2[:, 0], d2[:, 1]))
+
+    chord = p1 - p0
+    length2 = (chord * chord).sum(axis=1)
+    flat = length2 > 0
+    if flat.any():
+        chord, length2 = chord[flat], length2[flat]
+        normal = np.stack([-chord[:, 1], chord[:, 0]], axis=1) / np.sqrt(length2)[:, None]
+        along1 = ((b1[flat] - p0[flat]) * chord).sum(axis=1) / length2
+        along2 = ((b2[flat] - p0[flat]) * chord).sum(axis=1) / length2
+        inside = (along1 >= 0) & (along1 <= 1) & (along2 >= 0) & (along2 <= 1)
+        across = np.maximum(np.abs((d1[flat] * normal).sum(axis=1)), np.abs((d2[flat] * normal).sum(axis=1)))
+        bend[flat] = np.where(inside & (0.75 * across <= tolerance), 0.0, bend[flat])
+
+    return np.clip(np.ceil(np.sqrt(0.75 * bend / tolerance)), 1, maxSteps).astype(int)
+
+
+def tessellate(points, tangents, tension:float, steps):
+    """ the path points of the spline through points: a (1 + total steps, 2) array.
+        steps is the lines per segment, or a sequence of them (one per segment) """
+    geometry = segmentGeometry(points, tangents)
+    if np.ndim(steps) == 0:
+        curve = np.matmul(basisTable(steps, tension), geometry)
+        return np.concatenate([points[:1], curve.reshape(-1, 2)])
+    return np.concatenate([points[:1]] + [np.matmul(basisTable(n, tension), segment)
+                                          for n, segment in zip(steps, geometry)])
+
+
+def defaultTangents(xy, offsets, model:str, scale:float, tension:float, cardinal:float):
+    """ one tangent per point of a batch of splines, concatenated in the (n, 2) array xy: spline k is
+        points offsets[k] .. offsets[k+1] - 1 (at least 2). model etc. as splineGeometry.defaultTangents() """
+    n = len(xy)
+    first = np.zeros(n, dtype=bool)
+    first[offsets[:-1]] = True
+    last = np.zeros(n, dtype=bool)
+    last[offsets[1:] - 1] = True
+    index = np.arange(n)
+    before = np.where(first, index, index - 1)
+    after = np.where(last, index, index + 1)
+    chord = xy[after] - xy[before]
+
+    if model == "fixed":
+        length = np.hypot(chord[:, 0], chord[:, 1])
+        return chord * (scale / np.where(length > 0, length, 1))[:, None]
+    if model == "monotone":
+        return monotoneTangents(xy, first, last) / tension
+    tangents = chord / (after - before)[:, None] / tension
+    if model == "cardinal":
+        tangents *= 1 - cardinal
+    return tangents
+
+
+def monotoneTangents(xy, first, last):
+    """ Fritsch-Carlson tangents, for x and y separately (as splineGeometry._monotone()), of the splines
+        in xy: first & last mark each spline's ends """
+    secant = np.zeros_like(xy)
+    secant[:-1] = xy[1:] - xy[:-1]
+    #The secants after & before each point (not used across splines)
+    after, before = secant, np.roll(secant, 1, axis=0)
+    tangents = np.where((before * after > 0), (before + after) / 2, 0.0)
+    tangents = np.where(first[:, None], after, np.where(last[:, None], before, tangents))
+
+    #Each segment (from each point but the last) limits its end tangents to alpha^2 + beta^2 <= 9
+    segment = ~last[:, None] & (secant != 0)
+    d = np.where(segment, secant, 1)
+    s = (tangents / d)**2 + (np.roll(tangents, -1, axis=0) / d)**2
+    tau = np.where(segment & (s > 9), 3 / np.sqrt(np.maximum(s, 9)), 1.0)
+    return tangents * np.minimum(tau, np.where(first[:, None], 1.0, np.roll(tau, 1, axis=0)))
+
+
+def nearestOnPolyline(xy, x:float, y:float, within:float=float("inf")):
+    """ (line index, fraction along it, distance) of the closest point to (x, y) on the polyline through
+        the (n, 2) array xy. Only lines whose bounding box, grown by within, holds the point are measured:
+        if none is within that distance the distance is inf """
+    p0 = xy[:-1]
+    delta = xy[1:] - p0
+    lines = None
+    if within != float("inf"):
+        p1 = xy[1:]
+        lo = np.minimum(p0, p1) - within
+        hi = np.maximum(p0, p1) + within
+        lines = np.flatnonzero((lo[:, 0] <= x) & (x <= hi[:, 0]) & (lo[:, 1] <= y) & (y <= hi[:, 1]))
+        if lines.size == 0:
+            return 0, 0.0, float("inf")
+        p0, delta = p0[lines], delta[lines]
+
+    length2 = (delta * delta).sum(axis=1)
+    along = ((x - p0[:, 0]) * delta[:, 0] + (y - p0[:, 1]) * delta[:, 1]) / np.where(length2 > 0, length2, 1)
+    along = np.clip(along, 0, 1)
+    distance = np.hypot(p0[:, 0] + along * delta[:, 0] - x, p0[:, 1] + along * delta[:, 1] - y)
+    k = int(np.argmin(distance))
+    if distance[k] > within:
+        return 0, 0.0, float("inf")
+    return (int(lines[k]) if lines is not None else k), float(along[k]), float(distance[k])
+
+
+def nearestPoint(xy, x:float, y:float):
+    """ (index, distance) of the point in the (n, 2) array xy closest to (x, y) """
+    distance2 = (xy[:, 0] - x)**2 + (xy[:, 1] - y)**2
+    i = int(np.argmin(distance2))
+    return i, float(np.sqrt(distance2[i]))
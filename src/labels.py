@@ -0,0 +1,197 @@
+""" Light-weight text labels for nodes and edges.
+
+Label layouts (QStaticText) and sizes are cached by (font, text) and shared by every item
+showing the same text, least recently used dropped first. A LabelItem is a bare QGraphicsItem
+holding its text and colour, so a label costs a few bytes rather than a QTextDocument,
+and boundingRect() is a lookup rather than a QFontMetrics.
+A compact item (COMPACT_ITEMS) holds LabelParts instead, which it paints itself.
+"""
+
+from collections import OrderedDict
+
+from PySide6.QtCore import Qt, QPointF, QRectF, QSizeF
+from PySide6.QtGui import QColor, QFont, QStaticText, QTransform
+from PySide6.QtWidgets import QGraphicsItem
+
+from PolyLineItemHG import levelOfDetail, isTileCached
+from leakTracker import trackItem
+
+from  HGConstants import *
+
+#(font key, text) -> (QStaticText, QSizeF), least recently used first
+_layouts = OrderedDict()
+#The default label font, made on first use (needs the QApplication)
+_font = None
+
+
+def labelFont() -> QFont:
+    """ the font labels use unless given one """
+    global _font
+    if _font is None:
+        _font = QFont()
+    return _font
+
+
+def labelLayout(text:str, font:QFont=None):
+    """ (QStaticText, QSizeF) for text. Lines split on \\n """
+    if font is None:
+        font = labelFont()
+    key = (font.key(), text)
+    layout = _layouts.get(key)
+    if layout is not None:
+        _layouts.move_to_end(key)
+        return layout
+
+    #QStaticText breaks lines on the Unicode line separator, not \n
+    staticText = QStaticText(text.replace("\n", "\u2028"))
+    staticText.setTextFormat(Qt.PlainText)
+    staticText.prepare(QTransform(), font)
+    layout = (staticText, staticText.size())
+    _layouts[key] = layout
+    if len(_layouts) > LABEL_CACHE_MAX:
+        _layouts.popitem(last=False)
+    return layout
+
+
+def labelSize(text:str, font:QFont=None) -> QSizeF:
+    """ the size text takes up, drawn as a label """
+    return labelLayout(text, font)[1]
+
+
+class LabelItem(QGraphicsItem):
+    """ Plain (multi-line) text, drawn from the shared layout cache. Has the QGraphicsTextItem calls the
+        items use (setPlainText, toPlainText, setDefaultTextColor). Mouse presses go to the parent,
+        so parent.shape() decides what selects it """
+
+    def __init__(self, text:str="", parent=None):
+        if not parent:
+            print(f"Error creating LabelItem - no parent set")
+        super().__init__(parent)
+        trackItem(self)
+        self._text = text
+        self._colour = QColor(Qt.black)
+        self._size = labelSize(text)
+
+    def setPlainText(self, text:str):
+        if text == self._text:
+            return
+        self.prepareGeometryChange()
+        self._text = text
+        self._size = labelSize(text)
+
+    def toPlainText(self) -> str:
+        return self._text
+
+    def defaultTextColor(self) -> QColor:
+        return self._colour
+
+    def setDefaultTextColor(self, colour):
+        self._colour = QColor(colour)
+        self.update()
+
+    def boundingRect(self) -> QRectF:
+        if not self._text:
+            return QRectF()
+        #Same margin as a QGraphicsTextItem, so labels sit where they always did
+        return QRectF(0, 0, self._size.width() + 2*LABEL_MARGIN, self._size.height() + 2*LABEL_MARGIN)
+
+    def paint(self, painter, option, widget=None):
+        #Text too small to read isn't worth drawing
+        if not self._text or isTileCached(self) or levelOfDetail(painter, option, widget) < LOD_LABELS:
+            return
+        painter.setPen(self._colour)
+        painter.setFont(labelFont())
+        painter.drawStaticText(QPointF(LABEL_MARGIN, LABEL_MARGIN), labelLayout(self._text)[0])
+
+    def mousePressEvent(self, event):
+        # Forward to parent
+        if self.parentItem():
+            self.parentItem().mousePressEvent(event)
+        else:
+            super().mousePressEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        if self.parentItem():
+            self.parentItem().mouseReleaseEvent(event)
+        else:
+            super().mouseReleaseEvent(event)
+
+    def mouseDoubleClickEvent(self, event):
+        if self.parentItem():
+            self.parentItem().mouseDoubleClickEvent(event)
+        else:
+            super().mouseDoubleClickEvent(event)
+
+
+class LabelPart:
+    """ A label painted by its item's own paint(), rather than being a child item (compact items, COMPACT_ITEMS).
+        Has the LabelItem calls the items use, so an item can hold either. Positions are in the item's coords """
+
+    def __init__(self, text:str="", parent=None):
+        self.owner = parent
+        self._text = text
+        self._colour = QColor(Qt.black)
+        self._size = labelSize(text)
+        self._pos = QPointF(0, 0)
+        self._visible = True
+
+    def setPlainText(self, text:str):
+        if text == self._text:
+            return
+        self.owner.prepareGeometryChange()
+        self._text = text
+        self._size = labelSize(text)
+
+    def toPlainText(self) -> str:
+        return self._text
+
+    def defaultTextColor(self) -> QColor:
+        return self._colour
+
+    def setDefaultTextColor(self, colour):
+        self._colour = QColor(colour)
+        self.owner.update()
+
+    def setPos(self, x, y=None):
+        pos = QPointF(x, y) if y is not None else QPointF(x)
+        if pos != self._pos:
+            self.owner.prepareGeometryChange()
+            self._pos = pos
+
+    def pos(self) -> QPointF:
+        return QPointF(self._pos)
+
+    def setVisible(self, visible:bool):
+        if visible != self._visible:
+            self.owner.prepareGeometryChange()
+            self._visible = visible
+
+    def isVisible(self) -> bool:
+        return self._visible
+
+    def setFlag(self, flag, enabled=True):
+        """ item flags mean nothing for a part """
+        pass
+
+    def boundingRect(self) -> QRectF:
+        """ in label coords, as LabelItem.boundingRect() """
+        if not self._text:
+            return QRectF()
+        return QRectF(0, 0, self._size.width() + 2*LABEL_MARGIN, self._size.height() + 2*LABEL_MARGIN)
+
+    def ownerRect(self) -> QRectF:
+        """ the area drawn, in the item's coords """
+        if not self._visible:
+            return QRectF()
+        return self.boundingRect().translated(self._pos)
+
+    def sceneBoundingRect(self) -> QRectF:
+        return self.owner.mapRectToScene(self.ownerRect())
+
+    def paintPart(self, painter, option, widget=None):
+        """ draw the label. Called from the item's paint() """
+        if not (self._visible and self._text) or levelOfDetail(painter, option, widget) < LOD_LABELS:
+            return
+        painter.setPen(self._colour)
+        painter.setFont(labelFont())
+        painter.drawStaticText(self._pos + QPointF(LABEL_MARGIN, LABEL_MARGIN), labelLayout(self._text)[0])
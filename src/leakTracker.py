@@ -0,0 +1,46 @@
+""" Debug aid: count the live QGraphicsItem wrappers per type, to catch items that outlive their deletion.
+
+Items register themselves with trackItem() when they are built, and are counted off when
+their Python wrapper is freed. reportLeaks() prints the counts, and the change since the
+last report, so memory creeping up across edits shows as a steady + on some type.
+Only active when DEBUG_LEAKS is set in HGConstants.
+"""
+
+import weakref
+from collections import Counter
+
+from  HGConstants import *
+
+#type name -> live wrappers
+_live = Counter()
+#counts at the last reportLeaks()
+_lastReport = Counter()
+
+
+def _released(typeName:str):
+    _live[typeName] -= 1
+
+
+def trackItem(item):
+    """ count item until its wrapper is freed """
+    if not DEBUG_LEAKS:
+        return
+    typeName = type(item).__name__
+    _live[typeName] += 1
+    weakref.finalize(item, _released, typeName)
+
+
+def liveItemCounts() -> dict:
+    """ type name -> number of live, tracked items """
+    return {typeName: count for typeName, count in _live.items() if count}
+
+
+def reportLeaks(operation:str):
+    """ print the live counts after operation, with the change since the last report """
+    global _lastReport
+    if not DEBUG_LEAKS:
+        return
+    parts = [f"{typeName}={count}({count - _lastReport[typeName]:+d})"
+                for typeName, count in sorted(_live.items()) if count or _lastReport[typeName]]
+    print(f"[leaks] after {operation}: " + (", ".join(parts) if parts else "none"))
+    _lastReport = Counter(_live)
@@ -31,7 +31,7 @@ from PySide6.QtWidgets import ( QApplication, QWidget, QMainWindow, QDialog,
             QGraphicsScene, QGraphicsView, QListWidget, QListWidgetItem,
             QGraphicsEllipseItem, QGraphicsItem, QGraphicsRectItem, QGraphicsTextItem, QGraphicsLineItem,
             QLineEdit, QInputDialog, QMenu, QFileDialog, QStyleOptionGraphicsItem, QGraphicsObject,
-            QSlider, QLabel, QStatusBar,
+            QSlider, QLabel, QStatusBar, QDockWidget,
             QVBoxLayout, QHBoxLayout, QTextEdit, QPushButton)
 
 from PySide6 import (QtCore, QtWidgets, QtGui )
@@ -54,7 +54,24 @@ from coreGraph import Graph
 
 #Helper & housekeeping functions
 #Draw nice edges
-from PolyLineItemHG import StraightLineItem, HermiteSplineItem, HandleItem
+from PolyLineItemHG import StraightLineItem, HermiteSplineItem, HandleItem, levelOfDetail, isTileCached, bezierToHermite, xyList
+#Default tangents for a batch of loaded splines
+import splineGeometry
+
+#Static layer for unchanged items
+from tileCache import TileCache
+#Idle nodes & edges of big graphs, drawn in batches
+from aggregateLayer import NodeLayer, EdgeLayer
+
+#Node & edge text
+from labels import LabelItem, LabelPart, labelFont, labelLayout, labelSize
+
+#More views onto the same scene
+from graphView import GraphView, OverviewView
+#Debug count of live items
+from leakTracker import trackItem, reportLeaks
+#Scene <-> list selection
+from selectionSync import SelectionSync
 
 #cGPT edit code
 from EditVisItemDialog import EditVisEdgeItemDialog, EditVisNodeItemDialog
@@ -211,6 +228,7 @@ class VisNodeItem(QGraphicsObject):
                     metadata={}, metadataAttributes={}):
         #print(f"In VisNodeItem {posn =}")
         super().__init__(parent)
+        trackItem(self)
         self.suppressItemChange = True  # suppress itemChange (was protected, but scene needs to set it)
         
         self.model = model
@@ -241,7 +259,9 @@ class VisNodeItem(QGraphicsObject):
         lWitem = QListWidgetItem(self.model.Gr.nodeD[self.nodeNum].metadata['name'])
         lWitem.setData(KEY_INDEX,self.nodeNum)
         lWitem.setData(KEY_ROLE,ROLE_NODE)
-        self.listWidget.addItem(lWitem)
+        #No list when headless
+        if self.listWidget is not None:
+            self.listWidget.addItem(lWitem)
 
         # Create a text item to hold & show the ID number
         # Not needed with KEY_INDEX role
@@ -251,10 +271,22 @@ class VisNodeItem(QGraphicsObject):
         #self.textItem.setFlag(QGraphicsItem.ItemIsSelectable, False)
         #self.textItem.setFlag(QGraphicsItem.ItemIsFocusable, False)
 
+        #One item, painting its own labels (see COMPACT_ITEMS), or an item with label children
+        self.compact = COMPACT_ITEMS
+        #boundingRect(), cached until prepareGeometryChange()
+        self._bounds = None
+        #The scene's NodeLayer while parked there (out of the scene, drawn by the layer)
+        self.parkedIn = None
+        #The node itself (the name & metadata sit around it)
+        self.nodeRect = QRectF(-NODESIZE/2,-NODESIZE/2,NODESIZE,NODESIZE)
+
         self.dispText = self.model.Gr.nodeD[int(self.nodeNum)].metadata['name']
 
         #a place to display metadata
-        self.metaDisplay = TransparentTextItem("xx", parent=self)
+        if self.compact:
+            self.metaDisplay = LabelPart("xx", parent=self)
+        else:
+            self.metaDisplay = LabelItem("xx", parent=self)
         self.metaDisplay.setPos(QPointF(NODESIZE/2,-NODESIZE*2))  #NODESIZE/2,0))
         self.metaDisplay.setFlag(QGraphicsItem.ItemIsSelectable, False)
         self.metaDisplay.setFlag(QGraphicsItem.ItemIsFocusable, False)
@@ -265,17 +297,6 @@ class VisNodeItem(QGraphicsObject):
         self.setData(KEY_INDEX, self.nodeNum)
         self.setData(KEY_ROLE, ROLE_NODE)
         
-        #The shape of the node- rectangle
-        #1st 2 parms are origin, 2nd 2 are width & height
-        #Rect shape
-        #self.nodeShape = QGraphicsRectItem(-NODESIZE/2,-NODESIZE/2,NODESIZE,NODESIZE,self)
-        #Circle Shape
-        self.nodeShape = QGraphicsEllipseItem(-NODESIZE/2,-NODESIZE/2,NODESIZE,NODESIZE,self)
-        self.nodeShape.my_parent_item = self #coPilot's suggestion to stop GC issues. Force a strong reference
-        self.nodeShape.setPen(QPen(Qt.NoPen))
-        #TODO: Set selectable False - see if that processes clicks better?
-        self.nodeShape.setFlag(QGraphicsItem.ItemIsSelectable, False)
-
         #Make nodes appear in front of edges for painting & selection
         self.setZValue(1000)
         self.setFlag(QGraphicsItem.ItemIsSelectable, True)
@@ -284,12 +305,14 @@ class VisNodeItem(QGraphicsObject):
 
         #self.setAcceptHoverEvents(True)
         self.hovered = False
+        #Drawn by the scene's tile cache, rather than paint()
+        self.inTileCache = False
 
         self.suppressItemChange = False  # enable itemChange normally
 
     def __repr__(self):
         return f"\n** VisNodeItem {super().__repr__()}\nIndex:{self.data(KEY_INDEX) }  Role:{self.data(KEY_ROLE) =} @ {self.pos() =}\n\
-                {self.startsEdges = },\n{self.endsEdges = }\n**" #\n {self.nodeShape =})"
+                {self.startsEdges = },\n{self.endsEdges = }\n**"
     __str__ = __repr__
 
     def toXML(self,Xparent):
@@ -325,6 +348,26 @@ class VisNodeItem(QGraphicsObject):
                 if self.metadataAttributes[k]['display']:
                     metaStr += "\n"+k +":"+v
         self.metaDisplay.setPlainText(metaStr)
+        notifySceneChanged(self)
+
+    @property
+    def dispText(self) -> str:
+        """ the name shown on the node """
+        return self._dispText
+
+    @dispText.setter
+    def dispText(self, text:str):
+        if text == getattr(self, '_dispText', None):
+            return
+        self.prepareGeometryChange()
+        self._dispText = text
+        size = labelSize(text)
+        self._nameRect = QRectF(-size.width()/2, -NODESIZE - size.height()/2, size.width(), size.height())
+
+    def prepareGeometryChange(self):
+        """ the cached bounds go stale too """
+        self._bounds = None
+        super().prepareGeometryChange()
 
     def boundingRect(self):
 
@@ -332,17 +375,15 @@ class VisNodeItem(QGraphicsObject):
         #Hardcoding on top for now
         #self.dispText = self.model.Gr.nodeD[int(self.nodeNum)].metadata['name']
         #self.dispText += f"\n{int(self.pos().x())},{int(self.pos().y())}"
-        tFont = QFont()
-        metrics = QFontMetrics(tFont)
-        textRect = metrics.boundingRect(self.dispText)
-        #centre it
-        textRect.adjust(-textRect.width()/2,-textRect.height()/2,-textRect.width()/2,-textRect.height()/2)
-
-        nodeRect = QRectF(-NODESIZE/2,-NODESIZE/2,NODESIZE,NODESIZE)
+        #Name, centred above the node (as paint() draws it). The size comes from the label cache
+        if self._bounds is None:
+            textRect = self._nameRect
+            if self.compact:
+                textRect = textRect.united(self.metaDisplay.ownerRect())
 
-        penWidth = 2
-        bRect = nodeRect.united(textRect).adjusted(-penWidth,-penWidth,penWidth,penWidth)
-        return bRect
+            penWidth = 2
+            self._bounds = self.nodeRect.united(textRect).adjusted(-penWidth,-penWidth,penWidth,penWidth)
+        return self._bounds
 
         #TODO: This allows the attribs to be selected, but makes for an overly big bounding rect. 
         # shape() might be a better solution.
@@ -358,7 +399,19 @@ class VisNodeItem(QGraphicsObject):
         #painter.drawLine(-10,10,10,-10)
         #painter.drawRect(self.boundingRect())
         
+        if self.inTileCache:
+            return
         painter.setClipping(True)
+        lod = levelOfDetail(painter, option, widget)
+
+        #Zoomed right out, a node is a dot: draw it as a single (node sized) point
+        if lod < LOD_NODE_POINT:
+            if self.isSelected():
+                painter.setPen(QPen(Qt.blue,NODESIZE))
+            else:
+                painter.setPen(QPen(Qt.black,NODESIZE))
+            painter.drawPoint(QPointF(0,0))
+            return
 
         if self.isSelected():
             painter.setPen(QPen(Qt.blue,1,Qt.DashLine))
@@ -373,16 +426,16 @@ class VisNodeItem(QGraphicsObject):
         painter.setBrush(brush)
 
         #TODO: Use the shape used in the constructor - will need a flag
-        #painter.drawRect(self.nodeShape.rect())
-        painter.drawEllipse(self.nodeShape.rect())
+        #painter.drawRect(self.nodeRect)
+        painter.drawEllipse(self.nodeRect)
 
-        #Draw the text if set to display
-        if self.metadataAttributes['name']['display']:
+        #Draw the text if set to display (and big enough to read)
+        if self.metadataAttributes['name']['display'] and lod >= LOD_LABELS:
             # Pos on top (this can be generalised to left, bottom, right, etc)
-            r = QRectF(0,-NODESIZE,0,0) 
-            #update height & width
-            r = painter.drawText(r,Qt.AlignCenter,self.dispText)
-            painter.drawText(r, Qt.AlignCenter, self.dispText)
+            painter.setFont(labelFont())
+            painter.drawStaticText(self._nameRect.topLeft(), labelLayout(self._dispText)[0])
+        if self.compact:
+            self.metaDisplay.paintPart(painter, option, widget)
 
         #Draw displayed metadata - automagic?
 
@@ -390,6 +443,13 @@ class VisNodeItem(QGraphicsObject):
         self.requestEdit.emit(self)
         mouseEvent.accept()
 
+    def detach(self):
+        """ Break the references to and from this node before it leaves the scene,
+            so it is freed when the scene lets go, rather than whenever the GC runs """
+        self.suppressItemChange = True
+        self.startsEdges.clear()
+        self.endsEdges.clear()
+
     def itemChange(self,change,value):
         """ in particular, deal with VisNode moving --> update VisEdges"""
         if not self.suppressItemChange:
@@ -399,10 +459,19 @@ class VisNodeItem(QGraphicsObject):
             
             #Position change
             if change == QGraphicsItem.ItemPositionHasChanged:
-                for sEdge in self.startsEdges:
-                    sEdge.updateLine(self)
-                for eEdge in self.endsEdges:
-                    eEdge.updateLine(self)
+                scene = self.scene()
+                if scene is not None and scene.mouseMode == scene.DRAGGING:
+                    #Many items moving: the scene recomputes each edge once per frame
+                    scene.queueEdgeUpdates(self.startsEdges)
+                    scene.queueEdgeUpdates(self.endsEdges)
+                else:
+                    for sEdge in self.startsEdges:
+                        sEdge.updateLine(self)
+                    for eEdge in self.endsEdges:
+                        eEdge.updateLine(self)
+
+            if change in SCENE_NOTIFY_CHANGES:
+                notifySceneChanged(self)
 
         #note the **return**
         return super().itemChange(change,value)
@@ -426,45 +495,34 @@ class VisNodeItem(QGraphicsObject):
             if not (modifiers & Qt.ShiftModifier or modifiers & Qt.ControlModifier) \
                 and not self.isSelected():
                 self.scene().clearSelection()
+            #The list item is highlighted by the SelectionSync
             self.setSelected(True)
-            #Highlight the list item as well
-            lWItem = self.listWidget.findItemByIdx(self.data(KEY_INDEX))
-            self.listWidget.setCurrentItem(lWItem)
 
         super().mousePressEvent(mouseEvent)
 
-#Various support classes for edges.
-
-class TransparentTextItem(QGraphicsTextItem):
-    """ allows parent.shape() to select the text, rather than the textItem always grabbing the event  """
-    def __init__(self, text:str, parent=None):
-        if not parent:
-            print(f"Error creating TransparentTextItem - no parent set")
-        super().__init__(text,parent)
-        # If you don’t need focus handling, remove focusable flag
-        #self.setFlag(QGraphicsTextItem.ItemIsFocusable, False)
-
-    def paint(self, painter, option, widget=None):
-        super().paint(painter,option,widget)
+#Item changes the scene needs to hear about (see grScene.notifyItemChanged)
+SCENE_NOTIFY_CHANGES = (QGraphicsItem.ItemPositionHasChanged, QGraphicsItem.ItemSelectedHasChanged,
+                        QGraphicsItem.ItemSceneHasChanged, QGraphicsItem.ItemToolTipChange)
 
-    def mousePressEvent(self, event):
-        # Forward to parent
-        if self.parentItem():
-            self.parentItem().mousePressEvent(event)
-        else:
-            super().mousePressEvent(event)
+def notifySceneChanged(item):
+    """ tell item's scene (if any) that the item has changed, to update its caches """
+    scene = item.scene()
+    if scene is not None:
+        scene.notifyItemChanged(item)
+    elif item.parkedIn is not None:
+        #Out of the scene, drawn by an aggregate layer
+        item.parkedIn.parkedChanged(item)
 
-    def mouseReleaseEvent(self, event):
-        if self.parentItem():
-            self.parentItem().mouseReleaseEvent(event)
-        else:
-            super().mouseReleaseEvent(event)
+#Various support classes for edges.
 
-    def mouseDoubleClickEvent(self, event):
-        if self.parentItem():
-            self.parentItem().mouseDoubleClickEvent(event)
-        else:
-            super().mouseDoubleClickEvent(event)
+def arrowPolygon(size) -> QPolygonF:
+    """ An arrowhead pointing right (+X), its tip at the origin. The edge puts the tip on its line, short of the node """
+    polygon = QPolygonF([
+        QPointF(0, 0),
+        QPointF(-size, size / 2),
+        QPointF(-size, -size / 2)
+    ])
+    return polygon
 
 class ArrowHeadItem(QGraphicsItem):
     """An arrowhead. 
@@ -473,15 +531,9 @@ class ArrowHeadItem(QGraphicsItem):
 
     def __init__(self, size=NODESIZE, parent=None):
         super().__init__(parent)
+        trackItem(self)
         self.size = size
-        # Define arrowhead polygon pointing right (+X)
-        self.polygon = QPolygonF([
-            QPointF(0, 0),
-            QPointF(-size, size / 2),
-            QPointF(-size, -size / 2)
-        ])
-        #Transform by -NODESIZE/2 to not disappear under the node
-        self.polygon.translate(QPointF(-NODESIZE/2,0))
+        self.polygon = arrowPolygon(size)
         self.setFlag(QGraphicsItem.ItemIsSelectable, False)
         self.setFlag(QGraphicsItem.ItemIsMovable, False)
         self.setZValue(0)
@@ -490,9 +542,17 @@ class ArrowHeadItem(QGraphicsItem):
         # Rectangle covering the polygon
         return QRectF(-self.size, -self.size/2, self.size, self.size)
 
+    def scenePolygon(self) -> QPolygonF:
+        """ the arrowhead in scene coords (for batched drawing, see aggregateLayer.py) """
+        return self.mapToScene(self.polygon)
+
     def paint(self, painter, option, widget):
         #print("Arrow Paint")
 
+        #Sub-pixel arrowheads are just noise
+        if isTileCached(self) or levelOfDetail(painter, option, widget) < LOD_ARROWS:
+            return
+
         #WHy is this needed? parent sel should propagate?
         #This code runs, but has no effect? What is overriding it?
         painter.save()
@@ -514,6 +574,57 @@ class ArrowHeadItem(QGraphicsItem):
         painter.drawPolygon(self.polygon)
         painter.restore()
 
+class ArrowHeadPart:
+    """ An arrowhead painted by its (compact, see COMPACT_ITEMS) edge's paint(), rather than being a child item.
+        Has the ArrowHeadItem calls the edge uses """
+
+    def __init__(self, size=NODESIZE, parent=None):
+        self.owner = parent
+        self.size = size
+        self.polygon = arrowPolygon(size)
+        self._pos = QPointF(0,0)
+        self._rotation = 0.0
+        #item coords -> edge coords
+        self._transform = QTransform()
+
+    def prepareGeometryChange(self):
+        self.owner.prepareGeometryChange()
+
+    def setRotation(self, angle:float):
+        self._rotation = angle
+        self._place()
+
+    def setPos(self, pos:QPointF):
+        self._pos = QPointF(pos)
+        self._place()
+
+    def _place(self):
+        self._transform = QTransform().translate(self._pos.x(), self._pos.y()).rotate(self._rotation)
+
+    def ownerRect(self) -> QRectF:
+        """ the area drawn, in the edge's coords """
+        return self._transform.mapRect(self.polygon.boundingRect())
+
+    def scenePolygon(self) -> QPolygonF:
+        """ the arrowhead in scene coords, as ArrowHeadItem.scenePolygon() """
+        return self.owner.mapToScene(self._transform.map(self.polygon))
+
+    def paintPart(self, painter, option, widget=None):
+        """ draw the arrowhead. Called from the edge's paint() """
+        #Sub-pixel arrowheads are just noise
+        if levelOfDetail(painter, option, widget) < LOD_ARROWS:
+            return
+        painter.save()
+        if self.owner.isSelected():
+            painter.setBrush(QBrush(Qt.blue))
+            painter.setPen(QPen(Qt.blue,1,Qt.DashLine))
+        else:
+            painter.setBrush(QBrush(Qt.black))
+            painter.setPen(QPen(Qt.black))
+        painter.setTransform(self._transform, True)
+        painter.drawPolygon(self.polygon)
+        painter.restore()
+
 class dummyNodeItem(HandleItem):
     """ a graphics-only node to manage joins for hyperedges """
     def __init__(self,center: QPointF, hSize=HITSIZE, color=Qt.red, parent=None):
@@ -533,11 +644,14 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
     requestEdit = Signal(object)  
 
     def __init__(self,model,listWidget,sItem, eItem, directed='', parent=None, nameP="", id=None,
-                    polyLineType = DEFAULT_EDGE, points=[],tangents=[],metadata={}, metadataAttributes={}):
+                    polyLineType = DEFAULT_EDGE, points=[],tangents=[],metadata={}, metadataAttributes={},
+                    tangentModel=DEFAULT_TANGENTS):
         """ Create a visual edge, using the pos of the st and end 
         points must be QPointFs and tangents must be tuples of QPointFs, relative to the points
+        tangentModel (TANGENTS_) works out a spline's tangents if none are given
         """
         super().__init__(parent)
+        trackItem(self)
 
         self.suppressItemChange = True  # suppress itemChange until all attribs set.
 
@@ -590,7 +704,9 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
         lWitem = QListWidgetItem(self.metadata['name'])
         lWitem.setData(KEY_INDEX,self.edgeNum)
         lWitem.setData(KEY_ROLE,ROLE_EDGE)
-        self.listWidget.addItem(lWitem)
+        #No list when headless
+        if self.listWidget is not None:
+            self.listWidget.addItem(lWitem)
 
         # Create a text item to hold & show the ID number
         #self.textItem = QGraphicsTextItem(f"{self.edgeNum}", self)
@@ -602,22 +718,37 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
         self.setData(KEY_INDEX, self.edgeNum)
         self.setData(KEY_ROLE, ROLE_EDGE)
 
+        #One item, painting its own line, labels & arrow (see COMPACT_ITEMS), or an item with children for those
+        self.compact = COMPACT_ITEMS
+        #boundingRect() of a compact edge, cached until prepareGeometryChange()
+        self._bounds = None
+        #shape() as (line shape, label rect, shape), remade when either of the first two changes
+        self._shape = None
+        #The scene's EdgeLayer while parked there (out of the scene, drawn by the layer)
+        self.parkedIn = None
+
         #Draw name in the middle
         #self.textItem = QGraphicsTextItem(self.model.Gr.edgeD[self.edgeNum].metadata['name'], parent=self)
-        # chatGPT's suggestion to avoid shape() not selecting it - TransparentTextItem
-        self.textItem = TransparentTextItem(self.metadata['name'], parent=self) 
+        # A LabelItem passes clicks to the edge, so shape() decides what selects it
+        if self.compact:
+            self.textItem = LabelPart(self.metadata['name'], parent=self)
+        else:
+            self.textItem = LabelItem(self.metadata['name'], parent=self) 
         #Stop Python GC from mangling things on delete. This ref is critical?? - Python crashes on delete without it.?
         self.textItem.my_parent_item = self
 
         self.textItem.setFlag(QGraphicsItem.ItemIsSelectable, False)
         self.textItem.setFlag(QGraphicsItem.ItemIsFocusable, False)
 
-        #a place to display metadata
-        self.metaDisplay = TransparentTextItem("", parent=self)
+        #a place to display metadata (populated once the line exists, to place it)
+        if self.compact:
+            self.metaDisplay = LabelPart("", parent=self)
+        else:
+            self.metaDisplay = LabelItem("", parent=self)
         self.metaDisplay.setFlag(QGraphicsItem.ItemIsSelectable, False)
         self.metaDisplay.setFlag(QGraphicsItem.ItemIsFocusable, False)
-        #populate it
-        self.setMetadataDisplay()
+        #Label anchor - the middle of the line, cached by placeLabels()
+        self.midPoint = QPointF(0,0)
 
         #Create the graphical line
         #PointList to pass to polyLine
@@ -627,18 +758,10 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
             ptList = [self.startNode.pos(),self.endNode.pos()]
         #Track what sort of edge this one is
         self._polyEdge = polyLineType
+        self.tangentModel = tangentModel
         
-        if self._polyEdge == STRAIGHT:
-            self.edgeLine = StraightLineItem(ptList,parent=self)
-        else: #Assume spline! Error checking later!
-            self.edgeLine = HermiteSplineItem(p=ptList,t=tangents,parent=self)
-
-        #Stop Python GC from mangling things on delete (It seems this ref is not critical)
-        self.edgeLine.setData(KEY_ROLE,ROLE_POLYLINE)
-        self.edgeLine.my_parent_item = self
-
+        self._makeLine(ptList, tangents)
         #self.edgeLine.setPen(noPen)
-        self.edgeLine.setFlag(QGraphicsItem.ItemIsSelectable, False)
         
         #Add in the arrowhead for digraph
         #TODO: Should this not only be in paint(), to update dynamically? updateLine() might be the place?
@@ -648,7 +771,7 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
             self.isDirected = directed == 'true'
 
         if self.isDirected:
-            self.endShape = ArrowHeadItem(size=NODESIZE/2, parent=self)
+            self._makeArrow()
         else:
             self.endShape = None
 
@@ -660,6 +783,8 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
         self.setStart(sItem)
         eItem.endsEdges.append(self)
         self.setEnd(eItem)
+        #populate the metadata text
+        self.setMetadataDisplay()
 
         #Selection and editing vars:
         #edit Handles
@@ -677,6 +802,8 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
         
         #is this the only edge selected (used for rerouting)
         self.isOnlySelected = False
+        #Drawn by the scene's tile cache, rather than paint()
+        self.inTileCache = False
         #disable the guard
         self.suppressItemChange = False  # enable itemChange normally
 
@@ -703,31 +830,22 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
         if self._polyEdge == STRAIGHT:
             pl = ET.SubElement(data, "y:PolyLineEdge")
         else:
-            pl = ET.SubElement(data, "y:QuadCurveEdge")
+            #Splines are saved as their exact Bezier control points, which yEd draws as they are shown here
+            pl = ET.SubElement(data, "y:BezierEdge")
+            pl.set("h:tangentModel", self.tangentModel)
 
         if self.isDirected: 
             ET.SubElement(pl, "y:Arrows", {'source':"none", 'target':"standard"})  
 
-        #Add in the points   
-        points = self.edgeLine._p
+        #Add in the points (the ends are the nodes)
+        if self._polyEdge == SPLINE:
+            points = self.edgeLine.bezierPoints()
+        else:
+            points = self.edgeLine._p
         if len(points) > 0:
             path = ET.SubElement(pl,"y:Path ") #No ports yet
-            pathElts = []
             for p in points[1:-1]:
-                pathElts.append(ET.SubElement(path, "y:Point", {"x":str(p.x()),"y":str(p.y())}))
-            #Tangents 
-            if self._polyEdge == SPLINE:
-                tangents = self.edgeLine._t
-
-                if len(tangents) > 0:
-                    ET.SubElement(path,"h:StartTangent", {"x":str(tangents[0][1].x()),
-                                                          "y":str(tangents[0][1].y())})
-                    for i,pElt in enumerate(pathElts):
-                        ET.SubElement(pElt,"h:Tangent",
-                                            {"leftx":str(tangents[i+1][0].x()), "lefty":str(tangents[i+1][0].y()), 
-                                             "rightx":str(tangents[i+1][1].x()),"righty":str(tangents[i+1][1].y())})
-
-                    ET.SubElement(path,"h:EndTangent", {"x":str(tangents[-1][0].x()),"y":str(tangents[-1][0].y())})
+                ET.SubElement(path, "y:Point", {"x":str(p.x()),"y":str(p.y())})
 
 
         #TODO: Refactor edge save/ load code to not use edgeLabel as `name` - do it all in metadata
@@ -754,38 +872,71 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
                 if self.metadataAttributes[k]['display']:
                     metaStr += "\n"+k +":"+v
         self.metaDisplay.setPlainText(metaStr)
+        self.placeLabels()
+        notifySceneChanged(self)
+
+    def placeLabels(self):
+        """ Position the name and metadata text at the middle of the line.
+            Done when the geometry or text changes, so paint() has no side effects """
+        #use the textBRect to adjust exact display position on the line (can be a [0,1] multiplier)
+        textBRect = self.textItem.boundingRect()
+        self.midPoint = self.edgeLine.textPos(0.5)
+        self.textItem.setPos(self.midPoint.x() - textBRect.width()/2  + NODESIZE/2, \
+                             self.midPoint.y() - textBRect.height()/2 + NODESIZE/2)
+        self.metaDisplay.setPos(self.textItem.pos())
+        self.textItem.setVisible(self.metadataAttributes['name']['display'])
+
+    def _setLabelColour(self):
+        """ text is blue when selected, like the line. Called on selection change """
+        if self.isSelected():
+            colour = Qt.blue
+        else:
+            colour = Qt.black
+        self.textItem.setDefaultTextColor(colour)
+        self.metaDisplay.setDefaultTextColor(colour)
+
+    def prepareGeometryChange(self):
+        """ the cached bounds go stale too """
+        self._bounds = None
+        super().prepareGeometryChange()
 
     def boundingRect(self):
         """ edges boundingRect """
         adjust = 2 # self.pen.width() / 2
-        return self.childrenBoundingRect().adjusted(-adjust, -adjust, adjust, adjust)
+        if not self.compact:
+            return self.childrenBoundingRect().adjusted(-adjust, -adjust, adjust, adjust)
+
+        #Compact: the parts it paints, and any handles (its only children)
+        if self._bounds is None:
+            rect = self.edgeLine.boundingRect().united(self.textItem.ownerRect()).united(self.metaDisplay.ownerRect())
+            if self.endShape:
+                rect = rect.united(self.endShape.ownerRect())
+            self._bounds = rect.adjusted(-adjust, -adjust, adjust, adjust)
+        if self.edgeLine._pHandles:
+            return self._bounds.united(self.childrenBoundingRect())
+        return self._bounds
 
     def paint(self, painter, option, widget=None):
         #print(f" Paint {self.edgeNum =}")
+        if self.inTileCache:
+            return
         #painter.setPen(Qt.red)
         #painter.drawRect(self.bRect)
-        #use the textBRect to adjust exact display position on the line (can be a [0,1] multiplier)
-        textBRect = self.textItem.boundingRect()
-        midPt = self.edgeLine.textPos(0.5)
-        #painter.drawEllipse(midPt,2,2)
-        self.textItem.setPos(midPt.x() - textBRect.width()/2  + NODESIZE/2, \
-                             midPt.y() - textBRect.height()/2 + NODESIZE/2)
-        self.metaDisplay.setPos(self.textItem.pos()+QPointF(0,0))
-        #painter.drawRect(self.textItem.boundingRect())
+        #NOTE: No side effects here - the labels are placed/ coloured by placeLabels() & _setLabelColour()
+        #painter.drawEllipse(self.midPoint,2,2)
        
         if self.isSelected():
             painter.setPen(QPen(Qt.blue,1,Qt.DashLine))
-            self.textItem.setDefaultTextColor(Qt.blue)   
-            self.metaDisplay.setDefaultTextColor(Qt.blue)
         else:
             painter.setPen(Qt.black)
-            self.textItem.setDefaultTextColor(Qt.black)
-            self.metaDisplay.setDefaultTextColor(Qt.black)
 
-        #TODO: Move this to itemChanged?
-        self.textItem.setVisible(self.metadataAttributes['name']['display'])
-
-        self.edgeLine.paint(painter,option,widget)
+        #A child line paints itself
+        if self.compact:
+            self.edgeLine.paint(painter,option,widget)
+            self.textItem.paintPart(painter,option,widget)
+            self.metaDisplay.paintPart(painter,option,widget)
+            if self.endShape:
+                self.endShape.paintPart(painter,option,widget)
 
         #painter.drawText(QPoint(0,0),self.textItem.toPlainText())
         #painter.drawText(tPos,self.dispText) #textItem.toPlainText())
@@ -794,15 +945,18 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
         #painter.drawPath(self.shape())
 
     def shape(self):
-        """ Set a tight selection shape """
-        path = self.edgeLine.shape()
-
-        #Text
-        path.addRect(self.textItem.boundingRect().translated(self.textItem.pos()))
-
-        outlinePath = QPainterPathStroker()
-        outlinePath.setWidth(HITSIZE*2)
-        return outlinePath.createStroke(path)
+        """ Set a tight selection shape. Kept until the line's shape (cached by the line) or the label moves """
+        lineShape = self.edgeLine.shape()
+        textRect = self.textItem.boundingRect().translated(self.textItem.pos())
+        if self._shape is None or self._shape[0] is not lineShape or self._shape[1] != textRect:
+            path = QPainterPath(lineShape)
+            #Text
+            path.addRect(textRect)
+
+            outlinePath = QPainterPathStroker()
+            outlinePath.setWidth(HITSIZE*2)
+            self._shape = (lineShape, textRect, outlinePath.createStroke(path))
+        return self._shape[2]
 
     def mousePressEvent(self, mouseEvent):
         if (mouseEvent.button() == Qt.MouseButton.LeftButton):
@@ -816,11 +970,8 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
                 self.scene().clearEdgeOnly(self)
                 self.scene().clearSelection()
                 
+            #The list item is highlighted by the SelectionSync
             self.setSelected(True)
-            #Highlight the list item as well
-            #print(f"\nSelected elt: {self.data(KEY_INDEX)}\n")
-            lWItem = self.listWidget.findItemByIdx(self.data(KEY_INDEX))
-            self.listWidget.setCurrentItem(lWItem)
 
     def mouseDoubleClickEvent(self, mouseEvent):
         self.requestEdit.emit(self)
@@ -832,17 +983,36 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
         if not self.suppressItemChange:
             if change == QGraphicsItem.ItemSelectedHasChanged:
                 #print(f"Selected Edge {self.dispText} ")
-                #Select the children
-                for child in self.childItems():
-                    child.setSelected(value)
+                #Select the line (shows/ hides its handles). The other children aren't selectable,
+                # and walking childItems() would include every handle
+                self.edgeLine.setSelected(value)
+                self._setLabelColour()
 
             # Change the display text - what would the <change> be? Using ToolTip as the closest
             #TODO: Fix the `change` value to something more meanigful
             if change == QGraphicsItem.GraphicsItemChange.ItemToolTipChange:
                 self.textItem.setPlainText(self.model.Gr.edgeD[self.edgeNum].metadata['name'] )
+                self.placeLabels()
+
+            if change in SCENE_NOTIFY_CHANGES:
+                notifySceneChanged(self)
         
         return super().itemChange(change, value)
 
+    def detach(self):
+        """ Break the references to and from this edge before it leaves the scene: unhook
+            from the end nodes, drop the handles and the children's back-references.
+            It is then freed when the scene lets go, rather than whenever the GC runs """
+        self.suppressItemChange = True
+        if self in self.startNode.startsEdges:
+            self.startNode.startsEdges.remove(self)
+        if self in self.endNode.endsEdges:
+            self.endNode.endsEdges.remove(self)
+        if self.scene():
+            self.edgeLine._deleteHandles()
+        self.textItem.my_parent_item = None
+        self.edgeLine.my_parent_item = None
+
     def setPolylineType(self, lineType:int):
         """set and change _polyEdge """
 
@@ -852,30 +1022,55 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
             self.edgeLine.my_parent_item = None
             if self.isOnlySelected:
                 self.scene().clearEdgeOnly(self)
-            if self._polyEdge == STRAIGHT:
-                #BUG (PySide) is this going to cause garbage collection issues? - yes!
-                self.scene().removeItem(self.edgeLine)
-                self.edgeLine = StraightLineItem(ptList,parent=self)
-                
-            elif self._polyEdge == SPLINE:
+            #BUG (PySide) is this going to cause garbage collection issues? - yes!
+            #(A compact edge's line is not in the scene)
+            if self.edgeLine.scene():
                 self.scene().removeItem(self.edgeLine)
-                self.edgeLine = HermiteSplineItem(ptList,parent=self)
+            self._makeLine(ptList)
+            self.updateLine()
 
-            self.edgeLine.setData(KEY_ROLE,ROLE_POLYLINE)
-            self.edgeLine.my_parent_item = self
-            self.edgeLine.setFlag(QGraphicsItem.ItemIsSelectable, False)
+    def setTangentModel(self, model:str):
+        """ set how a spline's tangents are worked out (a TANGENTS_ constant). A spline's are redone now """
+        self.tangentModel = model
+        if self._polyEdge == SPLINE:
+            self.edgeLine.setTangentModel(model)
             self.updateLine()
 
+    def _makeLine(self, ptList, tangents=[]):
+        """ create edgeLine for the current _polyEdge type. A compact edge owns it, and paints it itself """
+        parent = None if self.compact else self
+        if self._polyEdge == STRAIGHT:
+            self.edgeLine = StraightLineItem(ptList,parent=parent)
+        else: #Assume spline! Error checking later!
+            self.edgeLine = HermiteSplineItem(p=ptList,t=tangents,parent=parent,tangentModel=self.tangentModel)
+        if self.compact:
+            self.edgeLine.owner = self
+
+        #Stop Python GC from mangling things on delete (It seems this ref is not critical)
+        self.edgeLine.setData(KEY_ROLE,ROLE_POLYLINE)
+        self.edgeLine.my_parent_item = self
+        self.edgeLine.setFlag(QGraphicsItem.ItemIsSelectable, False)
+
+    def _makeArrow(self):
+        if self.compact:
+            self.prepareGeometryChange()
+            self.endShape = ArrowHeadPart(size=NODESIZE/2, parent=self)
+        else:
+            self.endShape = ArrowHeadItem(size=NODESIZE/2, parent=self)
+
     def setDirected(self, isDirected:bool):
         """ set is driected, add/ remove arrow"""
     
         if self.isDirected != isDirected:
             self.isDirected = isDirected
             if isDirected:  #restore the arrow
-                self.endShape = ArrowHeadItem(size=NODESIZE/2, parent=self)
+                self._makeArrow()
             else:
                 #Note, previous endShape dereference should delete it
-                self.scene().removeItem(self.endShape)
+                if self.compact:
+                    self.prepareGeometryChange()
+                else:
+                    self.scene().removeItem(self.endShape)
                 self.endShape = None
             self.updateLine()
                 
@@ -898,6 +1093,12 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
         self.edgeLine.setP(-1,end.scenePos())
         self.updateLine(end)
 
+    def updateEnds(self):
+        """ Pull both end points from the end items, and recompute once (deferred drag updates) """
+        self.edgeLine.setP(0,self.startNode.scenePos())
+        self.edgeLine.setP(-1,self.endNode.scenePos())
+        self.updateLine()
+
     def updateLine(self, source=None):
         """ Tell Qt the ends have moved. source = None allows an arrow recalc without point change"""
         self.prepareGeometryChange()
@@ -908,16 +1109,19 @@ class VisEdgeItem(QGraphicsObject): #QGraphicsItem,QObject):
         if source == self.endNode: #endNode
             self.edgeLine.setP(-1,source.scenePos())
 
+        self.edgeLine.updatePath()
+
         #Draw the arrow/ end shape
         if self.endShape:
             self.endShape.prepareGeometryChange()
-            # Compute rotation angle
-            #TODO: This version the visible "end" is HITSIZE pixels away from the node centre 
-            angle_deg = self.edgeLine.endAngle()
-            self.endShape.setRotation(angle_deg)
-            self.endShape.setPos(self.edgeLine._p[-1])
+            #Tip on the line, NODESIZE/2 back from the end node's centre, pointing along the line there
+            arc = self.edgeLine.arcLength()
+            tipAt = max(0.0, arc.length() - NODESIZE/2)
+            self.endShape.setRotation(arc.angleAtLength(tipAt))
+            self.endShape.setPos(QPointF(*arc.pointAtLength(tipAt)))
 
-        self.edgeLine.updatePath()
+        self.placeLabels()
+        notifySceneChanged(self)
 
 class grScene(QGraphicsScene):
     """ holds and extends all the drawing, connects to model using VisNodeItem and VisEdgeItem"""
@@ -932,7 +1136,9 @@ class grScene(QGraphicsScene):
     edgeEditRequested = Signal(object)
     nodeEditRequested = Signal(object)
 
-    def __init__(self, model,listWidget,mainwindow):
+    def __init__(self, model, listWidget=None, mainwindow=None):
+        """ listWidget & mainwindow are optional: without them (eg headless batch jobs, tests)
+            there is no list of items, and edit requests only go out as signals """
         super().__init__()
         self.model = model
         self.listWidget = listWidget
@@ -952,9 +1158,46 @@ class grScene(QGraphicsScene):
 
         #Track single item selection (for edges)
         self.onlySelected = None
+        #The handle being moved (MOVEEDGEEND/ MOVEHANDLE)
+        self.handle = None
 
         #For dragging
         self._lastMousePos = QPointF(0,0)
+        #Last scene mouse position seen, for getSceneMousePos() when the cursor isn't over a view
+        self._lastScenePos = QPointF(0,0)
+
+        #Coalesce mouse moves to the display frame rate. Only the latest position is kept,
+        # and rubber-band/ handle updates are applied once per frame by _flushMouseMove()
+        self._pendingMovePos = None
+        self._moveTimer = QTimer(self)
+        self._moveTimer.setSingleShot(True)
+        self._moveTimer.setInterval(FRAME_INTERVAL_MS)
+        self._moveTimer.timeout.connect(self._flushMouseMove)
+        #While DRAGGING, edges to recompute and the mid point move, applied on the same frame
+        self._dirtyEdges = set()
+        self._pendingDragDelta = QPointF(0,0)
+
+        #Cache the last hover hit-test, and the cursor shown, so moves don't re-test/ re-set them
+        self._hoverPos = None
+        self._hoverHit = False
+        self._cursorShape = Qt.ArrowCursor
+
+        #Static layer: unchanged, unselected items are drawn from cached tiles in drawBackground()
+        self.tileCache = TileCache(self)
+        self.tileCache.setEnabled(USE_TILE_CACHE)
+
+        #ID (KEY_INDEX) -> node/ edge, for findItemByIdx()
+        self.itemsById = {}
+
+        #Big graphs: idle nodes & edges are parked out of the scene, drawn in batches by these layers
+        self.nodeLayer = NodeLayer(self)
+        self.edgeLayer = EdgeLayer(self)
+
+        #Bounds of the content (nodes & edges with their labels), for fit/ export/ print.
+        # Grown as items change, shrunk lazily - removing an item on the border only marks it stale
+        self._itemBounds = {}
+        self._contentBounds = QRectF()
+        self._boundsStale = False
 
         #Add axes to help see how things move & debug graphical issues.
             #TODO: THere must be a better solution!
@@ -968,6 +1211,88 @@ class grScene(QGraphicsScene):
         self.addItem(HLine) 
         """
 
+    def notifyItemChanged(self, item):
+        """ a node or edge has moved/ changed/ been (de)selected. Keeps the scene's caches in step """
+        self.tileCache.itemChanged(item)
+        self._updateBounds(item)
+        self.itemsById[item.data(KEY_INDEX)] = item
+        if item.data(KEY_ROLE) == ROLE_NODE:
+            self.nodeLayer.itemChanged(item)
+        else:
+            self.edgeLayer.itemChanged(item)
+
+    def _itemExtent(self, item) -> QRectF:
+        """ scene rect of a node/ edge and its labels (not its handles) """
+        rect = item.sceneBoundingRect().united(item.metaDisplay.sceneBoundingRect())
+        if item.data(KEY_ROLE) == ROLE_EDGE:
+            rect = rect.united(item.textItem.sceneBoundingRect())
+        return rect
+
+    def _onBoundsEdge(self, rect:QRectF) -> bool:
+        """ does rect reach the border of the content bounds (so could be what holds it out)? """
+        b = self._contentBounds
+        return rect.left() <= b.left() or rect.top() <= b.top() or \
+               rect.right() >= b.right() or rect.bottom() >= b.bottom()
+
+    def _updateBounds(self, item):
+        if item.data(KEY_ROLE) not in (ROLE_NODE, ROLE_EDGE):
+            return
+        old = self._itemBounds.get(item)
+        new = self._itemExtent(item)
+        self._itemBounds[item] = new
+        if old is not None and self._onBoundsEdge(old) and not new.contains(old):
+            #May have moved in from the border, recalculate when next asked
+            self._boundsStale = True
+        if not self._boundsStale:
+            self._contentBounds = self._contentBounds.united(new)
+
+    def _forgetBounds(self, item):
+        """ item is leaving the scene """
+        old = self._itemBounds.pop(item, None)
+        if old is not None and self._onBoundsEdge(old):
+            self._boundsStale = True
+
+    def contentBounds(self) -> QRectF:
+        """ bounding rect of the nodes & edges. Use rather than itemsBoundingRect(), which walks every child """
+        if self._boundsStale:
+            rect = QRectF()
+            for itemRect in self._itemBounds.values():
+                rect = rect.united(itemRect)
+            self._contentBounds = rect
+            self._boundsStale = False
+        return QRectF(self._contentBounds)
+
+    def drawBackground(self, painter, rect):
+        super().drawBackground(painter, rect)
+        self.tileCache.drawTiles(painter, rect)
+
+    def render(self, painter, target=QRectF(), source=QRectF(), mode=Qt.KeepAspectRatio):
+        """ Export, print and copy render the items themselves (vector), not the cached tiles """
+        useTiles = self.tileCache.enabled
+        self.tileCache.setEnabled(False)
+        super().render(painter, target, source, mode)
+        self.tileCache.setEnabled(useTiles)
+
+    def clear(self):
+        """ Extend the base clear to drop the tile cache, content bounds & node layer too """
+        #Parked nodes aren't in items(), but are in itemsById
+        for item in self.itemsById.values():
+            item.detach()
+        #Out of the scene before the base clear, which would delete them
+        for layer in (self.nodeLayer, self.edgeLayer):
+            layer.reset()
+            layer.setLayerEnabled(False)
+        self.lastHovered = None
+        self.onlySelected = None
+        self.handle = None
+        self._dirtyEdges.clear()
+        self.itemsById.clear()
+        self.tileCache.reset()
+        self._itemBounds.clear()
+        self._contentBounds = QRectF()
+        self._boundsStale = False
+        super().clear()
+
     def itemsHere(self, pos: QPointF, size: QSizeF, itemRoles: List[int]):
         """Return a list of the items who's roles match `itemRoles`, within `size` of `pos` """
         half_w = size.width() / 2
@@ -1063,13 +1388,14 @@ class grScene(QGraphicsScene):
         return pickedItem
 
     def getSceneMousePos(self):
-        """ return the current scene mouse position using *global* pos. Needed for multi-click inserts. Assumes only 1 view"""
+        """ return the current scene mouse position using *global* pos. Needed for multi-click inserts.
+            Uses the view the cursor is over, else (no views/ headless) the last scene mouse event position"""
         global_pos = QCursor.pos()
-        #Assume only 1 view for now
-        view = self.views()[0]
-        view_pos = view.mapFromGlobal(global_pos)
-        scene_pos = view.mapToScene(view_pos)
-        return scene_pos
+        for view in self.views():
+            view_pos = view.viewport().mapFromGlobal(global_pos)
+            if view.viewport().rect().contains(view_pos):
+                return view.mapToScene(view_pos)
+        return QPointF(self._lastScenePos)
         
     #Code to handle the edge rubber banding during creation (QT handles edit changes)
 
@@ -1206,6 +1532,13 @@ class grScene(QGraphicsScene):
         mPos = mouseEvent.scenePos()
         #Track the last mouse position for Pointer moves
         self._lastMousePos = mPos
+        self._lastScenePos = mPos
+        #Parked nodes & edges under the mouse become items again, for Qt to hit-test
+        self.nodeLayer.promoteNear(mPos)
+        self.edgeLayer.promoteNear(mPos)
+        #Catch up on any move still waiting for the next frame
+        self._flushMouseMove()
+        self._hoverPos = None
 
         #print(f"Press {self.mouseMode =}")
         #print(f"\nStart mousePress {len(self.selectedItems())=}",end = ' ')
@@ -1385,13 +1718,16 @@ class grScene(QGraphicsScene):
                     #print(f"Handle: {type(selItem)=}")
                     #if the parent is HS and selItem = _pH[0] or -1, then start moving end of edge
                     p = selItem.parentItem()
+                    #A compact edge holds its line's handles itself
+                    if p.data(KEY_ROLE) == ROLE_EDGE:
+                        p = p.edgeLine
                     if p.data(KEY_ROLE) == ROLE_POLYLINE and (selItem == p._pHandles[0] or selItem == p._pHandles[-1]):
                         #mouseEvent.accept()
                         self.mouseMode = self.MOVEEDGEEND
                         #print(f"start MOVEEDGEEND{self.mouseMode=} {selItem.parentItem()=}")
                         #Start move
                         #selItem  _Must_ be a handle, and parent must be a visEdge - deal with the polyline inbetween
-                        self.startMovingEdgeEnd(selItem.parentItem().parentItem(), selItem)
+                        self.startMovingEdgeEnd(p.edgeItem(), selItem)
                     else: #tangent or Mid point to move
                         self.handle = selItem
                         self.mouseMode = self.MOVEHANDLE
@@ -1418,21 +1754,27 @@ class grScene(QGraphicsScene):
                     #Where to do the handles update for these?
                     cxMenu = [  ("add Point","addPt" ),
                                 ("del Point","delPt" ),
-                                ("Edit Details", lambda: self.mainwindow.showEditEdgeDialog(item))
+                                ("Edit Details", lambda: self.edgeEditRequested.emit(item))
                             ]
+                    if item._polyEdge == SPLINE:
+                        #Curve style: how the tangents are worked out
+                        for model, label in ((TANGENTS_FIXED, "Fixed"), (TANGENTS_CATMULL_ROM, "Catmull-Rom"),
+                                             (TANGENTS_CARDINAL, "Cardinal"), (TANGENTS_MONOTONE, "Monotone")):
+                            if model != item.tangentModel:
+                                cxMenu.append((f"Tangents: {label}", lambda model=model: item.setTangentModel(model)))
                 if item.data(KEY_ROLE) == ROLE_NODE:
                     cxMenu = [  (("Edit Details", 
-                                lambda: self.mainwindow.showEditNodeDialog(item)))
+                                lambda: self.nodeEditRequested.emit(item)))
                             ]
-            else: #no or >1 selected.
-                cxMenu =[("print",lambda: MainWindow.action_DebugPrint(MainWin))]
+            elif self.mainwindow: #no or >1 selected.
+                cxMenu =[("print",lambda: self.mainwindow.action_DebugPrint())]
 
             if cxMenu:
                 cxChoice = self.contextMenu(mouseEvent, cxMenu)
 
                 #Adding & deleting points impacts selection, so deal with carefully
                 if cxChoice == "addPt":
-                    item.edgeLine._deleteHandles()
+                    #addPoint keeps any handles in step
                     item.edgeLine.addPoint(mPos)
                     item.edgeLine.setSelected(True)
 
@@ -1446,20 +1788,91 @@ class grScene(QGraphicsScene):
         #pass on
         super().mousePressEvent(mouseEvent)
 
+    def setViewCursor(self, shape):
+        """ Set the cursor on the scene's views, but only when it actually changes """
+        if shape != self._cursorShape:
+            self._cursorShape = shape
+            for view in self.views():
+                view.setCursor(shape)
+
+    def nodeHoverHit(self, pos: QPointF) -> bool:
+        """ Is there a node under pos? The hit-test is cached, and only redone
+            once the mouse has moved more than HOVER_TOLERANCE from the last test"""
+        if self._hoverPos is None or (pos - self._hoverPos).manhattanLength() > HOVER_TOLERANCE:
+            self._hoverHit = len(self.itemsHere(pos, QSize(HITSIZE,HITSIZE), [ROLE_NODE])) > 0
+            self._hoverPos = pos
+        return self._hoverHit
+
+    def _queueMouseMove(self, mPos):
+        """ store the latest mouse position, and make sure a flush is scheduled for the next frame """
+        self._pendingMovePos = mPos
+        if not self._moveTimer.isActive():
+            self._moveTimer.start()
+
+    def queueEdgeUpdates(self, edges):
+        """ Mark edges to be recomputed once, on the next frame (used while DRAGGING) """
+        self._dirtyEdges.update(edges)
+        if not self._moveTimer.isActive():
+            self._moveTimer.start()
+
+    def _flushEdgeUpdates(self):
+        """ Move the mid points of the selected edges by the drag so far, then recompute
+            every dirty edge once - an edge with both ends moving is only done once """
+        delta = self._pendingDragDelta
+        self._pendingDragDelta = QPointF(0,0)
+        if not delta.isNull():
+            for item in self.selectedItems():
+                if item.data(KEY_ROLE) == ROLE_EDGE:
+                    item.edgeLine.moveMidPoints(delta)
+                    self._dirtyEdges.add(item)
+
+        dirty = self._dirtyEdges
+        self._dirtyEdges = set()
+        for edge in dirty:
+            #May have been deleted since it was queued
+            if edge.scene() is self or edge.parkedIn is not None:
+                edge.updateEnds()
+
+    def _flushMouseMove(self):
+        """ Apply the latest coalesced mouse move. Called once per frame by the timer,
+            and directly before press/ release so they see the final position """
+        self._moveTimer.stop()
+        mPos = self._pendingMovePos
+        self._pendingMovePos = None
+        self._flushEdgeUpdates()
+        if mPos is None:
+            return
+
+        if self.mouseMode == self.INSERTEDGE or self.mouseMode == self.INSERTEDGE2CLICK:
+            if self.tmpEdgeSt and self.rubberLine:
+                self.stretchRubberLine(mPos)
+        elif self.mouseMode == self.MOVEEDGEEND:
+            if self.onlySelected and self.handle:
+                self.MoveEdgeEnd(self.onlySelected,mPos)
+        elif self.mouseMode == self.MOVEHANDLE:
+            #Same code as moveEdgeEnd
+            if self.handle:
+                self.handle.setPos(mPos)
+
     def mouseMoveEvent(self, mouseEvent):
         mPos = mouseEvent.scenePos()
         #print(f"M: {self.mouseMode} ",end="",flush=True)
         delta = mPos - self._lastMousePos
-        self._lastMousePos = mPos 
+        self._lastMousePos = mPos
+        self._lastScenePos = mPos
+        self.nodeLayer.promoteNear(mPos)
 
         #Hovering would be nice, but this gets the job done.
-        #Just filter for valid items:
-        items=self.itemsHere(mPos, QSize(HITSIZE,HITSIZE), [ROLE_NODE])
-        #if len(items)>=1: print(f"{[type(_) for _ in items]=}")
-        if items != [] and (self.mouseMode in (self.INSERTEDGE, self.INSERTEDGE2CLICK, self.MOVEEDGEEND)):
-            self.views()[0].setCursor(Qt.CrossCursor)
+        #Only the edge (re)linking modes show a cross over nodes, so only hit-test in those
+        if self.mouseMode in (self.INSERTEDGE, self.INSERTEDGE2CLICK, self.MOVEEDGEEND):
+            overNode = self.nodeHoverHit(mPos)
         else:
-            self.views()[0].setCursor(Qt.ArrowCursor)
+            overNode = False
+            self._hoverPos = None
+        if overNode:
+            self.setViewCursor(Qt.CrossCursor)
+        else:
+            self.setViewCursor(Qt.ArrowCursor)
 
         if self.mouseMode == self.INSERTNODE:
             #print("moving at :",mouseEvent.scenePos())
@@ -1467,10 +1880,10 @@ class grScene(QGraphicsScene):
             pass
         elif self.mouseMode == self.INSERTEDGE or self.mouseMode == self.INSERTEDGE2CLICK:
             #print("Ins edge move")
-            #Rubber band the edge
+            #Rubber band the edge (once per frame)
             #print(f">",end="")
             if self.tmpEdgeSt:
-                self.stretchRubberLine(mPos)
+                self._queueMouseMove(mPos)
                 mouseEvent.accept()
             
         elif self.mouseMode == self.POINTER:
@@ -1480,28 +1893,27 @@ class grScene(QGraphicsScene):
         #manually handle click drag (This _could_ be another state, but only used here)
         #elif self.mouseMode == self.DRAGGING: # and mouseEvent.buttons() & Qt.LeftButton:
         if self.mouseMode == self.DRAGGING:# and (mouseEvent.buttons() & Qt.LeftButton):
-            #Handle edges with multiple points - update the points
-            sIlist = self.selectedItems()
-            #print(f"->{len(sIlist)}",end="")
-            if len(sIlist) > 2: #high probability of an edge in the mix
-                for item in sIlist:
-                    if item.data(KEY_ROLE) == ROLE_EDGE:
-                        item.edgeLine.moveMidPoints(delta)
-                        #print("e" , end ="")
+            #Handle edges with multiple points - the selected edges' mid points move with the drag.
+            # Accumulated and applied once per frame, with the end updates from the nodes Qt moves
+            self._pendingDragDelta += delta
+            self._queueMouseMove(mPos)
             
         elif self.mouseMode == self.MOVEEDGEEND:
-            self.MoveEdgeEnd(self.onlySelected,mPos)
+            self._queueMouseMove(mPos)
             mouseEvent.accept()
             
         elif self.mouseMode == self.MOVEHANDLE:
             #print("Move Handle")
-            #Same code as moveEdgeEnd
-            self.handle.setPos(mPos) 
+            self._queueMouseMove(mPos)
             
         super().mouseMoveEvent(mouseEvent)
 
     def mouseReleaseEvent(self, mouseEvent):
         mPos = mouseEvent.scenePos()
+        self.nodeLayer.promoteNear(mPos)
+        #Catch up on any move still waiting for the next frame
+        self._flushMouseMove()
+        self._hoverPos = None
         #print(f"release {self.mouseMode =}")
         if self.mouseMode == self.INSERTNODE:
             #print("Node release at :",mouseEvent.scenePos())
@@ -1530,7 +1942,7 @@ class grScene(QGraphicsScene):
                 self.update()
             self.mouseMode = self.POINTER
             #Reset the cursor
-            self.views()[0].setCursor(Qt.ArrowCursor)
+            self.setViewCursor(Qt.ArrowCursor)
             self.clearSelection()
             #done processing - bail
             return
@@ -1553,7 +1965,7 @@ class grScene(QGraphicsScene):
             #print("Finish moveEdgeEnd")
             self.finishMovingEdgeEnd(self.onlySelected, mPos,mouseEvent)
             self.mouseMode = self.POINTER
-            self.views()[0].setCursor(Qt.ArrowCursor)
+            self.setViewCursor(Qt.ArrowCursor)
             mouseEvent.accept()
             #return
         elif self.mouseMode == self.MOVEHANDLE:
@@ -1580,11 +1992,11 @@ class grScene(QGraphicsScene):
                 #item.requestEdit.connect(self.edgeEditRequested.emit)
                 #Even this simple test doesn't work
                 #item.requestEdit.connect(self.signalTest)
-                #HACK: Call the dialog directly. Signals would be better
-                self.mainwindow.showEditEdgeDialog(item)
+                #The MainWindow (if any) connects these to its edit dialogs
+                self.edgeEditRequested.emit(item)
 
             if item and item.data(KEY_ROLE) == ROLE_NODE:
-                self.mainwindow.showEditNodeDialog(item)
+                self.nodeEditRequested.emit(item)
             
             self.mouseMode = self.POINTER
 
@@ -1603,145 +2015,521 @@ class grScene(QGraphicsScene):
         else:
             self.scale(zoomOutFactor, zoomOutFactor)
 
+    def viewRubberBandChanged(self, viewRect, fromScenePoint, toScenePoint):
+        """ a view's rubber band has moved (connected to QGraphicsView.rubberBandChanged) """
+        self.nodeLayer.rubberBandChanged(viewRect, fromScenePoint, toScenePoint)
+        self.edgeLayer.rubberBandChanged(viewRect, fromScenePoint, toScenePoint)
+
+    def nodes(self) -> list:
+        """ the VisNodeItems in the scene (not their children), including those parked in the node layer """
+        return [item for item in self.itemsById.values()
+                    if item.data(KEY_ROLE) == ROLE_NODE and (item.scene() is self or item.parkedIn is not None)]
+
+    def edges(self) -> list:
+        """ the VisEdgeItems in the scene (not their children), including those parked in the edge layer """
+        return [item for item in self.itemsById.values()
+                    if item.data(KEY_ROLE) == ROLE_EDGE and (item.scene() is self or item.parkedIn is not None)]
+
+    def selectWhere(self, predicate):
+        """ Bulk selection: select exactly the nodes & edges for which predicate(item) is True.
+            One pass over the nodes & edges (not their children/ handles), with the scene's signals
+            blocked, then a single selectionChanged """
+        self.blockSignals(True)
+        try:
+            #Hiding an edited edge's handles deselects it: part of this one change
+            if self.onlySelected:
+                self.clearEdgeOnly(self.onlySelected)
+            for item in list(self.itemsById.values()):
+                parked = item.parkedIn is not None
+                if (item.scene() is not self and not parked) or \
+                        not (item.flags() & QGraphicsItem.ItemIsSelectable):
+                    continue
+                select = bool(predicate(item))
+                if parked:
+                    #Parked items are unselected. Only those being selected come back as items
+                    if select:
+                        item.parkedIn.promote(item)
+                        item.setSelected(True)
+                elif item.isSelected() != select:
+                    item.setSelected(select)
+        finally:
+            self.blockSignals(False)
+        self.selectionChanged.emit()
+
+    def selectAllItems(self):
+        self.selectWhere(lambda item: True)
+
+    def selectNodes(self):
+        self.selectWhere(lambda item: item.data(KEY_ROLE) == ROLE_NODE)
+
+    def selectEdges(self):
+        self.selectWhere(lambda item: item.data(KEY_ROLE) == ROLE_EDGE)
+
+    def invertSelection(self):
+        self.selectWhere(lambda item: not item.isSelected())
+
+    def selectByMetadata(self, predicate):
+        """ select the nodes & edges whose metadata dict passes predicate(metadata) """
+        self.selectWhere(lambda item: predicate(item.metadata))
+
     def findItemByIdx(self,idx):
-        """takes a ROLE_INDEX value, and return the item out, or none """
-        for item in self.items():
-            if item.data(KEY_INDEX) == idx:
-                return item
+        """takes a ROLE_INDEX value, and return the (node or edge) item out, or none.
+            An item parked in an aggregate layer is put back in the scene, as the caller will use it """
+        item = self.itemsById.get(idx)
+        if item is not None and item.parkedIn is not None:
+            item.parkedIn.promote(item)
+        if item is not None and item.scene() is self:
+            return item
         return None
 
     def deleteItemAndChildren(self,item):
-        #print(f" start dIC for {item}")
-        #BUG:DeleteEdge This leaves a the line/ polyline 'in the scene' (but not in scene.getItems()!)
-        #Trying https://pypi.org/project/referrers/ to look for links
-        #1st try overflows the line allocation in VSCodium
-        #import referrers
-        #print(referrers.get_referrer_graph(item))
-
-        #TODO: Make this recursive, deleting leaves first (Python/ C++ memory handling issue - see old code in V00)
-        # Recursively remove and delete children. Action is post-recursion to delete from the bottom up
-        #TODO - why does doing this cause index errors (use b2.grml, multiple select, as test)
-        #for child in item.childItems():
-        cList = item.childItems()
-        for child in cList:
-            #print(f"dIC {child}")
-            self.deleteItemAndChildren( child)
-        
-        #print(f"   now processing dIC for {item}")
+        """ Remove a node or edge, with its children, from the scene.
+            The item is detached first (see detach()), and its children stay parented so they are
+            deleted with it. Only the area it covered is repainted """
         item.suppressItemChange = True
-        #unparent
-        #item.setParentItem(None)
-        # Remove from scene
-        #if its an edge, tell the nodes ends that the edge is gone
-        if item.data(KEY_ROLE) == ROLE_EDGE:
-            item.startNode.startsEdges.remove(item)
-            #print(f"{item.endNode = }") #eItem
-            item.endNode.endsEdges.remove(item)
-            #print(f"{item.endNode.endsEdges =}")
-        #print(f"{item =}")  
-        #logging.debug("delItem&chld scene items, BEFORE remove")
-        #for i in self.items():
-        #    logging.debug(f"{i =}")        
-        
-        # Register a finalize callback to confirm deletion
-        #weakref.finalize(item, self._on_finalize, repr(item))
+        if item.data(KEY_ROLE) in (ROLE_NODE, ROLE_EDGE):
+            item.detach()
+
+        #Drop the scene's own references
+        if item.data(KEY_ROLE) in (ROLE_NODE, ROLE_EDGE) and item.parkedIn is not None:
+            item.parkedIn.discard(item)
+        self.tileCache.itemRemoved(item)
+        self._forgetBounds(item)
+        self._dirtyEdges.discard(item)
+        if self.itemsById.get(item.data(KEY_INDEX)) is item:
+            del self.itemsById[item.data(KEY_INDEX)]
+        if self.lastHovered is item:
+            self.lastHovered = None
+        if self.onlySelected is item:
+            self.onlySelected = None
+
+        #Repaint where it was. The whole tree is measured before removal, as removing children
+        # one by one first shrank an edge's (childrenBoundingRect) extent and left 'ghost' lines
+        self.update(item.mapRectToScene(item.boundingRect().united(item.childrenBoundingRect())))
+        if item.scene() is self:
+            self.removeItem(item)
+
+    #graphml & SVG input/ output - no MainWindow needed, so usable headless
 
-        item.suppressItemChange = True
-        self.removeItem(item)
-        #import referrers
-        #print(referrers.get_referrer_graph(item, max_depth=3))
-        
-        #logging.debug("delItem&chld scene items, AFTER remove")
-        #for i in self.items():
-        #    logging.debug(f"{i =}")
-        #Item now belongs to Scene, del from memory
-        #forcing the del will crash sooner. Otherwise, crashes on GC?
-        del item
-
-    def update(self):
-        #print("scene updating")
-        #logging.debug("Scene updating")
-        super().update()
-
-    #Part of tracking down the ghost lines - gc takes a while. forced gc crashes the whole thing.
-    # Living with the ghost lines for now :/
-    @staticmethod
-    def _on_finalize(item_repr):
-        print(f"[Finalize] {item_repr} has been garbage collected.")
-
-
-def debug_qgraphicsitem_refs():
-    """ coPilot code to track gc issues. """
-    #import gc
-    print("debug_qgraphicsitem_refs()")
-    gc.collect()
-    print(f"gc stats {gc.get_stats()}")
-    for obj in gc.get_objects():
-        if isinstance(obj, QGraphicsItem):
-            print("Alive QGraphicsItem:", obj)
-            refs = gc.get_referrers(obj)
-            print(f"There are {refs =} referrers")
-            #print("  Referrers:")
-            #for ref in refs:
-            #    print("   ", ref)
+    def nodeFromXML(self,xNode,newID=False)->VisNodeItem:
+        """ Create a new node from an XML string
+            if newID is True, the item is created with a newID,otherwise, the read value.
+            This is the difference between file load (new items) and edit paste (structure)
+            Returns VisNodeItem
+        """
+        #Use old yEd + load code
+        nodeMetadata = {}
+        nodeMetadataAttributes = {}
 
-#=======
-# "monkey patch" QListWidget to create data() sorted lists
-# can't properly extend QListWidget 'cos it's setup in the .ui file
-# Courtesy of chatGPT
+        #TODO: type check id
+        if not newID:
+            id = int(xNode.attrib.get("id"))
+        else:
+            id = ''
+        for dataNode in xNode.iter("data"):
+            shapeNode = dataNode.find("ShapeNode")
+            if shapeNode != None:
+                # Geometry information
+                geom = shapeNode.find("Geometry")
+                if geom is not None:
+                    nodeX = float(geom.get("x"))
+                    nodeY = float(geom.get("y"))
+                    #geometry_vars = ["height", "width", "x", "y"]
 
-# Store original addItem method
-_original_addItem = QListWidget.addItem
+                nodeLable = shapeNode.find("NodeLabel")
+                if nodeLable is not None:
+                    nodeName = nodeLable.text.strip()
+                    for nodeNameAttribs in nodeLable.iter("metadataAttribute"):
+                        #nodeMetadataAttributes['name'] = {nodeNameAttribs.attrib.get("key"): nodeNameAttribs.attrib.get("value")}
+                        #Deal with Boolean for display (This is why you should use the proper key types!)
+                        if nodeNameAttribs.attrib.get("key") == 'display':
+                            nodeMetadataAttributes['name'] = {'display':nodeNameAttribs.attrib.get("value") == "True"}
+                        else:
+                            nodeMetadataAttributes['name'] = {nodeNameAttribs.attrib.get("key"): nodeNameAttribs.attrib.get("value")}
 
-# Add sort_roles attribute to QListWidget instances
-def _addItem_with_sort(self, item):
-    _original_addItem(self, item)
-    roles = getattr(self, "_sort_roles", None)
-    if roles:
-        _resort_items(self, roles)
+            #TODO: Add in error processing for corrupt/ odd files
+        # Look for a metadata node
+        for metaEl in xNode.iter("metadata"):
+            metaKey = metaEl.attrib.get("key")
+            nodeMetadata[metaKey] = metaEl.attrib.get("value").strip()
+            for nodeNameAttribs in metaEl.iter("metadataAttribute"):
+                #Deal with Boolean for display (This is why you should use the proper key types!)
+                #TODO: Get the boolean value into the XML
+                if nodeNameAttribs.attrib.get("key") == 'display':
+                    nodeMetadataAttributes[metaKey] = {'display':nodeNameAttribs.attrib.get("value") == "True"}
+                else:
+                    nodeMetadataAttributes[metaKey] = {nodeNameAttribs.attrib.get("key"): nodeNameAttribs.attrib.get("value")}
 
-def _resort_items(widget, roles):
-    items = []
-    while widget.count():
-        items.append(widget.takeItem(0))
-    #TODO: Make sort by name an option
-    items.sort(key=lambda item: tuple(item.data(role) for role in roles))
-    for item in items:
-        _original_addItem(widget, item)
+        newNode =  VisNodeItem(QPointF(nodeX,nodeY),self.model,self.listWidget ,nameP=nodeName, id = id,
+                                metadata=nodeMetadata, metadataAttributes=nodeMetadataAttributes)
+        return newNode
 
-def set_sort_roles(self, roles):
-    self._sort_roles = roles
-    _resort_items(self, roles)
-# Patch methods into QListWidget
-QListWidget.addItem = _addItem_with_sort
-QListWidget.setSortRoles = set_sort_roles
+    def edgeFromXML(self,xEdge,newID=False,newStartID=None, newEndID=None)->VisEdgeItem:
+        """ Create a new edge from an XML string
+            if newID is True, the item is created with a newID,otherwise, the read value.
+            This is the difference between file load (new items) and edit paste (structure)
+            newStartID & newEndID also must be overwritten on paste/ structure copy
+            Returns VisEdgeItem
+        """
+        return VisEdgeItem(self.model, self.listWidget, **self.edgeArgsFromXML(xEdge, newID, newStartID, newEndID))
 
-def findItemByIdx(self,idx):
-    """another patch to LWid
-      feed in a ROLE_INDEX value, and get the item out, or none """
-    for row in range(self.count()):
-        item = self.item(row)
-        if item.data(KEY_INDEX) == idx:
-            return item
-    return None
-QListWidget.findItemByIdx = findItemByIdx
+    def edgeArgsFromXML(self,xEdge,newID=False,newStartID=None, newEndID=None) -> dict:
+        """ Read an edge from an XML string: the VisEdgeItem arguments (bar model & list), as for edgeFromXML()
+            Loading reads all the edges first, to work out their default tangents in one go
+        """
+        #Use old yEd + load code
+        #print(ET.tostring(xEdge))
+        
 
-def findItemRowByIdx(self,idx):
-    """another patch to LWid
-      feed in a ROLE_INDEX value, and get the item out, or none """
-    for row in range(self.count()):
-        item = self.item(row)
-        if item.data(KEY_INDEX) == idx:
-            return row
-    return None
-QListWidget.findItemRowByIdx = findItemRowByIdx
+        if not newID:
+            #TODO: type check id/ process string IDs
+            id = int(xEdge.attrib.get("id"))
+        else:
+            id = ''
+        
+        #TODO: yEd uses string IDs, not ints :/
+        if newStartID is not None: #Note: Can't use "truthy" here since 0 is a valid option!
+            sItemID = newStartID
+        else:
+            sItemID = int(xEdge.attrib.get("source", None))
 
-#end monkeypatch    
-#=======
+        if newEndID is not None:
+            eItemID = newEndID
+        else:
+            eItemID = int(xEdge.attrib.get("target", None))
 
+        sItem = self.findItemByIdx(sItemID)
+        eItem = self.findItemByIdx(eItemID)
+        if sItem == None:
+            print(f"WARNING! - Start Item ID {sItemID} not found ")
+        if eItem == None:
+            print(f"WARNING! - End Item ID {eItemID} not found ")
+        #Find the items
 
-#Some global helper functions
-class CodeExecDialog(QDialog):
+        directed = xEdge.attrib.get("directed", '')
+        edgeMetadata = {}
+        edgeMetadataAttributes = {}
+        tangentModel = DEFAULT_TANGENTS
+
+        for dataEdge in xEdge.iter("data"):
+            points=[]
+            tangents = []
+            polylineedge = dataEdge.find("PolyLineEdge")
+            polyLineType = STRAIGHT
+            bezier = False
+            if polylineedge is None:
+                polylineedge = dataEdge.find("QuadCurveEdge")
+                polyLineType = SPLINE 
+            if polylineedge is None:
+                polylineedge = dataEdge.find("BezierEdge")
+                polyLineType = SPLINE
+                bezier = polylineedge is not None
+            if polylineedge is not None:
+                tangentModel = polylineedge.attrib.get("tangentModel", DEFAULT_TANGENTS)
+                if tangentModel not in TANGENT_MODELS:
+                    print(f"WARNING! - Unknown tangent model {tangentModel}, using {DEFAULT_TANGENTS}")
+                    tangentModel = DEFAULT_TANGENTS
+                path = polylineedge.find("Path")
+                if bezier:
+                    #Control points between the nodes: (control, control, point)... control, control
+                    controls = [QPointF(float(pt.attrib.get("x")), float(pt.attrib.get("y")))
+                                for pt in path.findall("Point")] if path is not None else []
+                    points, tangents = bezierToSpline(sItem, eItem, controls)
+                elif path is not None:
+                    if polyLineType == SPLINE:
+                        #get tangents
+                        startT = path.find("StartTangent")
+                        if startT is not None: 
+                            #Each list entry is a tuple of tuples!
+                            tangents.append( ( QPointF(0,0),
+                                               QPointF(float(startT.attrib.get("x")),
+                                                   float(startT.attrib.get("y")) )
+                                            ) )
+                        
+                    pathPoints = path.findall("Point")
+                    if pathPoints is not None:
+                        points = []
+                        for pt in pathPoints:
+                            points.append( QPointF(float(pt.attrib.get("x")),
+                                            float(pt.attrib.get("y"))) )
+                            #if QuadCurve, #get tangents
+                            if polyLineType == SPLINE:
+                                T = pt.find("Tangent")
+                                if T is not None:
+                                    tangents.append( ( QPointF(float(T.attrib.get("leftx")),
+                                                                float(T.attrib.get("lefty")) ),
+                                                        QPointF(float(T.attrib.get("rightx")),
+                                                                float(T.attrib.get("righty")) )
+                                            ) )
+
+                    if polyLineType == SPLINE:
+                        #get End tangents
+                        endT = path.find("EndTangent")
+                        if endT is not None:
+                            tangents.append( (  QPointF(float(endT.attrib.get("x")),
+                                                float(endT.attrib.get("y")) ),
+                                                QPointF(0,0)
+                                            ) )
+
+                edgeLable = polylineedge.find("EdgeLabel")
+                if edgeLable is not None:
+                    edgeName = edgeLable.text
+                    for edgeNameAttribs in edgeLable.iter("metadataAttribute"):
+                        #Deal with Boolean for display (This is why you should use the proper key types!)
+                        if edgeNameAttribs.attrib.get("key") == 'display':
+                            edgeMetadataAttributes['name'] = {'display':edgeNameAttribs.attrib.get("value") == "True"}
+                        else:
+                            edgeMetadataAttributes['name'] = {edgeNameAttribs.attrib.get("key"): edgeNameAttribs.attrib.get("value")}                        
+
+        #Read any additional metadata
+        for metaEl in xEdge.iter("metadata"):
+            metaKey = metaEl.attrib.get("key")
+            edgeMetadata[metaKey] = metaEl.attrib.get("value")
+            for edgeNameAttribs in metaEl.iter("metadataAttribute"):
+                #Deal with Boolean for display (This is why you should use the proper key types!)
+                if edgeNameAttribs.attrib.get("key") == 'display':
+                    edgeMetadataAttributes[metaKey] = {'display':edgeNameAttribs.attrib.get("value") == "True"}
+                else:
+                    edgeMetadataAttributes[metaKey] = {edgeNameAttribs.attrib.get("key"): edgeNameAttribs.attrib.get("value")}
+
+        #All the data read
+        return dict(sItem=sItem, eItem=eItem, 
+                    directed=directed,  nameP=edgeName, id = id,
+                    polyLineType = polyLineType, points=points,tangents=tangents,
+                    metadata=edgeMetadata, metadataAttributes=edgeMetadataAttributes,
+                    tangentModel=tangentModel   )
+
+    def fillDefaultTangents(self, edgeArgs:List[dict]):
+        """ Work out the tangents of the splines in edgeArgs (from edgeArgsFromXML) that have none,
+            all those with the same tangent model in one batch """
+        byModel = {}
+        for args in edgeArgs:
+            if (args['polyLineType'] == SPLINE and not args['tangents']
+                    and args['sItem'] is not None and args['eItem'] is not None):
+                byModel.setdefault(args['tangentModel'], []).append(args)
+
+        for model, group in byModel.items():
+            splines = [xyList([args['sItem'].pos()] + args['points'] + [args['eItem'].pos()]) for args in group]
+            allTangents = splineGeometry.defaultTangentsMany(splines, HermiteSplineItem.scaleFactor, model,
+                                                             HERMITE_TENSION, CARDINAL_TENSION)
+            for args, tangents in zip(group, allTangents):
+                args['tangents'] = [(QPointF(*tIn), QPointF(*tOut)) for tIn, tOut in tangents]
+
+    def loadGraphML(self, graphStr:str):
+        """ Create the nodes & edges in a graphml (yEd-style) string, into this scene & its model """
+        # Preprocessing of file for ease of parsing
+        graphStr = cleanGraphML(graphStr)
+
+        # Get major graph node
+        root = ET.fromstring(graphStr)
+
+        graphStr = root.find("graph")
+        if graphStr is not None:
+            # get major graph info
+            graphDir = graphStr.get("edgedefault")
+            self.model.isDirected = graphDir == "directed"
+        else: 
+            self.model.isDirected = ISDIGRAPH 
+
+        #Track the old -> new IDs to deal with string IDs, and hook up edges
+        oldToNewID = {}
+
+        #Nodes
+        for xNode in graphStr.iter("node"):
+            #print(f"FileOpen - nodes: {ET.tostring(xNode)=}")
+            #Handle yEd-style string IDs
+            fileID = xNode.attrib.get("id")
+            try: #is the read ID a valid int- use it
+                id = int(fileID)
+                newID = False
+            except ValueError: #No - generate a new one.
+                newID = True
+
+            GItem = self.nodeFromXML(xNode, newID=newID)
+            #Track it, even if it doesn't change - simplifies the edge code
+            oldToNewID[fileID] = GItem.nodeNum
+            #TODO: Do something meaningful with mismatches
+            #if fileID != GItem.nodeNum:
+            #    print(f"WARNING: node id {fileID=} changed on load")
+            
+            self.addItem(GItem)
+            GItem.setFlag(QGraphicsItem.ItemIsSelectable, True)
+            GItem.setFlag(QGraphicsItem.ItemIsMovable, True)    
+
+        #Edges: all read first, so the splines without tangents get them in one batch
+        edgeArgs = []
+        for xEdge in graphStr.iter("edge"):
+            #Handle yEd-style string IDs
+            fileID = xEdge.attrib.get("id")
+            try: #is the read ID a valid int- use it
+                id = int(fileID)
+                newID = False
+            except ValueError: #No - generate a new one.
+                newID = True
+            
+            sItemID = xEdge.attrib.get("source", None)
+            eItemID = xEdge.attrib.get("target", None)
+            edgeArgs.append(self.edgeArgsFromXML(xEdge, newID=newID, 
+                                                 newStartID=oldToNewID[sItemID],
+                                                 newEndID = oldToNewID[eItemID]))
+        self.fillDefaultTangents(edgeArgs)
+
+        for args in edgeArgs:
+            edgeItem = VisEdgeItem(self.model, self.listWidget, **args)
+
+            #Add to Scene
+            self.addItem(edgeItem)
+            edgeItem.setFlag(QGraphicsItem.ItemIsSelectable, True)
+            edgeItem.setFlag(QGraphicsItem.ItemIsMovable, False)
+
+        #Big graphs: draw the idle nodes & edges in batches
+        if USE_NODE_LAYER and len(self.nodes()) >= NODE_LAYER_MIN_NODES:
+            self.nodeLayer.setLayerEnabled(True)
+        if USE_EDGE_LAYER and len(self.edges()) >= EDGE_LAYER_MIN_EDGES:
+            self.edgeLayer.setLayerEnabled(True)
+        self.update()
+
+    def toGraphML(self) -> str:
+        """ The scene's nodes & edges as a (pretty printed) yEd-style graphml string.
+            Heavily based on yEdx code """
+        #Generate the graph header info
+        # Creating XML structure in Graphml format
+        # Reference: yEdxFileOnly: construct_graphml
+        # xml = ET.Element("?xml", version="1.0", encoding="UTF-8", standalone="no")
+
+        graphml = ET.Element("graphml", xmlns="http://graphml.graphdrawing.org/xmlns")
+        graphml.set("xmlns:java", "http://www.yworks.com/xml/yfiles-common/1.0/java")
+        graphml.set("xmlns:sys", "http://www.yworks.com/xml/yfiles-common/markup/primitives/2.0")
+        graphml.set("xmlns:x", "http://www.yworks.com/xml/yfiles-common/markup/2.0")
+        graphml.set("xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance")
+        graphml.set("xmlns:y", "http://www.yworks.com/xml/graphml")
+        graphml.set("xmlns:yed", "http://www.yworks.com/xml/yed/3")
+        graphml.set("xmlns:h", "http://www.isijingi.co.za/higraph")
+        graphml.set(
+            "xsi:schemaLocation",
+            "http://graphml.graphdrawing.org/xmlns http://www.yworks.com/xml/schema/graphml/1.1/ygraphml.xsd",
+        )
+
+        # Adding some implementation specific keys for identifying urls, descriptions
+        nodeKey = ET.SubElement(graphml, "key", id="data_node")
+        nodeKey.set("for", "node")
+        nodeKey.set("yfiles.type", "nodegraphics")
+
+        edgeKey = ET.SubElement(graphml, "key", id="data_edge")
+        edgeKey.set("for", "edge")
+        edgeKey.set("yfiles.type", "edgegraphics")
+
+
+        # Graph node containing actual objects
+        if self.model.isDigraph:
+            directed = 'directed'
+        else:
+            directed = 'undirected'
+
+        graph = ET.SubElement(graphml, "graph", edgedefault=directed, id="G")
+
+        #Add the nodes & edges (parked nodes aren't in items())
+        for sItem in self.nodes() + self.edges():
+            graph.append(sItem.toXML(graph))
+
+        #Add the keys for the metadata at graph level
+
+        #Write to file
+        raw_str = ET.tostring(graphml)
+        pretty_str = minidom.parseString(raw_str).toprettyxml()
+        return pretty_str
+
+    def exportSvg(self, filePath:str):
+        """ Write the scene's content to an SVG file """
+        # Create SVG generator
+        generator = QSvgGenerator()
+        generator.setFileName(filePath)
+        #Snug to the content, rather than the (ever-growing) sceneRect
+        sceneRect = self.contentBounds()
+        targetRect = QRectF(0, 0, sceneRect.width(), sceneRect.height())
+        generator.setSize(targetRect.size().toSize())
+        generator.setViewBox(targetRect)
+
+        generator.setTitle(f"{APP_NAME} Export")
+
+        # Paint the scene into the generator
+        #TODO: Deselect before painting, then reselect (copy from copy bitmap code)
+        painter = QPainter(generator)
+        self.render(painter, targetRect, sceneRect)
+        painter.end()
+
+    def update(self, rect=QRectF()):
+        #print("scene updating")
+        #logging.debug("Scene updating")
+        super().update(rect)
+
+
+#=======
+# "monkey patch" QListWidget to create data() sorted lists
+# can't properly extend QListWidget 'cos it's setup in the .ui file
+# Courtesy of chatGPT
+
+# Store original addItem method
+_original_addItem = QListWidget.addItem
+
+# Add sort_roles attribute to QListWidget instances
+def _addItem_with_sort(self, item):
+    _original_addItem(self, item)
+    roles = getattr(self, "_sort_roles", None)
+    if roles:
+        _resort_items(self, roles)
+
+def _resort_items(widget, roles):
+    items = []
+    while widget.count():
+        items.append(widget.takeItem(0))
+    #TODO: Make sort by name an option
+    items.sort(key=lambda item: tuple(item.data(role) for role in roles))
+    for item in items:
+        _original_addItem(widget, item)
+
+def set_sort_roles(self, roles):
+    self._sort_roles = roles
+    _resort_items(self, roles)
+# Patch methods into QListWidget
+QListWidget.addItem = _addItem_with_sort
+QListWidget.setSortRoles = set_sort_roles
+
+def findItemByIdx(self,idx):
+    """another patch to LWid
+      feed in a ROLE_INDEX value, and get the item out, or none.
+      Uses an ID index, rebuilt when it misses (items taken/ re-sorted since) """
+    index = getattr(self, "_idIndex", {})
+    item = index.get(idx)
+    if item is not None and item.listWidget() is self:
+        return item
+    self._idIndex = {self.item(row).data(KEY_INDEX): self.item(row) for row in range(self.count())}
+    return self._idIndex.get(idx)
+QListWidget.findItemByIdx = findItemByIdx
+
+def findItemRowByIdx(self,idx):
+    """another patch to LWid
+      feed in a ROLE_INDEX value, and get the item out, or none """
+    item = self.findItemByIdx(idx)
+    if item is None:
+        return None
+    return self.row(item)
+QListWidget.findItemRowByIdx = findItemRowByIdx
+
+_original_clear = QListWidget.clear
+
+def _clear_with_index(self):
+    """ the ID index holds the items clear() deletes - drop it first """
+    self._idIndex = {}
+    _original_clear(self)
+QListWidget.clear = _clear_with_index
+
+#end monkeypatch    
+#=======
+
+
+#Some global helper functions
+class CodeExecDialog(QDialog):
     """Let the user run arbitrary Python code against the model """
     def __init__(self, parent=None, scene=None):
         super().__init__(parent)
@@ -1808,10 +2596,43 @@ class CodeExecDialog(QDialog):
         self.outputEdit.setPlainText(output)
 
 
+def bezierToSpline(sItem, eItem, controls:list):
+    """ (mid points, tangents) of the Hermite spline that is exactly a yEd Bezier edge from sItem to eItem,
+        given the control points between the nodes. Empty (a default spline) if they don't make whole segments """
+    if not controls or len(controls) % 3 != 2 or sItem is None or eItem is None:
+        return [], []
+    allPoints = [sItem.pos()] + controls + [eItem.pos()]
+    ins = [QPointF(0,0)]
+    outs = []
+    for i in range(0, len(allPoints) - 1, 3):
+        tOut, tIn = bezierToHermite(*allPoints[i:i+4])
+        outs.append(tOut)
+        ins.append(tIn)
+    outs.append(QPointF(0,0))
+    return allPoints[3:-1:3], list(zip(ins, outs))
+
+
+def cleanGraphML(graphStr:str) -> str:
+    """ Preprocess a graphml string for ease of parsing: flatten whitespace, drop the schema & namespace prefixes """
+    #TODO: Check how this will mess with multiline metadata
+    graphStr = graphStr.replace("\n", " ")  # line returns
+    graphStr = graphStr.replace("\r", " ")  # line returns
+    graphStr = graphStr.replace("\t", " ")  # tabs
+    graphStr = re.sub("<graphml .*?>", "<graphml>", graphStr)  # unneeded schema
+    graphStr = graphStr.replace("> <", "><")  # empty text
+    graphStr = graphStr.replace("y:", "")  # unneeded namespace prefix
+    graphStr = graphStr.replace("xml:", "")  # unneeded namespace prefix
+    graphStr = graphStr.replace("h:", "")  # unneeded namespace prefix
+
+    graphStr = graphStr.replace("yfiles.", "")  # unneeded namespace prefix
+    graphStr = re.sub(" {1,}", " ", graphStr)  # reducing redundant spaces
+    return graphStr
+
+
 def zoomToFitWithMargin(view, margin=0.25):
     """ chatGpt. Pass in a QGraphicsView and a margin multiplier  """
     # Get bounding rect of all items
-    sceneRect = view.scene().itemsBoundingRect()
+    sceneRect = view.scene().contentBounds()
 
     if sceneRect.isNull():
         # Nothing to fit
@@ -1895,12 +2716,13 @@ class MainWindow(QMainWindow):
         #setup the list to sort by TYPE then ID (using patched function above)
         self.ui.listWidget.setSortRoles( (KEY_ROLE,KEY_INDEX) )
         self.ui.listWidget.itemChanged.connect(self.updateSceneText)
-        self.ui.listWidget.itemClicked.connect(self.listClick)
         self.ui.listWidget.itemDoubleClicked.connect(self.listDblClicked)
 
         #Setup the graphicsView, linking model,scene and list. Scene needs to know the mainwindow to call dialogs, etc
         self.Scene = grScene(self.model,self.ui.listWidget,self)
-        self.Scene.selectionChanged.connect(self.actionSceneSelectChange(self.Scene))
+        #Selecting in either the list or the scene selects in the other
+        self.selection = SelectionSync(self.Scene, self.ui.listWidget, self)
+        self.selection.selectionSynced.connect(self.actionSceneSelectChange)
     
         self.Scene.edgeEditRequested.connect(self.showEditEdgeDialog)
         self.Scene.nodeEditRequested.connect(self.showEditNodeDialog)
@@ -1908,6 +2730,8 @@ class MainWindow(QMainWindow):
         self.ui.graphicsView.setScene(self.Scene)
         self.ui.graphicsView.setRenderHint(QPainter.Antialiasing)
         self.ui.graphicsView.setDragMode(QGraphicsView.RubberBandDrag)
+        #Rubber bands select parked nodes & edges too
+        self.ui.graphicsView.rubberBandChanged.connect(self.Scene.viewRubberBandChanged)
         self.ui.graphicsView.setTransformationAnchor(QGraphicsView.AnchorUnderMouse)
         #TODO: Make this image centre until scrollwheel zooming is fixed
         self.ui.graphicsView.setResizeAnchor(QGraphicsView.AnchorUnderMouse)
@@ -1959,6 +2783,14 @@ class MainWindow(QMainWindow):
         self.ui.action_Delete.triggered.connect(self.action_EditDelete)
         self.ui.actionSelect_All.triggered.connect(self.action_EditSelectAll)
         self.ui.actionSelect_None.triggered.connect(self.action_EditSelectNone)
+        #Bulk selections, after Select None
+        for text, slot in (("Select Nodes", self.action_EditSelectNodes),
+                           ("Select Edges", self.action_EditSelectEdges),
+                           ("Invert Selection", self.action_EditInvertSelection),
+                           ("Select by Metadata...", self.action_EditSelectByMetadata)):
+            action = QAction(text, self)
+            action.triggered.connect(slot)
+            self.ui.menuEdit.insertAction(self.ui.actionZoomIn, action)
         self.ui.actionZoomIn.triggered.connect(self.action_EditZoomIn)
         self.ui.actionZoomOut.triggered.connect(self.action_EditZoomOut)
 
@@ -1967,6 +2799,17 @@ class MainWindow(QMainWindow):
         self.execCodeAction.triggered.connect(self.showCodeDialog)
         self.ui.menuTools.addAction(self.execCodeAction)
 
+        #Views - all share the one scene, each with its own zoom & detail
+        self.ui.menuTools.addSeparator()
+        self.overviewAction = QAction("Overview", self)
+        self.overviewAction.setCheckable(True)
+        self.overviewAction.toggled.connect(self.action_ViewOverview)
+        self.ui.menuTools.addAction(self.overviewAction)
+        self.newViewAction = QAction("New View", self)
+        self.newViewAction.triggered.connect(self.action_ViewNew)
+        self.ui.menuTools.addAction(self.newViewAction)
+        self.overviewDock = None
+
         #Help
         self.ui.action_About.triggered.connect(self.action_HelpAbout)
         self.ui.action_Credits.triggered.connect(self.action_HelpCredits)
@@ -1982,6 +2825,27 @@ class MainWindow(QMainWindow):
         self.ui.graphicsView.scale(scale, scale)       # Apply new zoom
         self.zoom_label.setText(f"Zoom: {value}%")
 
+    def action_ViewOverview(self, show:bool):
+        """ show/ hide a dock with the whole graph, outlining (and steering) the main view """
+        if self.overviewDock is None:
+            self.overviewDock = QDockWidget("Overview", self)
+            self.overviewDock.setWidget(OverviewView(self.Scene, self.ui.graphicsView, self.overviewDock))
+            self.overviewDock.visibilityChanged.connect(self.overviewAction.setChecked)
+            self.addDockWidget(Qt.RightDockWidgetArea, self.overviewDock)
+        self.overviewDock.setVisible(show)
+        if show:
+            self.overviewDock.widget().fitContent()
+
+    def action_ViewNew(self):
+        """ open another editable view of the graph, in a dock. Closing it deletes it """
+        dock = QDockWidget("View", self)
+        dock.setAttribute(Qt.WA_DeleteOnClose)
+        view = GraphView(self.Scene, dock)
+        view.setTransform(self.ui.graphicsView.transform())
+        dock.setWidget(view)
+        self.addDockWidget(Qt.RightDockWidgetArea, dock)
+        view.centerOn(self.ui.graphicsView.mapToScene(self.ui.graphicsView.viewport().rect().center()))
+
     #Action Code
 
     def showCodeDialog(self):
@@ -2017,19 +2881,6 @@ class MainWindow(QMainWindow):
         self.statusBar().showMessage("Select Mode",3000)
         self.Scene.mouseMode = grScene.POINTER
 
-    def listClick(self,item):
-        #print(f"listClick {item} , {item.text()}")
-        #clear the selection
-        self.Scene.clearSelection()
-        #select the *graphics* view of the clicked item as well
-        idx = item.data(KEY_INDEX)
-        for sItem in self.Scene.items():
-            if sItem.data(KEY_ROLE) in [ROLE_NODE, ROLE_EDGE]:
-                if sItem.data(KEY_INDEX) == idx: # iNum:
-                    sItem.setSelected(True)
-                    #print(idx)
-                    #break
-
     def listDblClicked(self,item):
         #print("listDblClicked", item.text(), item.index())
         #item.setFlags(item.flags() | Qt.ItemIsEditable)
@@ -2072,26 +2923,21 @@ class MainWindow(QMainWindow):
         #Update of added attrib in the scene
         #TODO: Make this dataChanged.emit() work 
         #Find the index of the visEdge
-        for sItem in self.Scene.items():
-            if sItem.data(KEY_INDEX) == iNum:
-                #TODO: How to get an index to pass?
-                #sIDX = sItem.index()
-                #Just call it directly, with a dummy change item
-                sItem.itemChange(QGraphicsItem.GraphicsItemChange.ItemToolTipChange,0)
+        sItem = self.Scene.findItemByIdx(iNum)
+        if sItem is not None:
+            #TODO: How to get an index to pass?
+            #sIDX = sItem.index()
+            #Just call it directly, with a dummy change item
+            sItem.itemChange(QGraphicsItem.GraphicsItemChange.ItemToolTipChange,0)
             #self.model.dataChanged.emit(sIDX, sIDX)
 
         self.Scene.update()
         self.ui.listWidget.repaint()
 
-    def actionSceneSelectChange(self, scene):
-
-        selected_items = scene.selectedItems()
-        if selected_items:
-            print("Selected items:")
-            for item in selected_items:
-                print("  ", item)
-        #else:
-        #    print("No items selected.")
+    def actionSceneSelectChange(self, selectedIds):
+        """ scene & list selections are in step (one call per batch, from the SelectionSync) """
+        if selectedIds:
+            self.statusBar().showMessage(f"{len(selectedIds)} selected",2000)
 
     #Menu-like Actions
     def action_FileNew(self):
@@ -2114,174 +2960,8 @@ class MainWindow(QMainWindow):
         #TODO: Reset the temp vars for odd reloads
         # eg self.onlySelected
         self.Scene.clear()
-
-    def nodeFromXML(self,xNode,newID=False)->VisNodeItem:
-        """ Create a new node from an XML string
-            if newID is True, the item is created with a newID,otherwise, the read value.
-            This is the difference between file load (new items) and edit paste (structure)
-            Returns VisNodeItem
-        """
-        #Use old yEd + load code
-        nodeMetadata = {}
-        nodeMetadataAttributes = {}
-
-        #TODO: type check id
-        if not newID:
-            id = int(xNode.attrib.get("id"))
-        else:
-            id = ''
-        for dataNode in xNode.iter("data"):
-            shapeNode = dataNode.find("ShapeNode")
-            if shapeNode != None:
-                # Geometry information
-                geom = shapeNode.find("Geometry")
-                if geom is not None:
-                    nodeX = float(geom.get("x"))
-                    nodeY = float(geom.get("y"))
-                    #geometry_vars = ["height", "width", "x", "y"]
-
-                nodeLable = shapeNode.find("NodeLabel")
-                if nodeLable is not None:
-                    nodeName = nodeLable.text.strip()
-                    for nodeNameAttribs in nodeLable.iter("metadataAttribute"):
-                        #nodeMetadataAttributes['name'] = {nodeNameAttribs.attrib.get("key"): nodeNameAttribs.attrib.get("value")}
-                        #Deal with Boolean for display (This is why you should use the proper key types!)
-                        if nodeNameAttribs.attrib.get("key") == 'display':
-                            nodeMetadataAttributes['name'] = {'display':nodeNameAttribs.attrib.get("value") == "True"}
-                        else:
-                            nodeMetadataAttributes['name'] = {nodeNameAttribs.attrib.get("key"): nodeNameAttribs.attrib.get("value")}
-
-            #TODO: Add in error processing for corrupt/ odd files
-        # Look for a metadata node
-        for metaEl in xNode.iter("metadata"):
-            metaKey = metaEl.attrib.get("key")
-            nodeMetadata[metaKey] = metaEl.attrib.get("value").strip()
-            for nodeNameAttribs in metaEl.iter("metadataAttribute"):
-                #Deal with Boolean for display (This is why you should use the proper key types!)
-                #TODO: Get the boolean value into the XML
-                if nodeNameAttribs.attrib.get("key") == 'display':
-                    nodeMetadataAttributes[metaKey] = {'display':nodeNameAttribs.attrib.get("value") == "True"}
-                else:
-                    nodeMetadataAttributes[metaKey] = {nodeNameAttribs.attrib.get("key"): nodeNameAttribs.attrib.get("value")}
-
-        newNode =  VisNodeItem(QPointF(nodeX,nodeY),self.model,self.ui.listWidget ,nameP=nodeName, id = id,
-                                metadata=nodeMetadata, metadataAttributes=nodeMetadataAttributes)
-        return newNode
-
-    def edgeFromXML(self,xEdge,newID=False,newStartID=None, newEndID=None)->VisEdgeItem:
-        """ Create a new edge from an XML string
-            if newID is True, the item is created with a newID,otherwise, the read value.
-            This is the difference between file load (new items) and edit paste (structure)
-            newStartID & newEndID also must be overwritten on paste/ structure copy
-            Returns VisEdgeItem
-        """
-        #Use old yEd + load code
-        #print(ET.tostring(xEdge))
-        
-
-        if not newID:
-            #TODO: type check id/ process string IDs
-            id = int(xEdge.attrib.get("id"))
-        else:
-            id = ''
-        
-        #TODO: yEd uses string IDs, not ints :/
-        if newStartID is not None: #Note: Can't use "truthy" here since 0 is a valid option!
-            sItemID = newStartID
-        else:
-            sItemID = int(xEdge.attrib.get("source", None))
-
-        if newEndID is not None:
-            eItemID = newEndID
-        else:
-            eItemID = int(xEdge.attrib.get("target", None))
-
-        sItem = self.Scene.findItemByIdx(sItemID)
-        eItem = self.Scene.findItemByIdx(eItemID)
-        if sItem == None:
-            print(f"WARNING! - Start Item ID {sItemID} not found ")
-        if eItem == None:
-            print(f"WARNING! - End Item ID {eItemID} not found ")
-        #Find the items
-
-        directed = xEdge.attrib.get("directed", '')
-        edgeMetadata = {}
-        edgeMetadataAttributes = {}
-
-        for dataEdge in xEdge.iter("data"):
-            points=[]
-            tangents = []
-            polylineedge = dataEdge.find("PolyLineEdge")
-            polyLineType = STRAIGHT
-            if polylineedge is None:
-                polylineedge = dataEdge.find("QuadCurveEdge")
-                polyLineType = SPLINE 
-            if polylineedge is not None:
-                path = polylineedge.find("Path")
-                if path is not None:
-                    if polyLineType == SPLINE:
-                        #get tangents
-                        startT = path.find("StartTangent")
-                        if startT is not None: 
-                            #Each list entry is a tuple of tuples!
-                            tangents.append( ( QPointF(0,0),
-                                               QPointF(float(startT.attrib.get("x")),
-                                                   float(startT.attrib.get("y")) )
-                                            ) )
-                        
-                    pathPoints = path.findall("Point")
-                    if pathPoints is not None:
-                        points = []
-                        for pt in pathPoints:
-                            points.append( QPointF(float(pt.attrib.get("x")),
-                                            float(pt.attrib.get("y"))) )
-                            #if QuadCurve, #get tangents
-                            if polyLineType == SPLINE:
-                                T = pt.find("Tangent")
-                                if T is not None:
-                                    tangents.append( ( QPointF(float(T.attrib.get("leftx")),
-                                                                float(T.attrib.get("lefty")) ),
-                                                        QPointF(float(T.attrib.get("rightx")),
-                                                                float(T.attrib.get("righty")) )
-                                            ) )
-
-                    if polyLineType == SPLINE:
-                        #get End tangents
-                        endT = path.find("EndTangent")
-                        if endT is not None:
-                            tangents.append( (  QPointF(float(endT.attrib.get("x")),
-                                                float(endT.attrib.get("y")) ),
-                                                QPointF(0,0)
-                                            ) )
-
-                edgeLable = polylineedge.find("EdgeLabel")
-                if edgeLable is not None:
-                    edgeName = edgeLable.text
-                    for edgeNameAttribs in edgeLable.iter("metadataAttribute"):
-                        #Deal with Boolean for display (This is why you should use the proper key types!)
-                        if edgeNameAttribs.attrib.get("key") == 'display':
-                            edgeMetadataAttributes['name'] = {'display':edgeNameAttribs.attrib.get("value") == "True"}
-                        else:
-                            edgeMetadataAttributes['name'] = {edgeNameAttribs.attrib.get("key"): edgeNameAttribs.attrib.get("value")}                        
-
-        #Read any additional metadata
-        for metaEl in xEdge.iter("metadata"):
-            metaKey = metaEl.attrib.get("key")
-            edgeMetadata[metaKey] = metaEl.attrib.get("value")
-            for edgeNameAttribs in metaEl.iter("metadataAttribute"):
-                #Deal with Boolean for display (This is why you should use the proper key types!)
-                if edgeNameAttribs.attrib.get("key") == 'display':
-                    edgeMetadataAttributes[metaKey] = {'display':edgeNameAttribs.attrib.get("value") == "True"}
-                else:
-                    edgeMetadataAttributes[metaKey] = {edgeNameAttribs.attrib.get("key"): edgeNameAttribs.attrib.get("value")}
-
-        #All the data read, create the edge
-        newEdge = VisEdgeItem(self.model,self.ui.listWidget,sItem, eItem, 
-                                directed=directed,  nameP=edgeName, id = id,
-                                polyLineType = polyLineType, points=points,tangents=tangents,
-                                metadata=edgeMetadata, metadataAttributes=edgeMetadataAttributes   )
-
-        return newEdge
+        self.selection.reset()
+        reportLeaks("file new")
 
     def action_FileOpen(self):
         """ Read a graphml file in, create all the elements """
@@ -2309,137 +2989,22 @@ class MainWindow(QMainWindow):
             raise FileNotFoundError(f"Error, file not found: {graphFile}")
 
 
-        # Preprocessing of file for ease of parsing
-        #TODO: Check how this will mess with multiline metadata
-        graphStr = graphStr.replace("\n", " ")  # line returns
-        graphStr = graphStr.replace("\r", " ")  # line returns
-        graphStr = graphStr.replace("\t", " ")  # tabs
-        graphStr = re.sub("<graphml .*?>", "<graphml>", graphStr)  # unneeded schema
-        graphStr = graphStr.replace("> <", "><")  # empty text
-        graphStr = graphStr.replace("y:", "")  # unneeded namespace prefix
-        graphStr = graphStr.replace("xml:", "")  # unneeded namespace prefix
-        graphStr = graphStr.replace("h:", "")  # unneeded namespace prefix
-
-        graphStr = graphStr.replace("yfiles.", "")  # unneeded namespace prefix
-        graphStr = re.sub(" {1,}", " ", graphStr)  # reducing redundant spaces
-
-        # Get major graph node
-        root = ET.fromstring(graphStr)
-
-        graphStr = root.find("graph")
-        if graphStr is not None:
-            # get major graph info
-            graphDir = graphStr.get("edgedefault")
-            self.model.isDirected = graphDir == "directed"
-        else: 
-            self.model.isDirected = ISDIGRAPH 
-
-        #Track the old -> new IDs to deal with string IDs, and hook up edges
-        oldToNewID = {}
-
-        #Nodes
-        for xNode in graphStr.iter("node"):
-            #print(f"FileOpen - nodes: {ET.tostring(xNode)=}")
-            #Handle yEd-style string IDs
-            fileID = xNode.attrib.get("id")
-            try: #is the read ID a valid int- use it
-                id = int(fileID)
-                newID = False
-            except ValueError: #No - generate a new one.
-                newID = True
-
-            GItem = self.nodeFromXML(xNode, newID=newID)
-            #Track it, even if it doesn't change - simplifies the edge code
-            oldToNewID[fileID] = GItem.nodeNum
-            #TODO: Do something meaningful with mismatches
-            #if fileID != GItem.nodeNum:
-            #    print(f"WARNING: node id {fileID=} changed on load")
-            
-            self.Scene.addItem(GItem)
-            GItem.setFlag(QGraphicsItem.ItemIsSelectable, True)
-            GItem.setFlag(QGraphicsItem.ItemIsMovable, True)    
-
-        #Edges
-        for xEdge in graphStr.iter("edge"):
-            #Handle yEd-style string IDs
-            fileID = xEdge.attrib.get("id")
-            try: #is the read ID a valid int- use it
-                id = int(fileID)
-                newID = False
-            except ValueError: #No - generate a new one.
-                newID = True
-            
-            sItemID = xEdge.attrib.get("source", None)
-            eItemID = xEdge.attrib.get("target", None)
-            edgeItem = self.edgeFromXML(xEdge, newID=newID, 
-                                            newStartID=oldToNewID[sItemID],
-                                            newEndID = oldToNewID[eItemID])
-
-            #Add to Scene
-            self.Scene.addItem(edgeItem)
-            edgeItem.setFlag(QGraphicsItem.ItemIsSelectable, True)
-            edgeItem.setFlag(QGraphicsItem.ItemIsMovable, False)
-        
-        self.Scene.update()
+        self.Scene.loadGraphML(graphStr)
 
         self.setWindowTitle(str(os.path.basename(self.fileName)) + " " + APP_NAME + "[*]")
 
         self.setZoom(100)
         zoomToFitWithMargin(self.ui.graphicsView, margin=0.2)
+        reportLeaks("file open")
 
     def action_FileSave(self):
         """ 
-            Write the graph to a yEd-style graphml file.
-            Heavily based on yEdx code
+            Write the graph to a yEd-style graphml file (see grScene.toGraphML()).
         """
         if self.fileName:
+            #Build the graphml
+            pretty_str = self.Scene.toGraphML()
 
-                #Generate the graph header info
-            # Creating XML structure in Graphml format
-            # Reference: yEdxFileOnly: construct_graphml
-            # xml = ET.Element("?xml", version="1.0", encoding="UTF-8", standalone="no")
-
-            graphml = ET.Element("graphml", xmlns="http://graphml.graphdrawing.org/xmlns")
-            graphml.set("xmlns:java", "http://www.yworks.com/xml/yfiles-common/1.0/java")
-            graphml.set("xmlns:sys", "http://www.yworks.com/xml/yfiles-common/markup/primitives/2.0")
-            graphml.set("xmlns:x", "http://www.yworks.com/xml/yfiles-common/markup/2.0")
-            graphml.set("xmlns:xsi", "http://www.w3.org/2001/XMLSchema-instance")
-            graphml.set("xmlns:y", "http://www.yworks.com/xml/graphml")
-            graphml.set("xmlns:yed", "http://www.yworks.com/xml/yed/3")
-            graphml.set("xmlns:h", "http://www.isijingi.co.za/higraph")
-            graphml.set(
-                "xsi:schemaLocation",
-                "http://graphml.graphdrawing.org/xmlns http://www.yworks.com/xml/schema/graphml/1.1/ygraphml.xsd",
-            )
-
-            # Adding some implementation specific keys for identifying urls, descriptions
-            nodeKey = ET.SubElement(graphml, "key", id="data_node")
-            nodeKey.set("for", "node")
-            nodeKey.set("yfiles.type", "nodegraphics")
-
-            edgeKey = ET.SubElement(graphml, "key", id="data_edge")
-            edgeKey.set("for", "edge")
-            edgeKey.set("yfiles.type", "edgegraphics")
-
-
-            # Graph node containing actual objects
-            if self.model.isDigraph:
-                directed = 'directed'
-            else:
-                directed = 'undirected'
-
-            graph = ET.SubElement(graphml, "graph", edgedefault=directed, id="G")
-
-            #Add the nodes & edges
-            for sItem in self.Scene.items():
-                if sItem.data(KEY_ROLE) == ROLE_NODE or sItem.data(KEY_ROLE) == ROLE_EDGE :
-                    graph.append(sItem.toXML(graph))
-
-            #Add the keys for the metadata at graph level
-
-            #Write to file
-            raw_str = ET.tostring(graphml)
-            pretty_str = minidom.parseString(raw_str).toprettyxml()
             #TODO: Check pathing!
             with open(self.fileName, "w") as f:
                 f.write(pretty_str)
@@ -2481,19 +3046,20 @@ class MainWindow(QMainWindow):
         if printDialog.exec() == QPrintDialog.Accepted:
             painter = QPainter(printer)
             
-            # Get the full scene rectangle
-            sceneRect = self.Scene.sceneRect()
+            # Get the content rectangle
+            sceneRect = self.Scene.contentBounds()
             #print(f"{sceneRect =}")
+            if sceneRect.isEmpty():
+                painter.end()
+                return
 
             # Compute scale to fit scene onto the page
-            #TODO: Apply a human brain to this scaling - this gives weird results.
             pageRect = printer.pageRect(QPrinter.DevicePixel).toRect()
             #print(f"{pageRect =}")
             xScale = pageRect.width() / sceneRect.width()
             yScale = pageRect.height() / sceneRect.height()
             scale = min(xScale, yScale)
             #print(f"{scale =}")
-            scale = scale/5 #needs tweaking
 
             # Center the scene on the page
             xOffset = (pageRect.width() - sceneRect.width() * scale) / 2
@@ -2502,8 +3068,8 @@ class MainWindow(QMainWindow):
             painter.translate(xOffset, yOffset)
             painter.scale(scale, scale)
         
-            # Render the scene
-            self.Scene.render(painter)
+            # Render the scene, 1:1 in the scaled painter
+            self.Scene.render(painter, QRectF(0, 0, sceneRect.width(), sceneRect.height()), sceneRect)
 
             painter.end()
 
@@ -2543,20 +3109,7 @@ class MainWindow(QMainWindow):
         if not filePath:
             return  # User cancelled
 
-        # Create SVG generator
-        generator = QSvgGenerator()
-        generator.setFileName(filePath)
-        #TODO: bounding box still not snug, but workable.
-        generator.setSize(self.Scene.sceneRect().size().toSize())  #itemsBoundingRect().size().toSize())
-
-        #TODO: Why is there a lot of white space at the top left?
-        generator.setTitle(f"{APP_NAME} Export")
-
-        # Paint the scene into the generator
-        #TODO: Deselect before painting, then reselect (copy from copy bitmap code)
-        painter = QPainter(generator)
-        self.Scene.render(painter)
-        painter.end()
+        self.Scene.exportSvg(filePath)
 
     def action_EditCopy(self):
         """ chatGPT"""
@@ -2720,18 +3273,7 @@ class MainWindow(QMainWindow):
             return #Nothing readable on the clipboard
 
         # Preprocessing of string for ease of parsing
-        #TODO: Check how this will mess with multiline metadata
-        graphStr = graphStr.replace("\n", " ")  # line returns
-        graphStr = graphStr.replace("\r", " ")  # line returns
-        graphStr = graphStr.replace("\t", " ")  # tabs
-        graphStr = re.sub("<graphml .*?>", "<graphml>", graphStr)  # unneeded schema
-        graphStr = graphStr.replace("> <", "><")  # empty text
-        graphStr = graphStr.replace("y:", "")  # unneeded namespace prefix
-        graphStr = graphStr.replace("xml:", "")  # unneeded namespace prefix
-        graphStr = graphStr.replace("h:", "")  # unneeded namespace prefix
-
-        graphStr = graphStr.replace("yfiles.", "")  # unneeded namespace prefix
-        graphStr = re.sub(" {1,}", " ", graphStr)  # reducing redundant spaces
+        graphStr = cleanGraphML(graphStr)
 
         # Get major graph node
         root = ET.fromstring(graphStr)
@@ -2742,7 +3284,7 @@ class MainWindow(QMainWindow):
         oldToNewID = {}
         for xNode in graphStr.iter("node"):
             #print(f"FileOpen - nodes: {ET.tostring(xNode)=}")
-            GItem = self.nodeFromXML(xNode, newID=True)
+            GItem = self.Scene.nodeFromXML(xNode, newID=True)
             oldToNewID[int(xNode.attrib.get("id"))] = GItem.nodeNum
 
             #Bump the pasted items over by PASTE_OFFSET
@@ -2758,12 +3300,15 @@ class MainWindow(QMainWindow):
             sItemID = int(xEdge.attrib.get("source", None))
             eItemID = int(xEdge.attrib.get("target", None))
 
-            edgeItem = self.edgeFromXML(xEdge, newID=True, 
+            edgeItem = self.Scene.edgeFromXML(xEdge, newID=True, 
                                             newStartID=oldToNewID[sItemID],
                                             newEndID = oldToNewID[eItemID])
             #Bump any polyline points over
             for pt in edgeItem.edgeLine._p:
                 pt += QPointF(PASTE_OFFSET,PASTE_OFFSET)
+            if edgeItem._polyEdge == SPLINE:
+                edgeItem.edgeLine.invalidatePath()
+            edgeItem.updateEnds()
 
             #Add to Scene
             self.Scene.addItem(edgeItem)
@@ -2772,6 +3317,7 @@ class MainWindow(QMainWindow):
             edgeItem.setSelected(True)
         
         self.Scene.update()
+        reportLeaks("paste")
 
     #Some helper functions for deletion
 
@@ -2827,26 +3373,37 @@ class MainWindow(QMainWindow):
                     delIdx = item.data(KEY_INDEX)
                     self.delNode(delIdx)
 
-        #logging.debug("about to update from action_EditDelete",stack_info=True  )
-        #gc.collect() #This will crash the whole thing, with no traces
-        #debug_qgraphicsitem_refs()  #More coPilot code ...
-
-        #self.Scene.update()
-        #Trying to get rid of the orphan lines - which go when the view changes so that scrollbars are added.
-        self.Scene.invalidate(self.Scene.sceneRect(), QGraphicsScene.AllLayers)
-        #GC takes some time (~100ms?) to finalise, so delay the repaint
-        QTimer.singleShot(500, lambda: self.ui.graphicsView.viewport().repaint())
-        #self.Scene.invalidate(self.Scene.sceneRect(), QGraphicsScene.AllLayers)
-        self.ui.graphicsView.viewport().repaint()  #update()
-        #self.Scene.invalidate()
+        #Items are detached and repainted locally by deleteItemAndChildren - no full repaint needed
+        #Drop the local references, so the report shows what is really left
+        selected_items = item = None
+        reportLeaks("delete")
 
     def action_EditSelectAll(self):
         #print("Edit>SelectAll")
         #TODO: For multiple scenes from 1 model, what to do? (select model, or scene?)
         #  Maybe select all needs to be context sensitive - scene, or list =model
-        for item in self.Scene.items():
-            if item.GraphicsItemFlag.ItemIsSelectable:
-                item.setSelected(True)
+        self.Scene.selectAllItems()
+
+    def action_EditSelectNodes(self):
+        self.Scene.selectNodes()
+
+    def action_EditSelectEdges(self):
+        self.Scene.selectEdges()
+
+    def action_EditInvertSelection(self):
+        self.Scene.invertSelection()
+
+    def action_EditSelectByMetadata(self):
+        """ select the items with a metadata key (`key`), or key & value (`key=value`) """
+        text, ok = QInputDialog.getText(self, "Select by Metadata", "key, or key=value:")
+        if not ok or not text.strip():
+            return
+        if "=" in text:
+            key, value = [part.strip() for part in text.split("=",1)]
+            self.Scene.selectByMetadata(lambda metadata: key in metadata and str(metadata[key]) == value)
+        else:
+            key = text.strip()
+            self.Scene.selectByMetadata(lambda metadata: key in metadata)
 
     def action_EditSelectNone(self):
         #print("Edit>SelectNone")
@@ -0,0 +1,106 @@
+""" Keeps the scene and list selections in step, keyed by item ID (KEY_INDEX).
+
+Both sides report changes here. Only the IDs that changed are touched on the other side,
+so the work is O(selected), not O(items). Scene selection changes arrive in bursts (a rubber
+band emits one per mouse move), so they are coalesced and applied once the event loop is
+idle. Listeners get one selectionSynced signal per batch, with the full set of selected IDs.
+"""
+
+from PySide6.QtCore import QObject, QTimer, Signal, QItemSelection, QItemSelectionModel
+from PySide6.QtWidgets import QAbstractItemView
+
+from  HGConstants import *
+
+
+class SelectionSync(QObject):
+    """ The shared selection: a set of node/ edge IDs, mirrored into a grScene and its QListWidget """
+    #The selected IDs, once both sides agree
+    selectionSynced = Signal(object)
+
+    def __init__(self, scene, listWidget, parent=None):
+        super().__init__(parent)
+        self.scene = scene
+        self.listWidget = listWidget
+        self.selectedIds = set()
+        #Set while pushing a change, so the echo from the other side is ignored
+        self._syncing = False
+
+        self.listWidget.setSelectionMode(QAbstractItemView.ExtendedSelection)
+
+        self._sceneTimer = QTimer(self)
+        self._sceneTimer.setSingleShot(True)
+        self._sceneTimer.setInterval(0)
+        self._sceneTimer.timeout.connect(self._sceneToList)
+
+        self.scene.selectionChanged.connect(self._sceneChanged)
+        self.listWidget.itemSelectionChanged.connect(self._listToScene)
+
+    def _sceneChanged(self):
+        if not self._syncing:
+            self._sceneTimer.start()
+
+    def _sceneToList(self):
+        """ mirror the scene selection into the list """
+        ids = {item.data(KEY_INDEX) for item in self.scene.selectedItems()
+                    if item.data(KEY_ROLE) in (ROLE_NODE, ROLE_EDGE)}
+        added = ids - self.selectedIds
+        removed = self.selectedIds - ids
+        self.selectedIds = ids
+        if not (added or removed):
+            return
+
+        model = self.listWidget.model()
+        selModel = self.listWidget.selectionModel()
+        self._syncing = True
+        for changed, command in ((removed, QItemSelectionModel.Deselect), (added, QItemSelectionModel.Select)):
+            selection = QItemSelection()
+            for idx in changed:
+                lWItem = self.listWidget.findItemByIdx(idx)
+                if lWItem is not None:
+                    index = model.index(self.listWidget.row(lWItem), 0)
+                    selection.select(index, index)
+            if not selection.isEmpty():
+                selModel.select(selection, command)
+        #Show (but don't re-select) the last item picked
+        if added and lWItem is not None:
+            selModel.setCurrentIndex(index, QItemSelectionModel.NoUpdate)
+            self.listWidget.scrollToItem(lWItem)
+        self._syncing = False
+        self.selectionSynced.emit(set(ids))
+
+    def _listToScene(self):
+        """ mirror the list selection into the scene, as one batch """
+        if self._syncing:
+            return
+        ids = {lWItem.data(KEY_INDEX) for lWItem in self.listWidget.selectedItems()}
+        added = ids - self.selectedIds
+        removed = self.selectedIds - ids
+        self.selectedIds = ids
+        if not (added or removed):
+            return
+
+        self._syncing = True
+        self.scene.blockSignals(True)
+        #Unblocked whatever an item does, or the scene would stop reporting selections
+        try:
+            for idx in removed:
+                item = self.scene.findItemByIdx(idx)
+                if item is not None:
+                    item.setSelected(False)
+            for idx in added:
+                item = self.scene.findItemByIdx(idx)
+                if item is not None:
+                    item.setSelected(True)
+        finally:
+            self.scene.blockSignals(False)
+            self._syncing = False
+        #An edge showing its handles may just have been deselected
+        onlySelected = self.scene.onlySelected
+        if onlySelected and not onlySelected.isSelected():
+            self.scene.clearEdgeOnly(onlySelected)
+        self.selectionSynced.emit(set(ids))
+
+    def reset(self):
+        """ forget the selection (the scene & list have been cleared) """
+        self._sceneTimer.stop()
+        self.selectedIds = set()
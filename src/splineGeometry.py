@@ -0,0 +1,301 @@
+""" Spline & polyline geometry without Qt, shared by the line items (PolyLineItemHG.py, HermiteSpline.py).
+
+Everything here works on plain floats, so it can run headless: in tests, batch jobs & worker processes.
+Points are (x, y) tuples. A spline's tangents are ((in x, in y), (out x, out y)) per point, relative
+to it (the first point's in tangent and the last point's out tangent are unused).
+tension is the factor tangents are scaled by when the curve is computed (HGConstants.HERMITE_TENSION
+for the editor's splines): it is passed in, as HGConstants imports Qt.
+Long splines & polylines go to hermiteKernel (NumPy) if it is installed, short ones are quicker in Python.
+"""
+
+import math
+import bisect
+
+import hermiteKernel
+from hermiteKernel import HAVE_NUMPY
+if HAVE_NUMPY:
+    import numpy as np
+
+#Splines/ polylines with at least this many points use hermiteKernel, shorter ones Python (quicker to set up)
+KERNEL_MIN_POINTS = 10
+
+
+def _inOut(tangents:list) -> list:
+    """ (in, out) pairs of one tangent per point: the ends' outer halves unused (0, 0) """
+    pairs = [(t, t) for t in tangents]
+    pairs[0] = ((0.0, 0.0), tangents[0])
+    pairs[-1] = (tangents[-1], (0.0, 0.0))
+    return pairs
+
+
+def _monotone(points:list) -> list:
+    """ Fritsch-Carlson tangents (as the curve's derivative), for x and y separately: the mean of the
+        secants either side, 0 where they differ in sign, then shortened so no segment overshoots """
+    secants = [(x1 - x0, y1 - y0) for (x0, y0), (x1, y1) in zip(points, points[1:])]
+    tangents = [secants[0]]
+    for (bx, by), (ax, ay) in zip(secants, secants[1:]):
+        tangents.append(((bx + ax) / 2 if bx * ax > 0 else 0.0, (by + ay) / 2 if by * ay > 0 else 0.0))
+    tangents.append(secants[-1])
+
+    #Limit each segment's tangents to alpha^2 + beta^2 <= 9. Shortening only helps the neighbouring
+    # segment, so each point takes the smaller factor of its two segments
+    factors = [[1.0, 1.0] for _ in points]
+    for k, d in enumerate(secants):
+        for axis in (0, 1):
+            if d[axis] != 0:
+                alpha, beta = tangents[k][axis] / d[axis], tangents[k+1][axis] / d[axis]
+                s = alpha*alpha + beta*beta
+                if s > 9:
+                    tau = 3 / math.sqrt(s)
+                    factors[k][axis] = min(factors[k][axis], tau)
+                    factors[k+1][axis] = min(factors[k+1][axis], tau)
+    return [(tx * fx, ty * fy) for (tx, ty), (fx, fy) in zip(tangents, factors)]
+
+
+def defaultTangents(points:list, scale:float, model:str="fixed", tension:float=1, cardinal:float=0.5) -> list:
+    """ (in, out) tangents for a spline through points (at least 2), by model:
+        fixed - length scale, the ends aiming at their neighbour, the middle points parallel to the line
+            between their neighbours
+        catmullRom - half the vector between the neighbours (the ends: to their neighbour)
+        cardinal - catmullRom shortened by (1 - cardinal): 0 is catmullRom, 1 straight lines
+        monotone - no overshoot past the points in x or y (Fritsch-Carlson)
+        All but fixed are the curve's derivative, so are divided by tension (it is put back when drawn).
+        Long splines are done by hermiteKernel """
+    if HAVE_NUMPY and len(points) >= KERNEL_MIN_POINTS:
+        xy = np.array(points, dtype=float)
+        tangents = hermiteKernel.defaultTangents(xy, np.array([0, len(points)]), model, scale, tension, cardinal)
+        return _inOut([tuple(t) for t in tangents.tolist()])
+
+    if model == "monotone":
+        return _inOut([(tx / tension, ty / tension) for tx, ty in _monotone(points)])
+
+    tangents = []
+    last = len(points) - 1
+    for i in range(len(points)):
+        (x0, y0), (x1, y1) = points[max(i-1, 0)], points[min(i+1, last)]
+        dx, dy = x1 - x0, y1 - y0
+        if model == "fixed":
+            hyp = math.hypot(dx, dy)
+            k = scale / hyp if hyp > 0 else 0.0
+        else:
+            #Catmull-Rom: per step between the neighbours (2 inside, 1 at the ends)
+            k = 1 / (min(i+1, last) - max(i-1, 0)) / tension
+            if model == "cardinal":
+                k *= 1 - cardinal
+        tangents.append((dx * k, dy * k))
+    return _inOut(tangents)
+
+
+def defaultTangentsMany(splines:list, scale:float, model:str="fixed", tension:float=1, cardinal:float=0.5) -> list:
+    """ defaultTangents() for each list of points in splines, in one go by hermiteKernel
+        (if there are enough points in all, to pay for the arrays) """
+    if not (HAVE_NUMPY and sum(len(points) for points in splines) >= KERNEL_MIN_POINTS):
+        return [defaultTangents(points, scale, model, tension, cardinal) for points in splines]
+
+    offsets = np.cumsum([0] + [len(points) for points in splines])
+    xy = np.array([pt for points in splines for pt in points], dtype=float)
+    tangents = [tuple(t) for t in hermiteKernel.defaultTangents(xy, offsets, model, scale, tension, cardinal).tolist()]
+    return [_inOut(tangents[start:end]) for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+
+
+def hermiteToBezier(p0, t0, p1, t1, tension:float):
+    """ the two inner control points of the cubic Bezier that is exactly the Hermite segment p0 -> p1
+        (t0 the out tangent of p0, t1 the in tangent of p1) """
+    k = tension / 3
+    return (p0[0] + t0[0]*k, p0[1] + t0[1]*k), (p1[0] - t1[0]*k, p1[1] - t1[1]*k)
+
+
+def bezierToHermite(p0, b1, b2, p1, tension:float):
+    """ the (out, in) tangents of the Hermite segment that is the cubic Bezier p0, b1, b2, p1 """
+    k = 3 / tension
+    return ((b1[0] - p0[0])*k, (b1[1] - p0[1])*k), ((p1[0] - b2[0])*k, (p1[1] - b2[1])*k)
+
+
+def bezierPoints(points:list, tangents:list, tension:float) -> list:
+    """ the spline's cubic Bezier control points: start, then (control, control, end) per segment """
+    controls = [points[0]]
+    for seg in range(len(points) - 1):
+        controls.extend(hermiteToBezier(points[seg], tangents[seg][1], points[seg+1], tangents[seg+1][0], tension))
+        controls.append(points[seg+1])
+    return controls
+
+
+def hermiteSteps(p0, t0, p1, t1, tension:float, tolerance:float, maxSteps:int) -> int:
+    """ the fewest lines for one Hermite segment to stay within tolerance of the curve.
+        Pure Python version of hermiteKernel.segmentSteps() """
+    (x0, y0), (x1, y1) = p0, p1
+    (b1x, b1y), (b2x, b2y) = hermiteToBezier(p0, t0, p1, t1, tension)
+    d1x, d1y = x0 - 2*b1x + b2x, y0 - 2*b1y + b2y
+    d2x, d2y = b1x - 2*b2x + x1, b1y - 2*b2y + y1
+
+    cx, cy = x1 - x0, y1 - y0
+    length2 = cx*cx + cy*cy
+    if length2 > 0:
+        along1 = ((b1x - x0)*cx + (b1y - y0)*cy) / length2
+        along2 = ((b2x - x0)*cx + (b2y - y0)*cy) / length2
+        #One line if the curve stays that close to the chord (and within its ends): straight edges
+        across = max(abs(d1y*cx - d1x*cy), abs(d2y*cx - d2x*cy)) / math.sqrt(length2)
+        if 0 <= along1 <= 1 and 0 <= along2 <= 1 and 0.75 * across <= tolerance:
+            return 1
+
+    bend = max(math.hypot(d1x, d1y), math.hypot(d2x, d2y))
+    return max(1, min(maxSteps, math.ceil(math.sqrt(0.75 * bend / tolerance))))
+
+
+def splineArrays(points:list, tangents:list):
+    """ the points (n, 2) and (in, out) tangents (n, 2, 2) as arrays, for hermiteKernel """
+    return np.array(points, dtype=float), np.array(tangents, dtype=float)
+
+
+def tessellate(points:list, tangents:list, tension:float, steps) -> list:
+    """ the spline as a polyline of (x, y): steps lines per segment, or a list of them (one per segment) """
+    if HAVE_NUMPY and len(points) >= KERNEL_MIN_POINTS:
+        xy, t = splineArrays(points, tangents)
+        return hermiteKernel.tessellate(xy, t, tension, steps).tolist()
+
+    if isinstance(steps, int):
+        steps = [steps] * (len(points) - 1)
+    flat = [tuple(points[0])]
+    append = flat.append
+    for seg, n in enumerate(steps):
+        x0, y0 = points[seg]
+        x1, y1 = points[seg+1]
+        #right facing tangent of p0, left of p1, accentuated (as in hermiteKernel.basisTable)
+        tx0, ty0 = tangents[seg][1][0] * tension, tangents[seg][1][1] * tension
+        tx1, ty1 = tangents[seg+1][0][0] * tension, tangents[seg+1][0][1] * tension
+        for i in range(1, n + 1):
+            t = i / n
+            t2 = t * t
+            t3 = t2 * t
+            h00 = 2*t3 - 3*t2 + 1
+            h10 = t3 - 2*t2 + t
+            h01 = -2*t3 + 3*t2
+            h11 = t3 - t2
+            append((h00*x0 + h10*tx0 + h01*x1 + h11*tx1, h00*y0 + h10*ty0 + h01*y1 + h11*ty1))
+    return flat
+
+
+def flatten(points:list, tangents:list, tension:float, tolerance:float, maxSteps:int):
+    """ (polyline, steps): the spline as a polyline of (x, y) within (about) tolerance of the curve,
+        and the lines (1 .. maxSteps) each segment was split into """
+    if HAVE_NUMPY and len(points) >= KERNEL_MIN_POINTS:
+        xy, t = splineArrays(points, tangents)
+        steps = hermiteKernel.segmentSteps(xy, t, tension, tolerance, maxSteps).tolist()
+        return hermiteKernel.tessellate(xy, t, tension, steps).tolist(), steps
+
+    steps = [hermiteSteps(points[seg], tangents[seg][1], points[seg+1], tangents[seg+1][0],
+                          tension, tolerance, maxSteps) for seg in range(len(points) - 1)]
+    return tessellate(points, tangents, tension, steps), steps
+
+
+def boundingBox(points:list):
+    """ (min x, min y, max x, max y) of points """
+    xs = [x for x, _y in points]
+    ys = [y for _x, y in points]
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def polylineEndAngle(points:list) -> float:
+    """ the direction (degrees, y down as on screen) the polyline arrives at its last point """
+    (x0, y0), (x1, y1) = points[-2], points[-1]
+    return math.degrees(math.atan2(y1 - y0, x1 - x0))
+
+
+def splineEndAngle(tangents:list) -> float:
+    """ the direction (degrees) a spline arrives at its last point: its in tangent there """
+    dx, dy = tangents[-1][0]
+    return math.degrees(math.atan2(dy, dx))
+
+
+def nearestVertex(points:list, x:float, y:float, xy=None):
+    """ (index, distance) of the point closest to (x, y). xy is points as an array, if already made """
+    if xy is None and HAVE_NUMPY and len(points) >= KERNEL_MIN_POINTS:
+        xy = np.array(points, dtype=float)
+    if xy is not None:
+        return hermiteKernel.nearestPoint(xy, x, y)
+    return min(((i, math.hypot(x - px, y - py)) for i, (px, py) in enumerate(points)), key=lambda near: near[1])
+
+
+class ArcLengthTable:
+    """ Cumulative lengths along a polyline of (x, y), for finding places along a line by distance:
+        labels, arrowheads & other decorations, and the nearest point to a click.
+        Built with (and kept as long as) the line's path """
+
+    def __init__(self, points:list):
+        self.points = points
+        #The points as a NumPy array, made for the first query on a long line (KERNEL_MIN_POINTS)
+        self._xy = None
+        self.lengths = [0.0]
+        total = 0.0
+        for (x0, y0), (x1, y1) in zip(points, points[1:]):
+            total += math.hypot(x1 - x0, y1 - y0)
+            self.lengths.append(total)
+
+    def length(self) -> float:
+        return self.lengths[-1]
+
+    def _locate(self, s:float):
+        """ (i, fraction): s is fraction of the way along line i (points i -> i+1) """
+        if len(self.points) < 2:
+            return 0, 0.0
+        s = max(0.0, min(s, self.lengths[-1]))
+        i = min(bisect.bisect_right(self.lengths, s), len(self.points) - 1) - 1
+        span = self.lengths[i+1] - self.lengths[i]
+        return i, ((s - self.lengths[i]) / span if span > 0 else 0.0)
+
+    def pointAtLength(self, s:float):
+        """ the (x, y) s along the line (clamped to the ends) """
+        i, f = self._locate(s)
+        x0, y0 = self.points[i]
+        if len(self.points) < 2:
+            return x0, y0
+        x1, y1 = self.points[i+1]
+        return x0 + (x1 - x0)*f, y0 + (y1 - y0)*f
+
+    def pointAtPercent(self, t:float):
+        """ the (x, y) fraction t in [0,1] of the way along the line """
+        return self.pointAtLength(t * self.lengths[-1])
+
+    def angleAtLength(self, s:float) -> float:
+        """ the direction (degrees, as polylineEndAngle()) of the line s along it """
+        i, f = self._locate(s)
+        if len(self.points) < 2:
+            return 0.0
+        (x0, y0), (x1, y1) = self.points[i], self.points[i+1]
+        return math.degrees(math.atan2(y1 - y0, x1 - x0))
+
+    def _array(self):
+        """ the points as an array for hermiteKernel, or None if the line is short (or no NumPy) """
+        if self._xy is None and HAVE_NUMPY and len(self.points) >= KERNEL_MIN_POINTS:
+            self._xy = np.array(self.points, dtype=float)
+        return self._xy
+
+    def nearest(self, x:float, y:float, within:float=math.inf):
+        """ (length along the line, distance, line index) of the closest point on the line to (x, y).
+            A new point there would be inserted after point `line index`. Lines whose bounding box,
+            grown by within, misses the point are skipped: the distance is inf if none is that close """
+        xy = self._array()
+        if xy is not None:
+            i, f, d = hermiteKernel.nearestOnPolyline(xy, x, y, within)
+            return self.lengths[i] + f * (self.lengths[i+1] - self.lengths[i]), d, i
+
+        best = (0.0, math.inf, 0)
+        for i, ((x0, y0), (x1, y1)) in enumerate(zip(self.points, self.points[1:])):
+            if (x < min(x0, x1) - within or x > max(x0, x1) + within or
+                    y < min(y0, y1) - within or y > max(y0, y1) + within):
+                continue
+            dx, dy = x1 - x0, y1 - y0
+            length2 = dx*dx + dy*dy
+            f = 0.0 if length2 == 0 else max(0.0, min(1.0, ((x - x0)*dx + (y - y0)*dy) / length2))
+            d = math.hypot(x - x0 - f*dx, y - y0 - f*dy)
+            if d < best[1] and d <= within:
+                best = (self.lengths[i] + f * (self.lengths[i+1] - self.lengths[i]), d, i)
+        return best
+
+    def nearestVertex(self, x:float, y:float):
+        """ (index, distance) of the line's point closest to (x, y) """
+        return nearestVertex(self.points, x, y, self._array())
+
+    def lengthAtPoint(self, x:float, y:float) -> float:
+        """ how far along the line the closest point to (x, y) is """
+        return self.nearest(x, y)[0]
@@ -0,0 +1,252 @@
+""" Tiled background cache for the static (unselected, unchanged) part of the scene.
+
+Each static node/ edge is recorded once into a QPicture (in item coords, main thread).
+Those pictures are replayed into QImage tiles by worker threads, and grScene.drawBackground()
+draws the tiles, so only dirty, selected or dragged items are painted live on top.
+An item flagged `inTileCache` skips its own paint() (see isTileCached()).
+
+Tiles are keyed by (scale, column, row) and dropped when any item they show changes.
+Until a tile arrives, drawBackground replays the pictures for that tile directly, so the
+output is always correct - the worker only makes the next frame cheaper.
+"""
+
+import math
+from collections import OrderedDict
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, QRectF, QPointF, Qt, Signal
+from PySide6.QtGui import QImage, QPainter, QPicture, QTransform
+from PySide6.QtWidgets import QStyleOptionGraphicsItem
+
+from  HGConstants import *
+
+
+def paintItemTree(item, painter, option):
+    """ paint item and (recursively) its visible children into painter, in item coordinates """
+    item.paint(painter, option, None)
+    children = sorted(item.childItems(), key=lambda c: c.zValue())
+    for child in children:
+        if not child.isVisible():
+            continue
+        painter.save()
+        #child -> parent coords
+        painter.setTransform(child.itemTransform(item)[0], True)
+        childOption = QStyleOptionGraphicsItem()
+        childOption.exposedRect = child.boundingRect()
+        paintItemTree(child, painter, childOption)
+        painter.restore()
+
+
+class _TileSignals(QObject):
+    """ QRunnable is not a QObject, so the worker reports back through this """
+    done = Signal(object, int, QImage)
+
+
+class _TileRenderer(QRunnable):
+    """ Render one tile from a snapshot of (picture, sceneTransform) pairs. Runs in the pool """
+
+    def __init__(self, key, epoch, tileRect:QRectF, scale:float, dpr:float, pictures, signals):
+        super().__init__()
+        self.key = key
+        self.epoch = epoch
+        self.tileRect = tileRect
+        self.scale = scale
+        self.dpr = dpr
+        self.pictures = pictures
+        self.signals = signals
+
+    def run(self):
+        size = int(TILE_SIZE * self.dpr)
+        image = QImage(size, size, QImage.Format_ARGB32_Premultiplied)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.scale(self.scale * self.dpr, self.scale * self.dpr)
+        painter.translate(-self.tileRect.topLeft())
+        for picture, transform in self.pictures:
+            painter.save()
+            painter.setTransform(transform, True)
+            painter.drawPicture(QPointF(0,0), picture)
+            painter.restore()
+        painter.end()
+        image.setDevicePixelRatio(self.dpr)
+        self.signals.done.emit(self.key, self.epoch, image)
+
+
+class TileCache(QObject):
+    """ The static layer for a grScene. Items report changes via itemChanged(), the scene draws via drawTiles() """
+
+    def __init__(self, scene):
+        super().__init__(scene)
+        self.scene = scene
+        self.enabled = False
+
+        #item -> (QPicture, sceneTransform, sceneRect) for the items drawn by the tiles
+        self.pictures = {}
+        #Items changed since they were last recorded. Re-recorded when things go quiet
+        self.dirty = set()
+
+        #(scale, col, row) -> QImage, least recently used first
+        self.tiles = OrderedDict()
+        #Bumped whenever a tile is dropped, so late results from the pool are discarded
+        self.epochs = {}
+        self.pending = set()
+
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(TILE_THREADS)
+        self._signals = _TileSignals()
+        self._signals.done.connect(self._tileDone)
+
+        self._rebakeTimer = QTimer(self)
+        self._rebakeTimer.setSingleShot(True)
+        self._rebakeTimer.setInterval(TILE_REBAKE_MS)
+        self._rebakeTimer.timeout.connect(self.rebake)
+
+    def setEnabled(self, enabled:bool):
+        """ switch the static layer on/ off. On, every node & edge is queued to be recorded """
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        if enabled:
+            for item in self.scene.items():
+                if item.data(KEY_ROLE) in (ROLE_NODE, ROLE_EDGE):
+                    self.dirty.add(item)
+            self._rebakeTimer.start()
+        else:
+            self.reset()
+
+    def reset(self):
+        """ drop everything - all items go back to painting themselves """
+        self._rebakeTimer.stop()
+        for item in list(self.pictures):
+            self._unbake(item)
+        self.pictures.clear()
+        self.dirty.clear()
+        self.tiles.clear()
+        self.epochs.clear()
+        self.pending.clear()
+
+    # Item bookkeeping
+    # ----------------
+
+    def itemChanged(self, item):
+        """ item (a node or edge) has moved/ changed/ been (de)selected: paint it live until things go quiet """
+        if not self.enabled:
+            return
+        if item in self.pictures:
+            self._unbake(item)
+        self.dirty.add(item)
+        self._rebakeTimer.start()
+
+    def itemRemoved(self, item):
+        """ item is leaving the scene - forget it """
+        if item in self.pictures:
+            self._unbake(item)
+        self.dirty.discard(item)
+
+    def _unbake(self, item):
+        """ take item out of the tiles, and let it paint itself """
+        _, _, rect = self.pictures.pop(item)
+        self.invalidate(rect)
+        item.inTileCache = False
+        item.update()
+
+    def rebake(self):
+        """ record the dirty items that have settled (in the scene, not selected) into pictures """
+        for item in list(self.dirty):
+            if item.scene() is not self.scene:
+                self.dirty.discard(item)
+                continue
+            if item.isSelected():
+                #Stays live, and gets re-queued when it is deselected
+                continue
+            self.dirty.discard(item)
+
+            picture = QPicture()
+            painter = QPainter(picture)
+            painter.setRenderHint(QPainter.Antialiasing)
+            itemRect = item.boundingRect().united(item.childrenBoundingRect())
+            painter.setClipRect(itemRect)
+            option = QStyleOptionGraphicsItem()
+            option.exposedRect = itemRect
+            paintItemTree(item, painter, option)
+            painter.end()
+
+            sceneRect = item.mapRectToScene(itemRect)
+            self.pictures[item] = (picture, item.sceneTransform(), sceneRect)
+            self.invalidate(sceneRect)
+            item.inTileCache = True
+            item.update()
+
+    # Tiles
+    # -----
+
+    def invalidate(self, sceneRect:QRectF):
+        """ drop the tiles (at every scale) that overlap sceneRect """
+        for key in list(self.tiles) + list(self.pending):
+            if self._tileRect(key).intersects(sceneRect):
+                self.tiles.pop(key, None)
+                self.pending.discard(key)
+                self.epochs[key] = self.epochs.get(key, 0) + 1
+
+    def _tileRect(self, key) -> QRectF:
+        scale, col, row = key
+        side = TILE_SIZE / scale
+        return QRectF(col * side, row * side, side, side)
+
+    def _picturesIn(self, rect:QRectF):
+        """ (picture, transform) for the cached items overlapping rect, in paint order """
+        found = [itm for itm in self.scene.items(rect, Qt.IntersectsItemBoundingRect, Qt.AscendingOrder)
+                    if itm in self.pictures]
+        return [(self.pictures[itm][0], self.pictures[itm][1]) for itm in found]
+
+    def drawTiles(self, painter:QPainter, rect:QRectF):
+        """ draw the static layer over the exposed scene rect. Called from grScene.drawBackground() """
+        if not self.enabled or not self.pictures:
+            return
+        #Views only scale (no rotation), so m11 is the zoom
+        scale = round(painter.worldTransform().m11(), 4)
+        if scale <= 0:
+            return
+        dpr = painter.device().devicePixelRatioF() if painter.device() else 1.0
+        side = TILE_SIZE / scale
+
+        for col in range(math.floor(rect.left() / side), math.floor(rect.right() / side) + 1):
+            for row in range(math.floor(rect.top() / side), math.floor(rect.bottom() / side) + 1):
+                key = (scale, col, row)
+                tileRect = self._tileRect(key)
+                image = self.tiles.get(key)
+                if image is not None:
+                    self.tiles.move_to_end(key)
+                    painter.drawImage(tileRect, image)
+                    continue
+
+                #Not rendered yet: draw the pictures directly, and ask the pool for the tile
+                pictures = self._picturesIn(tileRect)
+                if not pictures:
+                    continue
+                painter.save()
+                painter.setClipRect(tileRect.intersected(rect))
+                for picture, transform in pictures:
+                    painter.save()
+                    painter.setTransform(transform, True)
+                    painter.drawPicture(QPointF(0,0), picture)
+                    painter.restore()
+                painter.restore()
+                self._requestTile(key, tileRect, scale, dpr, pictures)
+
+    def _requestTile(self, key, tileRect, scale, dpr, pictures):
+        if key in self.pending:
+            return
+        self.pending.add(key)
+        epoch = self.epochs.get(key, 0)
+        self._pool.start(_TileRenderer(key, epoch, tileRect, scale, dpr, pictures, self._signals))
+
+    def _tileDone(self, key, epoch, image):
+        """ a tile has been rendered (main thread, via a queued signal) """
+        if key not in self.pending or epoch != self.epochs.get(key, 0):
+            #Invalidated while it was being rendered
+            return
+        self.pending.discard(key)
+        self.tiles[key] = image
+        while len(self.tiles) > TILE_CACHE_MAX_TILES:
+            self.tiles.popitem(last=False)
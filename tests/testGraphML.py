@@ -0,0 +1,106 @@
+""" GraphML load/ save round trips, without a display (headless.py).
+Run from the repo root: python -m pytest -q tests/testGraphML.py """
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import headless
+from HGConstants import *
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples")
+#Written before BezierEdge: QuadCurveEdges with h:StartTangent/ h:Tangent/ h:EndTangent
+OLD_SPLINES = os.path.join(EXAMPLES, "Test - all options.graphml")
+
+app = headless.headlessApp()
+
+
+def edgeGeometry(scene) -> dict:
+    """ edge ID -> (line class, points, tangents) as plain tuples """
+    geometry = {}
+    for edge in scene.edges():
+        line = edge.edgeLine
+        geometry[edge.data(KEY_INDEX)] = (type(line).__name__,
+                                          [(p.x(), p.y()) for p in line._p],
+                                          [((l.x(), l.y()), (r.x(), r.y())) for l, r in getattr(line, "_t", [])])
+    return geometry
+
+
+def saveAndReload(scene, edit=None):
+    """ (graphml text, (model, scene)) of scene written out and read back in, after edit(text) if given """
+    fd, fileName = tempfile.mkstemp(suffix=".graphml")
+    os.close(fd)
+    try:
+        headless.saveGraph(scene, fileName)
+        with open(fileName) as graphFile:
+            text = graphFile.read()
+        if edit:
+            text = edit(text)
+            with open(fileName, "w") as graphFile:
+                graphFile.write(text)
+        return text, headless.loadGraph(fileName)
+    finally:
+        os.remove(fileName)
+
+
+def assertClose(values1, values2, tolerance=1e-9):
+    """ (nested) sequences of numbers are equal to within tolerance """
+    if isinstance(values1, (int, float)):
+        assert abs(values1 - values2) <= tolerance, (values1, values2)
+        return
+    assert len(values1) == len(values2), (values1, values2)
+    for v1, v2 in zip(values1, values2):
+        assertClose(v1, v2, tolerance)
+
+
+def testOldSplinesRoundTrip():
+    """ QuadCurveEdge tangents are saved as BezierEdge controls, and read back as the same spline """
+    model, scene = headless.loadGraph(OLD_SPLINES)
+    before = edgeGeometry(scene)
+    assert any(kind == "HermiteSplineItem" and len(points) > 2 for kind, points, _t in before.values())
+
+    text, (model, scene) = saveAndReload(scene)
+    assert "y:BezierEdge" in text and "QuadCurveEdge" not in text
+    after = edgeGeometry(scene)
+    assert before.keys() == after.keys()
+    for idx in before:
+        assert before[idx][0] == after[idx][0], idx
+        assertClose(before[idx][1:], after[idx][1:])
+
+
+def splineEdges(scene) -> list:
+    """ the scene's spline edges, by ID """
+    return sorted((edge for edge in scene.edges() if edge._polyEdge == SPLINE), key=lambda edge: edge.data(KEY_INDEX))
+
+
+def testTangentModelRoundTrip():
+    """ each edge's tangent model is saved with it, and its tangents are kept as saved """
+    model, scene = headless.loadGraph(OLD_SPLINES)
+    edges = splineEdges(scene)
+    assert len(edges) >= 3
+    for edge, tangentModel in zip(edges, TANGENT_MODELS[1:] + TANGENT_MODELS):
+        edge.setTangentModel(tangentModel)
+    before = {edge.data(KEY_INDEX): edge.tangentModel for edge in edges}
+    assert DEFAULT_TANGENTS not in before.values()
+    geometry = edgeGeometry(scene)
+
+    text, (model, scene) = saveAndReload(scene)
+    assert {edge.data(KEY_INDEX): edge.tangentModel for edge in splineEdges(scene)} == before
+    after = edgeGeometry(scene)
+    for idx in geometry:
+        assert geometry[idx][0] == after[idx][0], idx
+        assertClose(geometry[idx][1:], after[idx][1:])
+
+
+def testUnknownTangentModel():
+    """ a tangent model this version doesn't know is read as DEFAULT_TANGENTS """
+    model, scene = headless.loadGraph(OLD_SPLINES)
+    for edge in splineEdges(scene):
+        edge.setTangentModel(TANGENTS_CARDINAL)
+    text, (model, scene) = saveAndReload(scene, lambda text: text.replace(
+        f'tangentModel="{TANGENTS_CARDINAL}"', 'tangentModel="noSuchModel"'))
+    assert "noSuchModel" in text
+    edges = splineEdges(scene)
+    assert edges and all(edge.tangentModel == DEFAULT_TANGENTS for edge in edges)
@@ -0,0 +1,189 @@
+""" The graph scene (grScene) and its views, without a display (headless.py).
+Run from the repo root: python -m pytest -q tests/testScene.py """
+
+import gc
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import headless
+import leakTracker
+import mainwindow
+from mainwindow import VisNodeItem, VisEdgeItem
+from graphView import GraphView
+from HGConstants import *
+
+from PySide6.QtCore import Qt, QPointF, QRectF
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples")
+ALL_OPTIONS = os.path.join(EXAMPLES, "Test - all options.graphml")
+
+app = headless.headlessApp()
+
+
+def deleteEdge(model, scene, idx:int):
+    """ delete edge idx as Edit>Delete does (MainWindow.delEdge), without a list widget """
+    edge = scene.findItemByIdx(idx)
+    model.delEdge(idx)
+    scene.clearEdgeOnly(edge)
+    scene.deleteItemAndChildren(edge)
+
+
+def deleteNode(model, scene, node):
+    """ delete node, and its edges first, as MainWindow.delNode does """
+    for idx in model.edgesAtNode(node):
+        deleteEdge(model, scene, idx)
+    idx = node.data(KEY_INDEX)
+    scene.deleteItemAndChildren(node)
+    model.delNode(idx)
+
+
+def itemExtents(scene) -> QRectF:
+    """ the nodes' & edges' extents (with their labels), measured afresh """
+    rect = QRectF()
+    for item in scene.nodes() + scene.edges():
+        rect = rect.united(scene._itemExtent(item))
+    return rect
+
+
+def testNewViewGetsCursor():
+    """ a view opened after the cursor changed starts with it, and follows later changes """
+    model, scene = headless.loadGraph(ALL_OPTIONS)
+    first = GraphView(scene)
+    scene.setViewCursor(Qt.CrossCursor)
+    assert first.cursor().shape() == Qt.CrossCursor
+
+    second = GraphView(scene)
+    assert second.cursor().shape() == Qt.CrossCursor
+    scene.setViewCursor(Qt.ArrowCursor)
+    assert first.cursor().shape() == second.cursor().shape() == Qt.ArrowCursor
+
+
+def testContentBounds():
+    """ contentBounds() grows at once, and shrinks (lazily) when the outermost node moves in or goes """
+    model, scene = headless.loadGraph(ALL_OPTIONS)
+    bounds = scene.contentBounds()
+    assert not bounds.isNull() and bounds == itemExtents(scene)
+
+    outermost = max(scene.nodes(), key=lambda node: scene._itemExtent(node).right())
+    outermost.moveBy(300, 0)
+    grown = scene.contentBounds()
+    assert grown.right() == scene._itemExtent(outermost).right() > bounds.right()
+    assert grown == itemExtents(scene)
+
+    outermost.setPos(bounds.center())
+    moved = scene.contentBounds()
+    assert moved.right() < bounds.right() and bounds.contains(moved)
+    assert moved == itemExtents(scene)
+
+    outermost = max(scene.nodes(), key=lambda node: scene._itemExtent(node).right())
+    deleteNode(model, scene, outermost)
+    deleted = scene.contentBounds()
+    assert moved.contains(deleted) and deleted != moved
+    assert deleted == itemExtents(scene)
+
+
+def testDeletingFreesItems():
+    """ deleting every edge, then every node, leaves no node/ edge/ label/ handle wrappers alive """
+    leakTracker.DEBUG_LEAKS = True
+    try:
+        model, scene = headless.loadGraph(ALL_OPTIONS)
+        assert leakTracker.liveItemCounts()
+        for idx in [edge.data(KEY_INDEX) for edge in scene.edges()]:
+            deleteEdge(model, scene, idx)
+        for node in scene.nodes():
+            deleteNode(model, scene, node)
+        node = None
+        gc.collect()
+        assert leakTracker.liveItemCounts() == {}
+    finally:
+        leakTracker.DEBUG_LEAKS = False
+
+
+def gridGraph(fileName:str, side:int):
+    """ write a side x side grid of nodes, joined in rows (straight and curved edges), to fileName.
+        It starts at (100, 100): the layers keep what is under the mouse live, and until it moves that is (0, 0) """
+    model, scene = headless.newGraph()
+    nodes = []
+    for i in range(side * side):
+        node = VisNodeItem(QPointF(100 + (i % side) * 80, 100 + (i // side) * 80), model, None)
+        scene.addItem(node)
+        nodes.append(node)
+    for i in range(len(nodes) - 1):
+        if (i + 1) % side:
+            points = [QPointF(140 + (i % side) * 80, 120 + (i // side) * 80)] if i % 2 else []
+            scene.addItem(VisEdgeItem(model, None, nodes[i], nodes[i+1], points=points))
+    headless.saveGraph(scene, fileName)
+    return len(nodes), len(nodes) - side
+
+
+@pytest.fixture
+def gridFile():
+    fd, fileName = tempfile.mkstemp(suffix=".graphml")
+    os.close(fd)
+    yield fileName, gridGraph(fileName, 6)
+    os.remove(fileName)
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def testAggregateLayers(gridFile, monkeypatch, compact):
+    """ past NODE_LAYER_MIN_NODES/ EDGE_LAYER_MIN_EDGES idle nodes & edges are parked in the layers,
+        come back as items when wanted, and are parked again once idle """
+    fileName, (nodeCount, edgeCount) = gridFile
+    monkeypatch.setattr(mainwindow, "COMPACT_ITEMS", compact)
+    monkeypatch.setattr(mainwindow, "NODE_LAYER_MIN_NODES", nodeCount + 1)
+    monkeypatch.setattr(mainwindow, "EDGE_LAYER_MIN_EDGES", edgeCount + 1)
+    model, scene = headless.loadGraph(fileName)
+    assert not scene.nodeLayer.layerEnabled and not scene.edgeLayer.layerEnabled
+    assert all(item.compact == compact for item in scene.nodes() + scene.edges())
+
+    monkeypatch.setattr(mainwindow, "NODE_LAYER_MIN_NODES", nodeCount)
+    monkeypatch.setattr(mainwindow, "EDGE_LAYER_MIN_EDGES", edgeCount)
+    model, scene = headless.loadGraph(fileName)
+    nodeLayer, edgeLayer = scene.nodeLayer, scene.edgeLayer
+    assert nodeLayer.layerEnabled and edgeLayer.layerEnabled
+    assert (len(nodeLayer.parked), len(edgeLayer.parked)) == (nodeCount, edgeCount)
+    #Parked items are out of the scene, but still the scene's nodes & edges
+    assert (len(scene.nodes()), len(scene.edges())) == (nodeCount, edgeCount)
+    assert all(item.scene() is None and item.parkedIn is not None for item in scene.nodes() + scene.edges())
+    assert scene.contentBounds() == itemExtents(scene)
+
+    #Looked up by ID: promoted
+    node = scene.nodes()[0]
+    assert scene.findItemByIdx(node.data(KEY_INDEX)) is node
+    assert node.scene() is scene and not nodeLayer.isParked(node)
+    edge = scene.edges()[0]
+    assert scene.findItemByIdx(edge.data(KEY_INDEX)) is edge
+    assert edge.scene() is scene and not edgeLayer.isParked(edge)
+
+    #Selected: all promoted. Deselected & idle: parked again
+    scene.selectAllItems()
+    assert not nodeLayer.parked and not edgeLayer.parked
+    assert len(scene.selectedItems()) == nodeCount + edgeCount
+    scene.clearSelection()
+    nodeLayer.parkIdle()
+    edgeLayer.parkIdle()
+    assert (len(nodeLayer.parked), len(edgeLayer.parked)) == (nodeCount, edgeCount)
+
+    #Switched off: every item back in the scene, and the file written is the same
+    text = scene.toGraphML()
+    nodeLayer.setLayerEnabled(False)
+    edgeLayer.setLayerEnabled(False)
+    assert all(item.scene() is scene and item.parkedIn is None for item in scene.nodes() + scene.edges())
+    assert scene.toGraphML() == text
+
+
+def testLayerHooks():
+    """ a layer has to say how it stores & finds its items """
+    from aggregateLayer import AggregateLayer
+
+    class HalfLayer(AggregateLayer):
+        role = ROLE_NODE
+
+    model, scene = headless.newGraph()
+    with pytest.raises(TypeError, match="HalfLayer"):
+        HalfLayer(scene)._store(0, None)
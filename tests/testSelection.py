@@ -0,0 +1,185 @@
+""" Selection: the scene <-> list sync (selectionSync.py), without a display (headless.py).
+Run from the repo root: python -m pytest -q tests/testSelection.py """
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import headless
+from graphView import GraphView
+from selectionSync import SelectionSync
+from HGConstants import *
+
+from PySide6.QtCore import Qt, QPointF, QRectF, QItemSelection, QItemSelectionModel
+from PySide6.QtGui import QPainterPath
+from PySide6.QtTest import QTest
+from PySide6.QtWidgets import QListWidget
+
+EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples")
+ALL_OPTIONS = os.path.join(EXAMPLES, "Test - all options.graphml")
+
+app = headless.headlessApp()
+
+
+def settle():
+    """ let queued timers (the sync's coalescing one) run """
+    for _ in range(3):
+        app.processEvents()
+
+
+def sceneIds(scene) -> set:
+    """ IDs of the selected nodes & edges """
+    return {item.data(KEY_INDEX) for item in scene.selectedItems() if item.data(KEY_ROLE) in (ROLE_NODE, ROLE_EDGE)}
+
+
+def listIds(listWidget) -> set:
+    return {lWItem.data(KEY_INDEX) for lWItem in listWidget.selectedItems()}
+
+
+def syncedGraph(fileName:str = ALL_OPTIONS):
+    """ (model, scene, listWidget, sync, batches): a graph with its list kept in step.
+        batches gets each set of IDs the sync reports """
+    listWidget = QListWidget()
+    model, scene = headless.loadGraph(fileName, listWidget)
+    sync = SelectionSync(scene, listWidget)
+    batches = []
+    sync.selectionSynced.connect(batches.append)
+    return model, scene, listWidget, sync, batches
+
+
+def bandOver(scene, rect:QRectF):
+    """ a rubber band dragged out to rect: a selection change per mouse move, growing to rect """
+    for step in range(1, 6):
+        path = QPainterPath()
+        path.addRect(QRectF(rect.topLeft(), rect.size() * (step / 5)))
+        scene.setSelectionArea(path)
+
+
+def testRubberBandToList():
+    """ a rubber band's burst of scene changes reaches the list as one batch, with exactly its IDs """
+    model, scene, listWidget, sync, batches = syncedGraph()
+    bounds = scene.contentBounds()
+    bandOver(scene, QRectF(bounds.topLeft(), bounds.size() / 2))
+    assert not batches
+    settle()
+
+    selected = sceneIds(scene)
+    assert 1 < len(selected) < len(scene.nodes()) + len(scene.edges())
+    assert batches == [selected]
+    assert listIds(listWidget) == selected
+
+    #Shrinking the band deselects in the list too
+    bandOver(scene, QRectF(bounds.topLeft(), bounds.size() / 4))
+    settle()
+    assert len(batches) == 2
+    assert listIds(listWidget) == sceneIds(scene) == batches[-1]
+    assert len(batches[-1]) < len(selected)
+
+
+def testListToScene():
+    """ selecting list rows selects those nodes & edges in the scene, in one batch """
+    model, scene, listWidget, sync, batches = syncedGraph()
+    rows = range(0, listWidget.count(), 2)
+    selection = QItemSelection()
+    for row in rows:
+        index = listWidget.model().index(row, 0)
+        selection.select(index, index)
+    listWidget.selectionModel().select(selection, QItemSelectionModel.Select)
+    settle()
+
+    expected = {listWidget.item(row).data(KEY_INDEX) for row in rows}
+    assert len(expected) > 1
+    assert sceneIds(scene) == expected
+    assert batches == [expected]
+
+    listWidget.clearSelection()
+    settle()
+    assert sceneIds(scene) == set() and batches[-1] == set()
+
+
+def testReset():
+    """ after reset() (File>New/ Open), the same IDs in a new graph are synced afresh """
+    model, scene, listWidget, sync, batches = syncedGraph()
+    bounds = scene.contentBounds()
+    bandOver(scene, bounds)
+    settle()
+    selected = sceneIds(scene)
+    assert selected and listIds(listWidget) == selected
+
+    #A change still waiting to be synced is dropped, with what was synced
+    bandOver(scene, QRectF(bounds.topLeft(), bounds.size() / 2))
+    sync.reset()
+    assert sync.selectedIds == set()
+    settle()
+    assert len(batches) == 1
+
+    #As File>New then Open: clear everything, then load again (IDs start over, so the same ones come back)
+    scene.clearSelection()
+    model.clear()
+    listWidget.clear()
+    scene.clear()
+    sync.reset()
+    settle()
+    assert sync.selectedIds == set()
+    batchCount = len(batches)
+
+    with open(ALL_OPTIONS) as graphFile:
+        scene.loadGraphML(graphFile.read())
+    bandOver(scene, scene.contentBounds())
+    settle()
+    assert sceneIds(scene) == selected
+    assert listIds(listWidget) == selected
+    assert batches[batchCount:] == [selected]
+
+
+# Bulk selection (grScene.selectWhere & co)
+# -----------------------------------------
+
+def selectOnce(scene, operation) -> set:
+    """ run operation(), check it emitted one selectionChanged and selected only nodes & edges:
+        return the selected IDs """
+    changes = []
+    scene.selectionChanged.connect(lambda: changes.append(1))
+    operation()
+    scene.selectionChanged.disconnect()
+    assert len(changes) == 1
+    selected = scene.selectedItems()
+    assert all(item.data(KEY_ROLE) in (ROLE_NODE, ROLE_EDGE) for item in selected)
+    return {item.data(KEY_INDEX) for item in selected}
+
+
+def clickEdge(scene, edge) -> GraphView:
+    """ click the middle of edge in a new view (returned, to keep it open), as the user would """
+    view = GraphView(scene)
+    view.resize(800, 600)
+    view.show()
+    view.centerOn(scene.contentBounds().center())
+    x, y = edge.edgeLine.arcLength().pointAtPercent(0.5)
+    QTest.mouseClick(view.viewport(), Qt.LeftButton, Qt.NoModifier,
+                     view.mapFromScene(edge.edgeLine.mapToScene(QPointF(x, y))))
+    settle()
+    return view
+
+
+def testBulkSelection():
+    model, scene = headless.loadGraph(ALL_OPTIONS)
+    nodes = {node.data(KEY_INDEX) for node in scene.nodes()}
+    edges = {edge.data(KEY_INDEX) for edge in scene.edges()}
+    assert nodes and edges
+
+    #Start from one edge being edited, with its handles showing
+    view = clickEdge(scene, [edge for edge in scene.edges() if edge._polyEdge == SPLINE][0])
+    assert scene.onlySelected is not None and scene.onlySelected.edgeLine._pHandles
+    assert selectOnce(scene, scene.selectAllItems) == nodes | edges
+    assert scene.onlySelected is None
+    assert selectOnce(scene, scene.invertSelection) == set()
+    assert selectOnce(scene, scene.selectNodes) == nodes
+    assert selectOnce(scene, scene.invertSelection) == edges
+    assert selectOnce(scene, scene.selectEdges) == edges
+    assert selectOnce(scene, scene.selectNodes) == nodes
+
+    named = {item.data(KEY_INDEX) for item in scene.nodes() + scene.edges() if "1" in item.metadata.get("name", "")}
+    assert 0 < len(named) < len(nodes | edges)
+    assert selectOnce(scene, lambda: scene.selectByMetadata(lambda metadata: "1" in metadata.get("name", ""))) == named
+    assert selectOnce(scene, lambda: scene.selectWhere(lambda item: False)) == set()
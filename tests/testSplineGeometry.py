@@ -0,0 +1,263 @@
+""" Spline & polyline geometry (splineGeometry.py): known answers, and NumPy (hermiteKernel) against pure Python.
+Run from the repo root: python -m pytest -q tests/testSplineGeometry.py """
+
+import os
+import sys
+import math
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import hermiteKernel
+import splineGeometry
+from splineGeometry import ArcLengthTable
+from HGConstants import *
+
+#HermiteSplineItem.linesPerSegment: the most lines a segment is flattened to
+LINES_PER_SEGMENT = 40
+
+needsNumpy = pytest.mark.skipif(not hermiteKernel.HAVE_NUMPY, reason="NumPy not installed")
+
+
+def bothWays(fn):
+    """ (pure Python result, hermiteKernel result) of fn(), which should make its own tables """
+    kernelMin = splineGeometry.KERNEL_MIN_POINTS
+    try:
+        splineGeometry.KERNEL_MIN_POINTS = math.inf
+        python = fn()
+        splineGeometry.KERNEL_MIN_POINTS = 0
+        kernel = fn()
+    finally:
+        splineGeometry.KERNEL_MIN_POINTS = kernelMin
+    return python, kernel
+
+
+def assertClose(values1, values2, tolerance=1e-9):
+    """ (nested) sequences of numbers are equal to within tolerance """
+    if isinstance(values1, (int, float)):
+        assert values1 == values2 or abs(values1 - values2) <= tolerance, (values1, values2)
+        return
+    assert len(values1) == len(values2), (values1, values2)
+    for v1, v2 in zip(values1, values2):
+        assertClose(v1, v2, tolerance)
+
+
+def assertSameNearest(python, kernel, lengths:list):
+    """ the same (length along, distance, line index) from ArcLengthTable.nearest(). When the closest point
+        is the corner between two lines rounding decides which is reported, so either will do """
+    assertClose(python[:2], kernel[:2])
+    if python[2] != kernel[2]:
+        corner = max(python[2], kernel[2])
+        assert abs(python[2] - kernel[2]) == 1 and kernel[0] == pytest.approx(lengths[corner]), (python, kernel)
+
+
+def squareWave(nPoints:int) -> list:
+    """ a polyline going right: across 10, up 40, across 10, down 40... Line i is across if i is even,
+        at y = 0 if i % 4 == 0. All corners are whole numbers, so distances to it are exact """
+    points = [(0.0, 0.0)]
+    while len(points) < nPoints:
+        x, y = points[-1]
+        points.append((x + 10, y) if len(points) % 2 else (x, 40 - y))
+    return points
+
+
+def randomSpline(rnd, nPoints:int):
+    """ (points, tangents) of a spline through nPoints random points, with random tangents """
+    points = [(rnd.uniform(0, 1000), rnd.uniform(0, 1000)) for _ in range(nPoints)]
+    tangents = [((rnd.uniform(-50, 50), rnd.uniform(-50, 50)),
+                 (rnd.uniform(-50, 50), rnd.uniform(-50, 50))) for _ in range(nPoints)]
+    return points, tangents
+
+
+def bezierAt(p0, b1, b2, p1, t:float):
+    """ the (x, y) t in [0,1] along the cubic Bezier p0, b1, b2, p1 """
+    u = 1 - t
+    return tuple(u*u*u*a + 3*u*u*t*b + 3*u*t*t*c + t*t*t*d for a, b, c, d in zip(p0, b1, b2, p1))
+
+
+# Splines
+# -------
+
+def testBezierRoundTrip():
+    """ bezierPoints() is the same curve, and bezierToHermite() gets the tangents back from it """
+    rnd = random.Random(49)
+    for nPoints in (2, 3, 12):
+        points, tangents = randomSpline(rnd, nPoints)
+        controls = splineGeometry.bezierPoints(points, tangents, HERMITE_TENSION)
+        assert len(controls) == 3*nPoints - 2
+        curve = splineGeometry.tessellate(points, tangents, HERMITE_TENSION, 8)
+        for seg in range(nPoints - 1):
+            p0, b1, b2, p1 = controls[3*seg : 3*seg + 4]
+            assert (p0, p1) == (points[seg], points[seg+1])
+            assertClose(splineGeometry.bezierToHermite(p0, b1, b2, p1, HERMITE_TENSION),
+                        (tangents[seg][1], tangents[seg+1][0]))
+            assertClose([bezierAt(p0, b1, b2, p1, i/8) for i in range(1, 9)], curve[8*seg + 1 : 8*seg + 9])
+
+
+@pytest.mark.parametrize("kernel", [False, True])
+def testFlattenTolerance(kernel):
+    """ every point of a finely tessellated curve is within tolerance of the flattened one """
+    if kernel and not hermiteKernel.HAVE_NUMPY:
+        pytest.skip("NumPy not installed")
+    rnd = random.Random(49)
+    for nPoints in (2, 4, 12):
+        points, tangents = randomSpline(rnd, nPoints)
+        python, numpy = bothWays(lambda: splineGeometry.flatten(points, tangents, HERMITE_TENSION, FLATTEN_TOLERANCE, 1000))
+        flat, steps = numpy if kernel else python
+        assert len(flat) == sum(steps) + 1
+        table = ArcLengthTable(flat)
+        for x, y in splineGeometry.tessellate(points, tangents, HERMITE_TENSION, 500):
+            assert table.nearest(x, y)[1] <= FLATTEN_TOLERANCE
+    #Straight, or nearly: one line a segment
+    line = [(0.0, 0.0), (100.0, 0.0)]
+    assert splineGeometry.flatten(line, [((0, 0), (10, 0)), ((10, 0), (0, 0))], HERMITE_TENSION, 0.5, 40)[1] == [1]
+
+
+def testArcLengthTable():
+    """ a polyline with known lengths: right 3, down 4, left 3 """
+    table = ArcLengthTable([(0.0, 0.0), (3.0, 0.0), (3.0, 4.0), (0.0, 4.0)])
+    assert table.lengths == [0.0, 3.0, 7.0, 10.0]
+    assert table.length() == 10.0
+    assert table.pointAtLength(5) == (3.0, 2.0)
+    assert table.pointAtLength(7) == (3.0, 4.0)
+    assert table.pointAtLength(-1) == (0.0, 0.0)
+    assert table.pointAtLength(20) == (0.0, 4.0)
+    assert table.pointAtPercent(0.9) == (1.0, 4.0)
+    assert table.angleAtLength(1) == 0.0
+    assert table.angleAtLength(5) == 90.0
+    assert table.angleAtLength(9) == 180.0
+
+    assert table.nearest(4.0, 1.0) == (4.0, 1.0, 1)
+    assert table.nearest(1.0, 5.0) == (9.0, 1.0, 2)
+    assert table.nearest(1.5, 2.0) == (5.0, 1.5, 1)
+    assert table.nearest(-3.0, -4.0) == (0.0, 5.0, 0)
+    assert table.nearest(1.5, 2.0, 1) == (0.0, math.inf, 0)
+    assert table.lengthAtPoint(2.0, -1.0) == 2.0
+    assert table.nearestVertex(2.9, 3.8) == (2, pytest.approx(math.hypot(0.1, 0.2)))
+
+    point = ArcLengthTable([(1.0, 2.0)])
+    assert point.length() == 0.0
+    assert point.pointAtLength(5) == (1.0, 2.0)
+
+
+@needsNumpy
+def testKernelAgrees():
+    """ tessellate(), flatten() & nearestVertex() give the same in Python and NumPy """
+    rnd = random.Random(49)
+    for nPoints in (2, 5, 30):
+        points, tangents = randomSpline(rnd, nPoints)
+        for steps in (1, 7, [rnd.randint(1, 20) for _ in range(nPoints - 1)]):
+            assertClose(*bothWays(lambda: splineGeometry.tessellate(points, tangents, HERMITE_TENSION, steps)))
+        python, kernel = bothWays(lambda: splineGeometry.flatten(points, tangents, HERMITE_TENSION, FLATTEN_TOLERANCE, LINES_PER_SEGMENT))
+        assert python[1] == kernel[1]
+        assertClose(python[0], kernel[0])
+        for _ in range(20):
+            x, y = rnd.uniform(-100, 1100), rnd.uniform(-100, 1100)
+            assertClose(*bothWays(lambda: splineGeometry.nearestVertex(points, x, y)))
+
+
+# Default tangents
+# ----------------
+
+def randomPoints(rnd, nPoints:int) -> list:
+    return [(rnd.uniform(0, 1000), rnd.uniform(0, 1000)) for _ in range(nPoints)]
+
+
+@pytest.mark.parametrize("model", TANGENT_MODELS)
+def testTangentsBatched(model):
+    """ defaultTangentsMany() is defaultTangents() for each spline: short ones (Python) and long (NumPy) alike """
+    rnd = random.Random(50)
+    kernelMin = splineGeometry.KERNEL_MIN_POINTS
+    splines = [randomPoints(rnd, n) for n in (2, 2, 3, 5, kernelMin, kernelMin + 7, 2)]
+    splines.append([(5.0, 5.0), (5.0, 5.0), (20.0, 5.0)])
+    batch = splineGeometry.defaultTangentsMany(splines, 40, model, HERMITE_TENSION)
+    assert len(batch) == len(splines)
+    for points, tangents in zip(splines, batch):
+        assert len(tangents) == len(points)
+        assertClose(tangents, splineGeometry.defaultTangents(points, 40, model, HERMITE_TENSION))
+    if hermiteKernel.HAVE_NUMPY:
+        assertClose(*bothWays(lambda: splineGeometry.defaultTangentsMany(splines, 40, model, HERMITE_TENSION)))
+        for points in splines:
+            assertClose(*bothWays(lambda: splineGeometry.defaultTangents(points, 40, model, HERMITE_TENSION)))
+
+
+def overshoot(points:list, tangents:list) -> float:
+    """ how far the spline goes past its points: the most any segment leaves its ends' bounding box """
+    curve = splineGeometry.tessellate(points, tangents, HERMITE_TENSION, 50)
+    worst = 0.0
+    for seg, ((x0, y0), (x1, y1)) in enumerate(zip(points, points[1:])):
+        for x, y in curve[50*seg : 50*seg + 51]:
+            worst = max(worst, min(x0, x1) - x, x - max(x0, x1), min(y0, y1) - y, y - max(y0, y1))
+    return worst
+
+
+def testMonotoneNoOvershoot():
+    """ monotone tangents keep each segment between its points, in x and in y (Catmull-Rom's don't) """
+    rnd = random.Random(50)
+    for nPoints in (2, 3, 6, splineGeometry.KERNEL_MIN_POINTS + 5):
+        points = randomPoints(rnd, nPoints)
+        #Steps, flat runs & a spike: the shapes that overshoot
+        points += [(points[-1][0] + 100, points[-1][1]), (points[-1][0] + 110, points[-1][1] + 400),
+                   (points[-1][0] + 300, points[-1][1] + 400), (points[-1][0] + 310, points[-1][1])]
+        for tangents in bothWays(lambda: splineGeometry.defaultTangents(points, 40, TANGENTS_MONOTONE, HERMITE_TENSION)):
+            assert overshoot(points, tangents) <= 1e-9
+        assert overshoot(points, splineGeometry.defaultTangents(points, 40, TANGENTS_CATMULL_ROM, HERMITE_TENSION)) > 1
+
+
+# Nearest point on a long polyline
+# --------------------------------
+
+WAVE = squareWave(5000)
+WAVE_LENGTHS = ArcLengthTable(WAVE).lengths
+#A line across at y = 0, well inside the polyline (so the kernel's index into the lines it kept is translated)
+LINE = 3000
+
+
+@needsNumpy
+@pytest.mark.parametrize("dy, expected", [(-2, 2.0),                    #inside HITSIZE
+                                          (-HITSIZE, float(HITSIZE)),   #exactly at it
+                                          (-HITSIZE - 0.001, math.inf), #just outside
+                                          (-1000, math.inf)])           #nowhere near
+def testNearestWithinHitSize(dy, expected):
+    (x0, y0), (x1, y1) = WAVE[LINE], WAVE[LINE + 1]
+    assert y0 == y1 == 0
+    x, y = x0 + 5, y0 + dy
+    python, kernel = bothWays(lambda: ArcLengthTable(WAVE).nearest(x, y, HITSIZE))
+    assert python == kernel
+    along, dist, idx = kernel
+    assert dist == expected
+    if dist == math.inf:
+        assert (along, idx) == (0.0, 0)
+    else:
+        assert idx == LINE
+        assert along == pytest.approx(WAVE_LENGTHS[LINE] + 5)
+
+
+@needsNumpy
+def testNearestOnPolylineMisses():
+    """ nothing within reach: hermiteKernel says so with an infinite distance """
+    import numpy as np
+    xy = np.array(WAVE, dtype=float)
+    assert hermiteKernel.nearestOnPolyline(xy, -100, -100, HITSIZE) == (0, 0.0, math.inf)
+    i, f, d = hermiteKernel.nearestOnPolyline(xy, -100, -100)
+    assert (i, f, d) == (0, 0.0, math.hypot(100, 100))
+
+
+@needsNumpy
+def testNearestAgrees():
+    """ random points over (and around) the polyline, within HITSIZE and unlimited """
+    rnd = random.Random(48)
+    maxx = WAVE[-1][0]
+    #A table each: the kernel's keeps its points as an array
+    tables = {False: ArcLengthTable(WAVE), True: ArcLengthTable(WAVE)}
+    table = lambda: tables[splineGeometry.KERNEL_MIN_POINTS == 0]
+    for _ in range(100):
+        x, y = rnd.uniform(-20, maxx + 20), rnd.uniform(-20, 60)
+        for within in (HITSIZE, math.inf):
+            python, kernel = bothWays(lambda: table().nearest(x, y, within))
+            assertSameNearest(python, kernel, WAVE_LENGTHS)
+        python, kernel = bothWays(lambda: table().nearestVertex(x, y))
+        assertClose(python, kernel)
+        assertClose(python, bothWays(lambda: splineGeometry.nearestVertex(WAVE, x, y))[1])